@@ -1,4 +1,5 @@
 from app.agent.base import BaseAgent
+from app.agent.doc_reader import DocReaderAgent
 from app.agent.planning import PlanningAgent
 from app.agent.react import ReActAgent
 from app.agent.swe import SWEAgent
@@ -7,6 +8,7 @@ from app.agent.toolcall import ToolCallAgent
 
 __all__ = [
     "BaseAgent",
+    "DocReaderAgent",
     "PlanningAgent",
     "ReActAgent",
     "SWEAgent",
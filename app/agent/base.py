@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
-from typing import List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
+from app.checkpoint import CheckpointStore
 from app.llm import LLM
 from app.logger import logger
 from app.schema import AgentState, Memory, Message
@@ -41,6 +42,14 @@ class BaseAgent(BaseModel, ABC):
 
     duplicate_threshold: int = 2
 
+    # Checkpointing
+    checkpoint_id: Optional[str] = Field(
+        None, description="Run ID under which progress is saved after every step"
+    )
+    checkpoints: CheckpointStore = Field(
+        default_factory=CheckpointStore, description="Where checkpoints are saved"
+    )
+
     class Config:
         arbitrary_types_allowed = True
         extra = "allow"  # Allow extra fields for flexibility in subclasses
@@ -128,7 +137,34 @@ class BaseAgent(BaseModel, ABC):
         if request:
             self.update_memory("user", request)
 
-        results: List[str] = []
+        return await self._run_steps([])
+
+    async def resume(self, checkpoint_id: str) -> str:
+        """Continue a run from the checkpoint saved after its last completed step.
+
+        Args:
+            checkpoint_id: The `checkpoint_id` the interrupted run was saved under.
+
+        Returns:
+            A string summarizing the execution results, including the steps run before the checkpoint.
+
+        Raises:
+            RuntimeError: If the agent is not in IDLE state at start.
+            ValueError: If there is no checkpoint for the run.
+        """
+        if self.state != AgentState.IDLE:
+            raise RuntimeError(f"Cannot resume agent from state: {self.state}")
+
+        snapshot = self.checkpoints.load(checkpoint_id)
+        if snapshot is None:
+            raise ValueError(f"No checkpoint found for run: {checkpoint_id}")
+
+        self.checkpoint_id = checkpoint_id
+        self.restore(snapshot)
+        logger.info(f"Resuming run {checkpoint_id} after step {self.current_step}")
+        return await self._run_steps(snapshot.get("results", []))
+
+    async def _run_steps(self, results: List[str]) -> str:
         async with self.state_context(AgentState.RUNNING):
             while (
                 self.current_step < self.max_steps and self.state != AgentState.FINISHED
@@ -142,14 +178,48 @@ class BaseAgent(BaseModel, ABC):
                     self.handle_stuck_state()
 
                 results.append(f"Step {self.current_step}: {step_result}")
+                self.save_checkpoint(results)
 
             if self.current_step >= self.max_steps:
                 self.current_step = 0  # setting back to 0 when reached max steps
                 self.state = AgentState.IDLE  # setting the status
                 results.append(f"Terminated: Reached max steps ({self.max_steps})")
 
+        # The run is over, so there is nothing left to resume
+        if self.checkpoint_id:
+            self.checkpoints.delete(self.checkpoint_id)
+
         return "\n".join(results) if results else "No steps executed"
 
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the agent's progress as a JSON-serializable dict."""
+        return {
+            "agent": self.name,
+            "current_step": self.current_step,
+            "next_step_prompt": self.next_step_prompt,
+            "memory": [
+                message.model_dump(exclude_none=True)
+                for message in self.memory.messages
+            ],
+        }
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        """Restore the progress captured by `snapshot`."""
+        self.current_step = snapshot["current_step"]
+        self.next_step_prompt = snapshot.get("next_step_prompt", self.next_step_prompt)
+        self.memory.messages = [Message(**message) for message in snapshot["memory"]]
+
+    def save_checkpoint(self, results: List[str]) -> None:
+        """Save the agent's progress under `checkpoint_id`, if one is set."""
+        if not self.checkpoint_id:
+            return
+        try:
+            self.checkpoints.save(
+                self.checkpoint_id, {**self.snapshot(), "results": results}
+            )
+        except Exception as e:
+            logger.warning(f"Failed to save checkpoint {self.checkpoint_id}: {e}")
+
     @abstractmethod
     async def step(self) -> str:
         """Execute a single step in the agent's workflow.
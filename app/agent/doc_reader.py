@@ -0,0 +1,30 @@
+from pydantic import Field
+
+from app.agent.toolcall import ToolCallAgent
+from app.prompt.doc_reader import NEXT_STEP_PROMPT, SYSTEM_PROMPT
+from app.tool import Terminate, ToolCollection
+from app.tool.file_reader import FileReader
+from app.tool.file_reader_optimized import FileReaderOptimizedTool
+
+
+class DocReaderAgent(ToolCallAgent):
+    """
+    A lightweight agent that only reads documents.
+
+    With nothing but read-only file tools it is cheap to run several of them side by
+    side, e.g. for the document-reading steps of a plan.
+    """
+
+    name: str = "doc_reader"
+    description: str = "an agent that reads uploaded documents and extracts or summarizes their content"
+
+    system_prompt: str = SYSTEM_PROMPT
+    next_step_prompt: str = NEXT_STEP_PROMPT
+
+    available_tools: ToolCollection = Field(
+        default_factory=lambda: ToolCollection(
+            FileReader(), FileReaderOptimizedTool(), Terminate()
+        )
+    )
+
+    max_steps: int = 10
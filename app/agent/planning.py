@@ -1,3 +1,4 @@
+import json
 import time
 from typing import Dict, List, Literal, Optional
 
@@ -6,8 +7,10 @@ from pydantic import Field, model_validator
 from app.agent.toolcall import ToolCallAgent
 from app.logger import logger
 from app.prompt.planning import NEXT_STEP_PROMPT, PLANNING_SYSTEM_PROMPT
-from app.schema import Message, ToolCall
+from app.schema import Function, Message, ToolCall
 from app.tool import PlanningTool, Terminate, ToolCollection
+from app.tool.plan_templates import PlanTemplateLibrary, get_plan_template_library
+from app.tool.planning import PlanState
 
 
 class PlanningAgent(ToolCallAgent):
@@ -37,6 +40,11 @@ class PlanningAgent(ToolCallAgent):
     step_execution_tracker: Dict[str, Dict] = Field(default_factory=dict)
     current_step_index: Optional[int] = None
 
+    # Plans of earlier requests, reused for similar requests instead of asking the LLM
+    plan_templates: Optional[PlanTemplateLibrary] = Field(
+        default_factory=get_plan_template_library
+    )
+
     max_steps: int = 20
 
     @model_validator(mode="after")
@@ -49,8 +57,15 @@ class PlanningAgent(ToolCallAgent):
 
         return self
 
+    @property
+    def planning_tool(self) -> PlanningTool:
+        return self.available_tools.tool_map["planning"]
+
     async def think(self) -> bool:
         """Decide the next action based on plan status."""
+        # Get the current step index before thinking, so the plan below shows it in progress
+        self.current_step_index = await self._get_current_step_index()
+
         prompt = (
             f"CURRENT PLAN STATUS:\n{await self.get_plan()}\n\n{self.next_step_prompt}"
             if self.active_plan_id
@@ -58,9 +73,6 @@ class PlanningAgent(ToolCallAgent):
         )
         self.messages.append(Message.user_message(prompt))
 
-        # Get the current step index before thinking
-        self.current_step_index = await self._get_current_step_index()
-
         result = await super().think()
 
         # After thinking, if we decided to execute a tool and it's not a planning tool or special tool,
@@ -113,11 +125,38 @@ class PlanningAgent(ToolCallAgent):
         )
         return result.output if hasattr(result, "output") else str(result)
 
+    def get_plan_state(self) -> Optional[PlanState]:
+        """Return the typed state of the active plan, or None if there is none."""
+        if not self.active_plan_id:
+            return None
+        return self.planning_tool.get_plan_state(self.active_plan_id)
+
+    def snapshot(self) -> Dict:
+        """Return the agent's progress, including the active plan."""
+        snapshot = super().snapshot()
+        snapshot["active_plan_id"] = self.active_plan_id
+        snapshot["plan"] = (
+            self.planning_tool.plans.get(self.active_plan_id)
+            if self.active_plan_id
+            else None
+        )
+        return snapshot
+
+    def restore(self, snapshot: Dict) -> None:
+        """Restore the progress captured by `snapshot`, putting its plan back in the plan store."""
+        super().restore(snapshot)
+        self.active_plan_id = snapshot.get("active_plan_id", self.active_plan_id)
+        if snapshot.get("plan"):
+            self.planning_tool.plans.put(snapshot["plan"])
+
     async def run(self, request: Optional[str] = None) -> str:
         """Run the agent with an optional initial request."""
         if request:
             await self.create_initial_plan(request)
-        return await super().run()
+        result = await super().run()
+        if request:
+            self._record_plan_template(request)
+        return result
 
     async def update_plan_status(self, tool_call_id: str) -> None:
         """
@@ -140,14 +179,8 @@ class PlanningAgent(ToolCallAgent):
 
         try:
             # Mark the step as completed
-            await self.available_tools.execute(
-                name="planning",
-                tool_input={
-                    "command": "mark_step",
-                    "plan_id": self.active_plan_id,
-                    "step_index": step_index,
-                    "step_status": "completed",
-                },
+            self.planning_tool.set_step_status(
+                self.active_plan_id, step_index, "completed"
             )
             logger.info(
                 f"Marked step {step_index} as completed in plan {self.active_plan_id}"
@@ -157,47 +190,56 @@ class PlanningAgent(ToolCallAgent):
 
     async def _get_current_step_index(self) -> Optional[int]:
         """
-        Parse the current plan to identify the first non-completed step's index.
+        Find the index of the first non-completed step in the active plan and mark it as in progress.
         Returns None if no active step is found.
         """
-        if not self.active_plan_id:
-            return None
-
-        plan = await self.get_plan()
-
         try:
-            plan_lines = plan.splitlines()
-            steps_index = -1
-
-            # Find the index of the "Steps:" line
-            for i, line in enumerate(plan_lines):
-                if line.strip() == "Steps:":
-                    steps_index = i
-                    break
-
-            if steps_index == -1:
+            state = self.get_plan_state()
+            if state is None:
                 return None
 
-            # Find the first non-completed step
-            for i, line in enumerate(plan_lines[steps_index + 1 :], start=0):
-                if "[ ]" in line or "[→]" in line:  # not_started or in_progress
-                    # Mark current step as in_progress
-                    await self.available_tools.execute(
-                        name="planning",
-                        tool_input={
-                            "command": "mark_step",
-                            "plan_id": self.active_plan_id,
-                            "step_index": i,
-                            "step_status": "in_progress",
-                        },
-                    )
-                    return i
-
-            return None  # No active step found
+            step_index = state.current_step_index
+            if (
+                step_index is not None
+                and state.step_statuses[step_index] != "in_progress"
+            ):
+                self.planning_tool.set_step_status(
+                    self.active_plan_id, step_index, "in_progress"
+                )
+            return step_index
         except Exception as e:
             logger.warning(f"Error finding current step index: {e}")
             return None
 
+    def _plan_template_call(self, request: str) -> Optional[ToolCall]:
+        """A planning tool call creating the plan of a similar earlier request, if there is one."""
+        template = self.plan_templates.match(request) if self.plan_templates else None
+        if template is None:
+            return None
+
+        arguments = {
+            "command": "create",
+            "plan_id": self.active_plan_id,
+            "title": f"Plan for: {request[:50]}{'...' if len(request) > 50 else ''}",
+            "steps": template.steps,
+        }
+        if template.step_dependencies is not None:
+            arguments["step_dependencies"] = template.step_dependencies
+        return ToolCall(
+            id=f"call_{self.active_plan_id}_template",
+            function=Function(
+                name="planning", arguments=json.dumps(arguments, ensure_ascii=False)
+            ),
+        )
+
+    def _record_plan_template(self, request: str) -> None:
+        """Remember the active plan for similar requests once all of its steps completed."""
+        state = self.get_plan_state()
+        if self.plan_templates and state is not None and state.status == "completed":
+            self.plan_templates.add(
+                request, state.title, state.steps, state.step_dependencies
+            )
+
     async def create_initial_plan(self, request: str) -> None:
         """Create an initial plan based on the request."""
         logger.info(f"Creating initial plan with ID: {self.active_plan_id}")
@@ -208,20 +250,26 @@ class PlanningAgent(ToolCallAgent):
             )
         ]
         self.memory.add_messages(messages)
-        response = await self.llm.ask_tool(
-            messages=messages,
-            system_msgs=[Message.system_message(self.system_prompt)],
-            tools=self.available_tools.to_params(),
-            tool_choice="required",
-        )
-        assistant_msg = Message.from_tool_calls(
-            content=response.content, tool_calls=response.tool_calls
-        )
+
+        # Reuse the plan of a similar earlier request as if the LLM had proposed it
+        template_call = self._plan_template_call(request)
+        if template_call:
+            content, tool_calls = "", [template_call]
+        else:
+            response = await self.llm.ask_tool(
+                messages=messages,
+                system_msgs=[Message.system_message(self.system_prompt)],
+                tools=self.available_tools.to_params(),
+                tool_choice="required",
+                task="planning",
+            )
+            content, tool_calls = response.content, response.tool_calls
+        assistant_msg = Message.from_tool_calls(content=content, tool_calls=tool_calls)
 
         self.memory.add_message(assistant_msg)
 
         plan_created = False
-        for tool_call in response.tool_calls:
+        for tool_call in tool_calls:
             if tool_call.function.name == "planning":
                 result = await self.execute_tool(tool_call)
                 logger.info(
@@ -1,7 +1,8 @@
+import asyncio
 import json
-from typing import Any, List, Literal
+from typing import Any, Dict, List, Literal, Optional, Set
 
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
 from app.agent.react import ReActAgent
 from app.logger import logger
@@ -30,8 +31,38 @@ class ToolCallAgent(ReActAgent):
 
     tool_calls: List[ToolCall] = Field(default_factory=list)
 
+    # The answer the run ended with, taken from `terminate`'s answer or the last reply
+    final_answer: Optional[str] = None
+
+    # Pipelining: start likely read-only tool calls while the LLM is thinking, and run
+    # several read-only calls of one step concurrently
+    prefetch: bool = False
+    max_prefetch: int = 4
+    _prefetched: Dict[str, asyncio.Task] = PrivateAttr(default_factory=dict)
+    # Calls already made or started in this run, which are not worth predicting again
+    _seen_calls: Set[str] = PrivateAttr(default_factory=set)
+
     max_steps: int = 30
 
+    async def run(self, request: Optional[str] = None) -> str:
+        """Run the agent, warming up the tool calls the request is likely to need."""
+        self.final_answer = None
+        if request and self.prefetch:
+            self._speculate(request)
+        try:
+            return await super().run(request)
+        finally:
+            self._cancel_prefetched()
+            await self.cleanup()
+
+    async def cleanup(self) -> None:
+        """Release what the tools hold for the run, such as leased browser contexts."""
+        for tool in self.available_tools:
+            try:
+                await tool.cleanup()
+            except Exception as e:
+                logger.warning(f"Error cleaning up tool '{tool.name}': {e}")
+
     async def think(self) -> bool:
         """Process current state and decide next actions using tools"""
         # 准备消息列表，包含系统提示和用户消息
@@ -111,9 +142,19 @@ class ToolCallAgent(ReActAgent):
             # Return last message content if no tool calls
             return self.messages[-1].content or "No content or commands to execute"
 
+        if self.prefetch and self._all_read_only(self.tool_calls):
+            # Read-only calls cannot interfere with each other, so run them together
+            outputs = await asyncio.gather(
+                *(self.execute_tool(command) for command in self.tool_calls)
+            )
+        else:
+            outputs = None
+
         results = []
-        for command in self.tool_calls:
-            result = await self.execute_tool(command)
+        for i, command in enumerate(self.tool_calls):
+            result = (
+                outputs[i] if outputs is not None else await self.execute_tool(command)
+            )
             logger.info(
                 f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
             )
@@ -125,6 +166,9 @@ class ToolCallAgent(ReActAgent):
             self.memory.add_message(tool_msg)
             results.append(result)
 
+        if self.prefetch:
+            self._speculate("\n".join(results))
+
         return "\n\n".join(results)
 
     async def execute_tool(self, command: ToolCall) -> str:
@@ -140,9 +184,16 @@ class ToolCallAgent(ReActAgent):
             # Parse arguments
             args = json.loads(command.function.arguments or "{}")
 
-            # Execute the tool
-            logger.info(f"🔧 Activating tool: '{name}'...")
-            result = await self.available_tools.execute(name=name, tool_input=args)
+            # Execute the tool, or pick up the result of a call started ahead of time
+            key = self._call_key(name, args)
+            self._seen_calls.add(key)
+            prefetched = self._prefetched.pop(key, None)
+            if prefetched is not None:
+                logger.info(f"🔧 Using prefetched result of tool: '{name}'...")
+                result = await prefetched
+            else:
+                logger.info(f"🔧 Activating tool: '{name}'...")
+                result = await self.available_tools.execute(name=name, tool_input=args)
 
             # Format result for display
             observation = (
@@ -152,7 +203,7 @@ class ToolCallAgent(ReActAgent):
             )
 
             # Handle special tools like `finish`
-            await self._handle_special_tool(name=name, result=result)
+            await self._handle_special_tool(name=name, result=result, args=args)
 
             return observation
         except json.JSONDecodeError:
@@ -175,6 +226,21 @@ class ToolCallAgent(ReActAgent):
             # Set agent state to finished
             logger.info(f"🏁 Special tool '{name}' has completed the task!")
             self.state = AgentState.FINISHED
+            args = kwargs.get("args") or {}
+            self.final_answer = args.get("answer") or self._last_answer()
+
+    def _last_answer(self) -> Optional[str]:
+        """The most recent assistant reply, or else tool output, that can serve as the final answer"""
+        for message in reversed(self.memory.messages):
+            if message.role == "assistant" and (message.content or "").strip():
+                return message.content
+            if (
+                message.role == "tool"
+                and not self._is_special_tool(message.name or "")
+                and (message.content or "").strip()
+            ):
+                return message.content
+        return None
 
     @staticmethod
     def _should_finish_execution(**kwargs) -> bool:
@@ -184,3 +250,43 @@ class ToolCallAgent(ReActAgent):
     def _is_special_tool(self, name: str) -> bool:
         """Check if tool name is in special tools list"""
         return name.lower() in [n.lower() for n in self.special_tool_names]
+
+    def _all_read_only(self, commands: List[ToolCall]) -> bool:
+        """Check if every call in `commands` goes to a read-only tool"""
+        return len(commands) > 1 and all(
+            getattr(
+                self.available_tools.get_tool(command.function.name), "read_only", False
+            )
+            for command in commands
+        )
+
+    @staticmethod
+    def _call_key(name: str, args: Dict[str, Any]) -> str:
+        return f"{name}:{json.dumps(args, sort_keys=True, ensure_ascii=False)}"
+
+    def _speculate(self, text: str) -> None:
+        """Start the read-only tool calls that `text` suggests the model will make next"""
+        for tool in self.available_tools:
+            if not tool.read_only:
+                continue
+            for args in tool.speculate(text):
+                key = self._call_key(tool.name, args)
+                if (
+                    key in self._seen_calls
+                    or len(self._prefetched) >= self.max_prefetch
+                ):
+                    continue
+                self._seen_calls.add(key)
+                logger.info(f"🔮 Prefetching tool '{tool.name}' with {args}")
+                task = asyncio.create_task(
+                    self.available_tools.execute(name=tool.name, tool_input=args)
+                )
+                # Unused results are dropped, so never report their errors as unretrieved
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._prefetched[key] = task
+
+    def _cancel_prefetched(self) -> None:
+        for task in self._prefetched.values():
+            task.cancel()
+        self._prefetched.clear()
+        self._seen_calls.clear()
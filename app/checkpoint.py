@@ -0,0 +1,58 @@
+"""On-disk checkpoints of agent and flow runs, so that a crashed run can be resumed."""
+
+import gzip
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import WORKSPACE_ROOT
+
+
+CHECKPOINT_ROOT = WORKSPACE_ROOT / "checkpoints"
+_RUN_ID_PATTERN = re.compile(r"^[\w.-]+$")
+
+
+class CheckpointStore:
+    """Keeps the latest snapshot of each run as a gzip-compressed JSON file.
+
+    A snapshot is written to a temporary file and moved over the previous one, so
+    a crash while saving leaves the last complete checkpoint in place.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory) if directory else CHECKPOINT_ROOT
+
+    def save(self, run_id: str, snapshot: Dict[str, Any]) -> None:
+        path = self._path(run_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        data = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"))
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(run_id)
+        if not path.exists():
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def delete(self, run_id: str) -> None:
+        self._path(run_id).unlink(missing_ok=True)
+
+    def list_runs(self) -> List[str]:
+        """IDs of all runs with a checkpoint, oldest first."""
+        if not self.directory.exists():
+            return []
+        paths = sorted(
+            self.directory.glob("*.json.gz"), key=lambda path: path.stat().st_mtime
+        )
+        return [path.name[: -len(".json.gz")] for path in paths]
+
+    def _path(self, run_id: str) -> Path:
+        if not _RUN_ID_PATTERN.match(run_id):
+            raise ValueError(f"Invalid checkpoint ID: {run_id}")
+        return self.directory / f"{run_id}.json.gz"
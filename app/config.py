@@ -6,7 +6,7 @@ else:
     import tomli as tomllib
     
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -25,13 +25,80 @@ class LLMSettings(BaseModel):
     base_url: str = Field(..., description="API base URL")
     api_key: str = Field(..., description="API key")
     max_tokens: int = Field(4096, description="Maximum number of tokens per request")
+    max_continuations: int = Field(
+        3,
+        description="Follow-up requests continuing a response cut off at max_tokens",
+    )
     temperature: float = Field(1.0, description="Sampling temperature")
     api_type: str = Field(..., description="AzureOpenai or Openai")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
 
 
+class BrowserSettings(BaseModel):
+    headless: bool = Field(True, description="Run pooled browsers without a window")
+    max_browsers: int = Field(2, description="Maximum number of browser processes")
+    max_contexts_per_browser: int = Field(
+        4, description="Maximum number of leased contexts per browser"
+    )
+    recycle_after_pages: int = Field(
+        100, description="Restart a browser after it has opened this many pages"
+    )
+    probe_timeout: float = Field(
+        10.0, description="Seconds to wait for a new context to become ready"
+    )
+    acquire_timeout: float = Field(
+        120.0, description="Seconds to wait for a free context when the pool is full"
+    )
+
+
+class PlanningSettings(BaseModel):
+    store: Literal["memory", "sqlite"] = Field(
+        "memory", description="Where PlanningTool keeps plans"
+    )
+    max_plans: int = Field(256, description="Maximum number of plans kept in memory")
+    ttl: Optional[float] = Field(
+        7 * 24 * 3600.0,
+        description="Seconds after the last update before a plan is discarded",
+    )
+    db_path: str = Field(
+        "workspace/plans.db",
+        description="SQLite database file, relative to the project root",
+    )
+    use_templates: bool = Field(
+        False,
+        description="Reuse plans of similar earlier requests instead of asking the LLM",
+    )
+    template_threshold: float = Field(
+        0.85, description="Minimum TF-IDF similarity for reusing a plan template"
+    )
+    template_path: str = Field(
+        "workspace/plan_templates.json",
+        description="Plan template library file, relative to the project root",
+    )
+
+
+class TestCaseSettings(BaseModel):
+    cache_dir: str = Field(
+        "workspace/test_case_cache",
+        description="Directory of test cases cached per document section, relative to the project root",
+    )
+    max_section_chars: int = Field(
+        6000, description="Document sections longer than this are split before generation"
+    )
+    max_concurrency: int = Field(
+        4, description="Maximum number of sections generated at the same time"
+    )
+
+
 class AppConfig(BaseModel):
     llm: Dict[str, LLMSettings]
+    browser: BrowserSettings = Field(default_factory=BrowserSettings)
+    planning: PlanningSettings = Field(default_factory=PlanningSettings)
+    test_case: TestCaseSettings = Field(default_factory=TestCaseSettings)
+    routing: Dict[str, List[str]] = Field(
+        default_factory=dict,
+        description="Task classes mapped to the LLM configurations to try, in order",
+    )
 
 
 class Config:
@@ -82,6 +149,7 @@ class Config:
             "base_url": base_llm.get("base_url"),
             "api_key": base_llm.get("api_key"),
             "max_tokens": base_llm.get("max_tokens", 4096),
+            "max_continuations": base_llm.get("max_continuations", 3),
             "temperature": base_llm.get("temperature", 1.0),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
@@ -97,11 +165,36 @@ class Config:
             }
         }
 
+        if "browser" in raw_config:
+            config_dict["browser"] = raw_config["browser"]
+        if "planning" in raw_config:
+            config_dict["planning"] = raw_config["planning"]
+        if "test_case" in raw_config:
+            config_dict["test_case"] = raw_config["test_case"]
+        if "routing" in raw_config:
+            config_dict["routing"] = raw_config["routing"]
+
         self._config = AppConfig(**config_dict)
 
     @property
     def llm(self) -> Dict[str, LLMSettings]:
         return self._config.llm
 
+    @property
+    def browser(self) -> BrowserSettings:
+        return self._config.browser
+
+    @property
+    def planning(self) -> PlanningSettings:
+        return self._config.planning
+
+    @property
+    def test_case(self) -> TestCaseSettings:
+        return self._config.test_case
+
+    @property
+    def routing(self) -> Dict[str, List[str]]:
+        return self._config.routing
+
 
 config = Config()
@@ -1,15 +1,43 @@
+import asyncio
 import json
+import re
 import time
 from typing import Dict, List, Optional, Union
 
 from pydantic import Field
 
 from app.agent.base import BaseAgent
+from app.checkpoint import CheckpointStore
 from app.flow.base import BaseFlow, PlanStepStatus
 from app.llm import LLM
 from app.logger import logger
-from app.schema import AgentState, Message
-from app.tool import PlanningTool
+from app.schema import Message
+from app.tool import PlanningTool, ToolCollection
+from app.tool.base import BaseTool
+from app.tool.plan_templates import PlanTemplateLibrary, get_plan_template_library
+
+
+# Agent fields holding the progress of a run, which a cloned agent starts afresh
+_RUN_STATE_FIELDS = {
+    "memory",
+    "state",
+    "current_step",
+    "tool_calls",
+    "final_answer",
+    "checkpoint_id",
+}
+
+
+def _clone_tool(tool: BaseTool) -> BaseTool:
+    """A new instance of a tool with the same configuration but none of its runtime state."""
+    fields = type(tool).model_fields
+    return type(tool)(
+        **{
+            name: getattr(tool, name)
+            for name in tool.model_fields_set
+            if name in fields and not fields[name].exclude
+        }
+    )
 
 
 class PlanningFlow(BaseFlow):
@@ -20,6 +48,35 @@ class PlanningFlow(BaseFlow):
     executor_keys: List[str] = Field(default_factory=list)
     active_plan_id: str = Field(default_factory=lambda: f"plan_{int(time.time())}")
     current_step_index: Optional[int] = None
+    max_concurrent_steps: int = Field(
+        default=4, description="Maximum number of plan steps executed at the same time"
+    )
+
+    # Idle executor instances per agent key, for running independent steps concurrently
+    executor_pools: Dict[str, List[BaseAgent]] = Field(default_factory=dict)
+    # Executor instances by the index of the step they are running
+    running_executors: Dict[int, BaseAgent] = Field(default_factory=dict)
+    # Snapshots of executors whose steps were interrupted, to continue them on resume
+    resumed_steps: Dict[int, dict] = Field(default_factory=dict)
+    # Step results are condensed into summaries (kept as step notes) for later steps
+    summarize_with_llm: bool = Field(
+        default=False,
+        description="Summarize step results with the flow's LLM instead of extracting the agent's last reply",
+    )
+    max_summary_chars: int = Field(
+        default=600, description="Maximum length of a step summary"
+    )
+    max_context_chars: int = Field(
+        default=4000,
+        description="Maximum total length of the earlier step summaries passed to a step",
+    )
+    # Run ID under which the plan and step results are saved after every finished step
+    checkpoint_id: Optional[str] = None
+    checkpoints: CheckpointStore = Field(default_factory=CheckpointStore)
+    # Plans of earlier requests, reused for similar requests instead of asking the LLM
+    plan_templates: Optional[PlanTemplateLibrary] = Field(
+        default_factory=get_plan_template_library
+    )
 
     def __init__(
         self, agents: Union[BaseAgent, List[BaseAgent], Dict[str, BaseAgent]], **data
@@ -49,17 +106,49 @@ class PlanningFlow(BaseFlow):
         Get an appropriate executor agent for the current step.
         Can be extended to select agents based on step type/requirements.
         """
+        return self.agents[self._get_executor_key(step_type)]
+
+    def _get_executor_key(self, step_type: Optional[str] = None) -> str:
         # If step type is provided and matches an agent key, use that agent
         if step_type and step_type in self.agents:
-            return self.agents[step_type]
+            return step_type
 
         # Otherwise use the first available executor or fall back to primary agent
         for key in self.executor_keys:
             if key in self.agents:
-                return self.agents[key]
+                return key
 
         # Fallback to primary agent
-        return self.primary_agent
+        return self.primary_agent_key
+
+    def _acquire_executor(self, step_type: Optional[str] = None) -> tuple[str, BaseAgent]:
+        """Take an idle executor instance for a step, cloning the configured agent if all are busy."""
+        key = self._get_executor_key(step_type)
+        pool = self.executor_pools.setdefault(key, [self.agents[key]])
+        if pool:
+            return key, pool.pop()
+        return key, self._clone_agent(self.agents[key])
+
+    def _release_executor(self, key: str, executor: BaseAgent) -> None:
+        self.executor_pools[key].append(executor)
+
+    @staticmethod
+    def _clone_agent(template: BaseAgent) -> BaseAgent:
+        """Create a fresh instance of an agent with the same configuration and LLM.
+
+        Every field set on the template is carried over, except the state of its
+        current run. Tools are cloned the same way, so that concurrent instances
+        do not share browser leases, prefetched calls or other runtime state.
+        """
+        config = {
+            name: getattr(template, name)
+            for name in template.model_fields_set - _RUN_STATE_FIELDS
+        }
+        config["llm"] = template.llm
+        tools = getattr(template, "available_tools", None)
+        if isinstance(tools, ToolCollection):
+            config["available_tools"] = ToolCollection(*(_clone_tool(t) for t in tools))
+        return type(template)(**config)
 
     async def execute(self, input_text: str) -> str:
         """Execute the planning flow with agents."""
@@ -78,41 +167,126 @@ class PlanningFlow(BaseFlow):
                     )
                     return f"Failed to create plan for: {input_text}"
 
-            result = ""
-            while True:
-                # Get current step to execute
-                self.current_step_index, step_info = await self._get_current_step_info()
+            return await self._execute_plan(input_text, {})
+        except Exception as e:
+            logger.error(f"Error in PlanningFlow: {str(e)}")
+            return f"Execution failed: {str(e)}"
 
-                # Exit if no more steps or plan completed
-                if self.current_step_index is None:
-                    result += await self._finalize_plan()
-                    break
+    async def resume(self, checkpoint_id: str) -> str:
+        """Continue an interrupted run from the checkpoint saved after its last finished step."""
+        snapshot = self.checkpoints.load(checkpoint_id)
+        if snapshot is None:
+            raise ValueError(f"No checkpoint found for run: {checkpoint_id}")
+
+        self.checkpoint_id = checkpoint_id
+        self.active_plan_id = snapshot["active_plan_id"]
+        plan = snapshot["plan"]
+        # Steps that were running when the run stopped have to be started again
+        plan["step_statuses"] = [
+            PlanStepStatus.NOT_STARTED.value
+            if status == PlanStepStatus.IN_PROGRESS.value
+            else status
+            for status in plan["step_statuses"]
+        ]
+        self.planning_tool.plans.put(plan)
+        for key, agent_snapshot in snapshot.get("agents", {}).items():
+            if key in self.agents:
+                self.agents[key].restore(agent_snapshot)
+        # Interrupted steps continue from the context their executor had built up
+        self.resumed_steps = {
+            int(i): executor_snapshot
+            for i, executor_snapshot in snapshot.get("running", {}).items()
+        }
+
+        results = {int(i): result for i, result in snapshot["results"].items()}
+        logger.info(
+            f"Resuming plan {self.active_plan_id} with {len(results)} steps already done"
+        )
+        try:
+            return await self._execute_plan(snapshot.get("request", ""), results)
+        except Exception as e:
+            logger.error(f"Error in PlanningFlow: {str(e)}")
+            return f"Execution failed: {str(e)}"
 
-                # Execute current step with appropriate agent
-                step_type = step_info.get("type") if step_info else None
-                executor = self.get_executor(step_type)
-                step_result = await self._execute_step(executor, step_info)
-                result += step_result + "\n"
+    async def _execute_plan(self, request: str, results: Dict[int, str]) -> str:
+        """Run the steps of the active plan until none is left, then summarize."""
+        await self._run_steps(request, results)
 
-                # Check if agent wants to terminate
-                if hasattr(executor, "state") and executor.state == AgentState.FINISHED:
+        if request:
+            self._record_plan_template(request)
+
+        result = "".join(results[i] + "\n" for i in sorted(results))
+        result += await self._finalize_plan()
+
+        # The run is over, so there is nothing left to resume
+        if self.checkpoint_id:
+            self.checkpoints.delete(self.checkpoint_id)
+        return result
+
+    async def _run_steps(self, request: str, results: Dict[int, str]) -> None:
+        """Execute ready steps concurrently, collecting their results into `results`."""
+        running: Dict[asyncio.Task, int] = {}
+        try:
+            while True:
+                # Start every step whose prerequisites are done, up to the concurrency cap
+                for step_index, step_info in await self._get_ready_steps_info(
+                    self.max_concurrent_steps - len(running)
+                ):
+                    self.current_step_index = step_index
+                    task = asyncio.create_task(self._run_step(step_info))
+                    running[task] = step_index
+
+                # Exit if no more steps can run
+                if not running:
                     break
 
-            return result
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    results[running.pop(task)] = task.result()
+                self._save_checkpoint(request, results)
+        finally:
+            for task in running:
+                task.cancel()
+
+    def _save_checkpoint(self, request: str, results: Dict[int, str]) -> None:
+        """Save the plan, step results and agent memories under `checkpoint_id`, if one is set.
+
+        Besides the configured agents, the executors of the steps still running
+        are saved, including pooled clones, so that resume can continue those steps.
+        """
+        if not self.checkpoint_id:
+            return
+        try:
+            self.checkpoints.save(
+                self.checkpoint_id,
+                {
+                    "request": request,
+                    "active_plan_id": self.active_plan_id,
+                    "plan": self.planning_tool.plans.get(self.active_plan_id),
+                    "results": results,
+                    "agents": {
+                        key: agent.snapshot() for key, agent in self.agents.items()
+                    },
+                    "running": {
+                        str(i): executor.snapshot()
+                        for i, executor in self.running_executors.items()
+                    },
+                },
+            )
         except Exception as e:
-            logger.error(f"Error in PlanningFlow: {str(e)}")
-            return f"Execution failed: {str(e)}"
+            logger.warning(f"Failed to save checkpoint {self.checkpoint_id}: {e}")
 
     async def _create_initial_plan(self, request: str) -> None:
         """Create an initial plan based on the request using the flow's LLM and PlanningTool."""
         logger.info(f"Creating initial plan with ID: {self.active_plan_id}")
 
+        if await self._create_plan_from_template(request):
+            return
+
         # Create a system message for plan creation
-        system_message = Message.system_message(
-            "You are a planning assistant. Create a concise, actionable plan with clear steps. "
-            "Focus on key milestones rather than detailed sub-steps. "
-            "Optimize for clarity and efficiency."
-        )
+        system_message = Message.system_message(self._get_planning_prompt())
 
         # Create a user message with the request
         user_message = Message.user_message(
@@ -125,6 +299,7 @@ class PlanningFlow(BaseFlow):
             system_msgs=[system_message],
             tools=[self.planning_tool.to_param()],
             tool_choice="required",
+            task="planning",
         )
 
         # Process tool calls if present
@@ -162,129 +337,234 @@ class PlanningFlow(BaseFlow):
             }
         )
 
-    async def _get_current_step_info(self) -> tuple[Optional[int], Optional[dict]]:
-        """
-        Parse the current plan to identify the first non-completed step's index and info.
-        Returns (None, None) if no active step is found.
-        """
-        if (
-            not self.active_plan_id
-            or self.active_plan_id not in self.planning_tool.plans
-        ):
-            logger.error(f"Plan with ID {self.active_plan_id} not found")
-            return None, None
+    def _get_planning_prompt(self) -> str:
+        """System prompt for the LLM call that creates the plan."""
+        return (
+            "You are a planning assistant. Create a concise, actionable plan with clear steps. "
+            "Focus on key milestones rather than detailed sub-steps. "
+            "Optimize for clarity and efficiency. "
+            "When some steps do not depend on each other, list each step's prerequisites "
+            "in `step_dependencies` so that independent steps can run in parallel."
+        )
 
-        try:
-            # Direct access to plan data from planning tool storage
-            plan_data = self.planning_tool.plans[self.active_plan_id]
-            steps = plan_data.get("steps", [])
-            step_statuses = plan_data.get("step_statuses", [])
+    async def _create_plan_from_template(self, request: str) -> bool:
+        """Create the plan from the template of a similar earlier request, if there is one."""
+        template = self.plan_templates.match(request) if self.plan_templates else None
+        if template is None:
+            return False
 
-            # Find first non-completed step
-            for i, step in enumerate(steps):
-                if i >= len(step_statuses):
-                    status = PlanStepStatus.NOT_STARTED.value
-                else:
-                    status = step_statuses[i]
-
-                if status in PlanStepStatus.get_active_statuses():
-                    # Extract step type/category if available
-                    step_info = {"text": step}
-
-                    # Try to extract step type from the text (e.g., [SEARCH] or [CODE])
-                    import re
-
-                    type_match = re.search(r"\[([A-Z_]+)\]", step)
-                    if type_match:
-                        step_info["type"] = type_match.group(1).lower()
-
-                    # Mark current step as in_progress
-                    try:
-                        await self.planning_tool.execute(
-                            command="mark_step",
-                            plan_id=self.active_plan_id,
-                            step_index=i,
-                            step_status=PlanStepStatus.IN_PROGRESS.value,
-                        )
-                    except Exception as e:
-                        logger.warning(f"Error marking step as in_progress: {e}")
-                        # Update step status directly if needed
-                        if i < len(step_statuses):
-                            step_statuses[i] = PlanStepStatus.IN_PROGRESS.value
-                        else:
-                            while len(step_statuses) < i:
-                                step_statuses.append(PlanStepStatus.NOT_STARTED.value)
-                            step_statuses.append(PlanStepStatus.IN_PROGRESS.value)
+        try:
+            await self.planning_tool.execute(
+                command="create",
+                plan_id=self.active_plan_id,
+                title=f"Plan for: {request[:50]}{'...' if len(request) > 50 else ''}",
+                steps=list(template.steps),
+                step_dependencies=template.step_dependencies,
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to create plan from template: {e}")
+            return False
 
-                        plan_data["step_statuses"] = step_statuses
+    def _record_plan_template(self, request: str) -> None:
+        """Remember the active plan for similar requests once all of its steps completed."""
+        if not self.plan_templates:
+            return
+        state = self.planning_tool.get_plan_state(self.active_plan_id)
+        if state is not None and state.status == PlanStepStatus.COMPLETED.value:
+            self.plan_templates.add(
+                request, state.title, state.steps, state.step_dependencies
+            )
 
-                    return i, step_info
+    async def _get_ready_steps_info(self, limit: int) -> List[tuple[int, dict]]:
+        """
+        Find up to `limit` not-started steps whose prerequisites are completed,
+        mark them as in_progress and return their indices and info.
+        """
+        if limit <= 0:
+            return []
 
-            return None, None  # No active step found
+        state = (
+            self.planning_tool.get_plan_state(self.active_plan_id)
+            if self.active_plan_id
+            else None
+        )
+        if state is None:
+            logger.error(f"Plan with ID {self.active_plan_id} not found")
+            return []
 
+        try:
+            ready = []
+            for i in state.ready_steps[:limit]:
+                step = state.steps[i]
+                step_info = {"index": i, "text": step}
+
+                # Try to extract step type from the text (e.g., [SEARCH] or [CODE])
+                type_match = re.search(r"\[([A-Z_]+)\]", step)
+                if type_match:
+                    step_info["type"] = type_match.group(1).lower()
+
+                await self._set_step_status(i, PlanStepStatus.IN_PROGRESS.value)
+                ready.append((i, step_info))
+            return ready
         except Exception as e:
-            logger.warning(f"Error finding current step index: {e}")
-            return None, None
+            logger.warning(f"Error finding ready steps: {e}")
+            return []
+
+    async def _run_step(self, step_info: dict) -> str:
+        """Run one step on an executor leased from the pool."""
+        key, executor = self._acquire_executor(step_info.get("type"))
+        try:
+            return await self._execute_tracked_step(executor, step_info)
+        finally:
+            self._release_executor(key, executor)
+
+    async def _execute_tracked_step(self, executor: BaseAgent, step_info: dict) -> str:
+        """Execute a step, registering its executor as running so that checkpoints save it."""
+        step_index = step_info.get("index", self.current_step_index)
+        self.running_executors[step_index] = executor
+        try:
+            return await self._execute_step(executor, step_info)
+        finally:
+            self.running_executors.pop(step_index, None)
 
     async def _execute_step(self, executor: BaseAgent, step_info: dict) -> str:
         """Execute the current step with the specified agent using agent.run()."""
-        # Prepare context for the agent with current plan status
-        plan_status = await self._get_plan_text()
-        step_text = step_info.get("text", f"Step {self.current_step_index}")
+        step_index = step_info.get("index", self.current_step_index)
+        step_text = step_info.get("text", f"Step {step_index}")
 
-        # Create a prompt for the agent to execute the current step
+        # Create a prompt for the agent to execute the current step. Earlier steps are
+        # passed in as short summaries, so the prompt does not grow with the plan.
         step_prompt = f"""
-        CURRENT PLAN STATUS:
-        {plan_status}
+        {self._get_step_context(step_index)}
 
         YOUR CURRENT TASK:
-        You are now working on step {self.current_step_index}: "{step_text}"
+        You are now working on step {step_index}: "{step_text}"
 
         Please execute this step using the appropriate tools. When you're done, provide a summary of what you accomplished.
         """
 
         # Use agent.run() to execute the step
         try:
-            step_result = await executor.run(step_prompt)
+            resumed = self.resumed_steps.pop(step_index, None)
+            if resumed is not None:
+                # The restored memory already holds the step prompt and the work done so far
+                executor.restore(resumed)
+                step_result = await executor.run()
+            else:
+                # Earlier steps reach the executor only through their summaries
+                executor.memory.clear()
+                step_result = await executor.run(step_prompt)
+            summary = await self._summarize_step(executor, step_text, step_result)
 
             # Mark the step as completed after successful execution
-            await self._mark_step_completed()
+            await self._set_step_status(
+                step_index, PlanStepStatus.COMPLETED.value, summary
+            )
 
-            return step_result
+            return f"Step {step_index} ({step_text}): {summary}"
         except Exception as e:
-            logger.error(f"Error executing step {self.current_step_index}: {e}")
-            return f"Error executing step {self.current_step_index}: {str(e)}"
+            logger.error(f"Error executing step {step_index}: {e}")
+            # Block the step so that it and its dependents are not retried forever
+            await self._set_step_status(step_index, PlanStepStatus.BLOCKED.value)
+            return f"Error executing step {step_index}: {str(e)}"
 
-    async def _mark_step_completed(self) -> None:
-        """Mark the current step as completed."""
-        if self.current_step_index is None:
-            return
+    def _get_step_context(self, step_index: int) -> str:
+        """Plan progress and the summaries of every completed step that `step_index` builds on.
 
+        Prerequisites are followed transitively, so in a sequential plan a step sees
+        all earlier results, not only its predecessor's. When the summaries exceed
+        `max_context_chars`, the direct prerequisites and the most recent steps are kept.
+        """
+        state = self.planning_tool.get_plan_state(self.active_plan_id)
+        if state is None:
+            return ""
+
+        completed = state.status_counts.get(PlanStepStatus.COMPLETED.value, 0)
+        lines = [f"PLAN: {state.title} ({completed}/{len(state.steps)} steps completed)"]
+
+        direct = set(state.step_dependencies[step_index])
+        prerequisites = set()
+        stack = list(direct)
+        while stack:
+            i = stack.pop()
+            if i not in prerequisites:
+                prerequisites.add(i)
+                stack.extend(state.step_dependencies[i])
+        candidates = sorted(
+            (
+                i
+                for i in prerequisites
+                if state.step_statuses[i] == PlanStepStatus.COMPLETED.value
+            ),
+            key=lambda i: (i not in direct, -i),
+        )
+
+        included: Dict[int, str] = {}
+        budget = self.max_context_chars
+        for i in candidates:
+            line = f'- Step {i} "{state.steps[i]}": {state.step_notes[i] or "Completed."}'
+            if len(line) > budget:
+                break
+            included[i] = line
+            budget -= len(line)
+        if included:
+            lines.append("\nRESULTS OF PREVIOUS STEPS:")
+            lines.extend(included[i] for i in sorted(included))
+        omitted = len(candidates) - len(included)
+        if omitted:
+            lines.append(f"({omitted} earlier step result(s) omitted for length)")
+        return "\n".join(lines)
+
+    async def _summarize_step(
+        self, executor: BaseAgent, step_text: str, step_result: str
+    ) -> str:
+        """Condense the outcome of a step into a short summary for later steps."""
+        if self.summarize_with_llm:
+            try:
+                summary = await self.llm.ask(
+                    messages=[
+                        Message.user_message(
+                            "Summarize the outcome of the following step in at most three sentences. "
+                            "Keep file paths, IDs, numbers and other facts that later steps may need.\n\n"
+                            f"Step: {step_text}\n\nOutput:\n{step_result[-6000:]}"
+                        )
+                    ],
+                    stream=False,
+                    task="step_summary",
+                )
+                return self._truncate(summary.strip(), self.max_summary_chars)
+            except Exception as e:
+                logger.warning(f"Failed to summarize step with LLM: {e}")
+
+        # The agent was asked to finish with a summary, so its last reply is the best extract
+        for message in reversed(executor.memory.messages):
+            if message.role == "assistant" and (message.content or "").strip():
+                return self._truncate(message.content.strip(), self.max_summary_chars)
+        return self._truncate(step_result.strip(), self.max_summary_chars)
+
+    @staticmethod
+    def _truncate(text: str, max_chars: int) -> str:
+        """Shorten `text` to about `max_chars`, keeping its beginning and its conclusion."""
+        if len(text) <= max_chars:
+            return text
+        head = text[: max_chars * 2 // 3].rstrip()
+        tail = text[-(max_chars // 3) :].lstrip()
+        return f"{head} … {tail}"
+
+    async def _set_step_status(
+        self, step_index: int, status: str, notes: Optional[str] = None
+    ) -> None:
+        """Update the status (and optionally the notes) of a step in the active plan."""
         try:
-            # Mark the step as completed
-            await self.planning_tool.execute(
-                command="mark_step",
-                plan_id=self.active_plan_id,
-                step_index=self.current_step_index,
-                step_status=PlanStepStatus.COMPLETED.value,
+            self.planning_tool.set_step_status(
+                self.active_plan_id, step_index, status, notes
             )
             logger.info(
-                f"Marked step {self.current_step_index} as completed in plan {self.active_plan_id}"
+                f"Marked step {step_index} as {status} in plan {self.active_plan_id}"
             )
         except Exception as e:
             logger.warning(f"Failed to update plan status: {e}")
-            # Update step status directly in planning tool storage
-            if self.active_plan_id in self.planning_tool.plans:
-                plan_data = self.planning_tool.plans[self.active_plan_id]
-                step_statuses = plan_data.get("step_statuses", [])
-
-                # Ensure the step_statuses list is long enough
-                while len(step_statuses) <= self.current_step_index:
-                    step_statuses.append(PlanStepStatus.NOT_STARTED.value)
-
-                # Update the status
-                step_statuses[self.current_step_index] = PlanStepStatus.COMPLETED.value
-                plan_data["step_statuses"] = step_statuses
 
     async def _get_plan_text(self) -> str:
         """Get the current plan as formatted text."""
@@ -370,7 +650,9 @@ class PlanningFlow(BaseFlow):
             )
 
             response = await self.llm.ask(
-                messages=[user_message], system_msgs=[system_message]
+                messages=[user_message],
+                system_msgs=[system_message],
+                task="plan_summary",
             )
 
             return f"Plan completed:\n\n{response}"
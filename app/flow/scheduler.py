@@ -0,0 +1,172 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional, Union
+
+from pydantic import Field
+
+from app.agent.base import BaseAgent
+from app.flow.planning import PlanningFlow
+from app.logger import logger
+
+
+def create_default_agents() -> Dict[str, BaseAgent]:
+    """The heterogeneous agents a SchedulerFlow uses when none are given."""
+    from app.agent.doc_reader import DocReaderAgent
+    from app.agent.manus import Manus
+    from app.agent.swe import SWEAgent
+
+    return {"general": Manus(), "code": SWEAgent(), "doc": DocReaderAgent()}
+
+
+# Which pools may take over queued steps of which other pools with the default agents:
+# the doc reader only has file tools, so it keeps to document steps
+DEFAULT_STEAL_FROM = {
+    "general": ["code", "doc"],
+    "code": ["doc"],
+    "doc": [],
+}
+
+# Step type tags that name a capability rather than an agent key
+DEFAULT_STEP_ROUTES = {
+    "search": "general",
+    "python": "general",
+    "swe": "code",
+    "bash": "code",
+    "read": "doc",
+    "file": "doc",
+}
+
+
+class SchedulerFlow(PlanningFlow):
+    """
+    A planning flow that runs plan steps on pools of different agents.
+
+    Every agent key gets a pool of `pool_sizes[key]` instances (`default_pool_size`
+    if not set). Ready steps are queued for the pool named by their `[TYPE]` tag,
+    translated through `step_routes`, and steps without a matching tag go to the
+    first executor. An idle instance first takes steps from its own queue and then,
+    with `work_stealing`, the oldest queued step of another pool it may steal from.
+    """
+
+    max_concurrent_steps: int = Field(
+        default=8, description="Maximum number of plan steps executed at the same time"
+    )
+    pool_sizes: Dict[str, int] = Field(default_factory=dict)
+    default_pool_size: int = Field(
+        default=2, description="Number of instances of each agent without a pool size"
+    )
+    step_routes: Dict[str, str] = Field(
+        default_factory=lambda: dict(DEFAULT_STEP_ROUTES),
+        description="Step type tags mapped to the agent keys that run them",
+    )
+    work_stealing: bool = Field(
+        default=True,
+        description="Let idle agents take queued steps of busy agents of another type",
+    )
+    # Pools each pool may take queued steps from; None lets every pool take from every other
+    steal_from: Optional[Dict[str, List[str]]] = None
+
+    def __init__(
+        self,
+        agents: Union[BaseAgent, List[BaseAgent], Dict[str, BaseAgent], None] = None,
+        **data,
+    ):
+        if agents is None:
+            agents = create_default_agents()
+            data.setdefault("steal_from", DEFAULT_STEAL_FROM)
+        super().__init__(agents, **data)
+
+    def _get_executor_key(self, step_type: Optional[str] = None) -> str:
+        return super()._get_executor_key(self.step_routes.get(step_type, step_type))
+
+    def _get_planning_prompt(self) -> str:
+        step_types = "\n".join(
+            f"- [{key.upper()}] for {agent.description or agent.name}"
+            for key, agent in self.agents.items()
+        )
+        return (
+            f"{super()._get_planning_prompt()} "
+            "Begin every step with the tag of the agent best suited to it, one of:\n"
+            f"{step_types}"
+        )
+
+    async def _run_steps(self, request: str, results: Dict[int, str]) -> None:
+        """Execute ready steps on the agent pools, collecting their results into `results`."""
+        self._fill_pools()
+        queues: Dict[str, Deque[dict]] = {key: deque() for key in self.agents}
+        running: Dict[asyncio.Task, tuple[str, BaseAgent, int]] = {}
+        try:
+            while True:
+                # Queue the ready steps for their pools, up to the concurrency cap
+                queued = sum(len(queue) for queue in queues.values())
+                for step_index, step_info in await self._get_ready_steps_info(
+                    self.max_concurrent_steps - len(running) - queued
+                ):
+                    key = self._get_executor_key(step_info.get("type"))
+                    queues[key].append(step_info)
+
+                for key, executor, step_info in self._assign_steps(queues):
+                    self.current_step_index = step_info["index"]
+                    task = asyncio.create_task(
+                        self._execute_tracked_step(executor, step_info)
+                    )
+                    running[task] = (key, executor, step_info["index"])
+
+                # Exit if no more steps can run
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    key, executor, step_index = running.pop(task)
+                    self._release_executor(key, executor)
+                    results[step_index] = task.result()
+                self._save_checkpoint(request, results)
+        finally:
+            for task in running:
+                task.cancel()
+
+    def _fill_pools(self) -> None:
+        """Create the configured number of instances of every agent."""
+        for key, agent in self.agents.items():
+            pool = self.executor_pools.setdefault(key, [agent])
+            size = self.pool_sizes.get(key, self.default_pool_size)
+            while len(pool) < size:
+                pool.append(self._clone_agent(agent))
+
+    def _assign_steps(
+        self, queues: Dict[str, Deque[dict]]
+    ) -> List[tuple[str, BaseAgent, dict]]:
+        """Hand queued steps to idle agents, letting idle pools steal from busy ones."""
+        assignments = []
+        for key, queue in queues.items():
+            pool = self.executor_pools[key]
+            while pool and queue:
+                assignments.append((key, pool.pop(), queue.popleft()))
+
+        if not self.work_stealing:
+            return assignments
+
+        for key in queues:
+            pool = self.executor_pools[key]
+            victims = [
+                victim
+                for victim in (
+                    self.steal_from.get(key, [])
+                    if self.steal_from is not None
+                    else queues
+                )
+                if victim != key and victim in queues
+            ]
+            while pool:
+                victim = max(victims, key=lambda v: len(queues[v]), default=None)
+                if victim is None or not queues[victim]:
+                    break
+                step_info = queues[victim].popleft()
+                logger.info(
+                    f"Idle '{key}' agent takes step {step_info['index']} queued for '{victim}'"
+                )
+                assignments.append((key, pool.pop(), step_info))
+        return assignments
@@ -1,6 +1,7 @@
-from typing import Dict, List, Literal, Optional, Union
+from typing import Dict, List, Literal, Optional, Tuple, Union
 
 from openai import (
+    NOT_GIVEN,
     APIError,
     AsyncAzureOpenAI,
     AsyncOpenAI,
@@ -15,6 +16,33 @@ from app.logger import logger  # Assuming a logger is set up in your app
 from app.schema import Message
 
 
+# Attempts on a routed model before falling back to the next one
+FALLBACK_ATTEMPTS = 2
+
+CONTINUE_PROMPT = (
+    "Your response was cut off by the output length limit. Continue exactly where it "
+    "stopped, without repeating anything and without any introduction."
+)
+CONTINUE_ARGUMENTS_PROMPT = (
+    "The JSON arguments of your `{name}` call were cut off by the output length limit. "
+    "Output only the rest of the JSON, continuing exactly after the last character above, "
+    "without repeating anything and without code fences."
+)
+# Longest text a continuation may repeat from the end of the previous part
+MAX_CONTINUATION_OVERLAP = 200
+
+
+def stitch(text: str, continuation: str) -> str:
+    """Append `continuation` to `text`, dropping a repeated end of `text` at its start."""
+    for size in range(min(len(text), len(continuation), MAX_CONTINUATION_OVERLAP), 0, -1):
+        if text.endswith(continuation[:size]):
+            # Ignore short coincidental matches such as a repeated closing bracket
+            if size >= 8:
+                return text + continuation[size:]
+            break
+    return text + continuation
+
+
 class LLM:
     _instances: Dict[str, "LLM"] = {}
 
@@ -35,6 +63,7 @@ class LLM:
             llm_config = llm_config.get(config_name, llm_config["default"])
             self.model = llm_config.model
             self.max_tokens = llm_config.max_tokens
+            self.max_continuations = llm_config.max_continuations
             self.temperature = llm_config.temperature
             self.api_type = llm_config.api_type
             self.api_key = llm_config.api_key
@@ -49,6 +78,43 @@ class LLM:
             else:
                 self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
 
+    def route(self, task: Optional[str] = None) -> List["LLM"]:
+        """
+        The LLMs to try, in order, for a call of the given task class.
+
+        `[routing]` maps task classes to lists of `[llm.*]` configuration names.
+        This LLM always comes last, so a failing routed model falls back to it.
+        """
+        llms = []
+        for name in config.routing.get(task, []) if task else []:
+            if name not in config.llm:
+                logger.warning(
+                    f"Unknown LLM configuration '{name}' in routing for task '{task}'"
+                )
+                continue
+            llm = LLM(name)
+            if llm not in llms:
+                llms.append(llm)
+        if self in llms:
+            llms.remove(self)
+        llms.append(self)
+        return llms
+
+    async def _call_routed(self, task: Optional[str], method: str, **kwargs):
+        """Call `method` on the LLMs routed for `task`, falling back to the next one on errors."""
+        llms = self.route(task)
+        for llm in llms[:-1]:
+            try:
+                # Give up on a routed model quickly instead of waiting out the full retry schedule
+                return await getattr(LLM, method).retry_with(
+                    stop=stop_after_attempt(FALLBACK_ATTEMPTS), reraise=True
+                )(llm, **kwargs)
+            except Exception as e:
+                logger.warning(
+                    f"Model {llm.model} failed for task '{task}', falling back: {e}"
+                )
+        return await getattr(llms[-1], method)(**kwargs)
+
     @staticmethod
     def format_messages(messages: List[Union[dict, Message]]) -> List[dict]:
         """
@@ -97,16 +163,13 @@ class LLM:
 
         return formatted_messages
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-    )
     async def ask(
         self,
         messages: List[Union[dict, Message]],
         system_msgs: Optional[List[Union[dict, Message]]] = None,
         stream: bool = True,
         temperature: Optional[float] = None,
+        task: Optional[str] = None,
     ) -> str:
         """
         Send a prompt to the LLM and get the response.
@@ -116,6 +179,7 @@ class LLM:
             system_msgs: Optional system messages to prepend
             stream (bool): Whether to stream the response
             temperature (float): Sampling temperature for the response
+            task: Optional task class, routed to the models configured for it in `[routing]`
 
         Returns:
             str: The generated response
@@ -125,6 +189,31 @@ class LLM:
             OpenAIError: If API call fails after retries
             Exception: For unexpected errors
         """
+        return await self._call_routed(
+            task,
+            "_ask",
+            messages=messages,
+            system_msgs=system_msgs,
+            stream=stream,
+            temperature=temperature,
+        )
+
+    @retry(
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(6),
+    )
+    async def _ask(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        stream: bool = True,
+        temperature: Optional[float] = None,
+    ) -> str:
+        """Send a prompt to this LLM's model, retrying on errors.
+
+        A response cut off at `max_tokens` is continued with up to
+        `max_continuations` follow-up requests, and the parts are stitched together.
+        """
         try:
             # Format system and user messages
             if system_msgs:
@@ -133,39 +222,32 @@ class LLM:
             else:
                 messages = self.format_messages(messages)
 
-            if not stream:
-                # Non-streaming request
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    max_tokens=self.max_tokens,
-                    temperature=temperature or self.temperature,
-                    stream=False,
+            content, finish_reason = await self._complete(messages, stream, temperature)
+            continuations = 0
+            while finish_reason == "length" and continuations < self.max_continuations:
+                continuations += 1
+                logger.info(
+                    f"Response reached max_tokens, continuing ({continuations}/{self.max_continuations})"
+                )
+                more, finish_reason = await self._complete(
+                    messages
+                    + [
+                        {"role": "assistant", "content": content},
+                        {"role": "user", "content": CONTINUE_PROMPT},
+                    ],
+                    stream,
+                    temperature,
+                )
+                content = stitch(content, more)
+            if finish_reason == "length":
+                logger.warning(
+                    f"Response still cut off at max_tokens after {continuations} continuations"
                 )
-                if not response.choices or not response.choices[0].message.content:
-                    raise ValueError("Empty or invalid response from LLM")
-                return response.choices[0].message.content
-
-            # Streaming request
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=temperature or self.temperature,
-                stream=True,
-            )
-
-            collected_messages = []
-            async for chunk in response:
-                chunk_message = chunk.choices[0].delta.content or ""
-                collected_messages.append(chunk_message)
-                print(chunk_message, end="", flush=True)
 
-            print()  # Newline after streaming
-            full_response = "".join(collected_messages).strip()
-            if not full_response:
-                raise ValueError("Empty response from streaming LLM")
-            return full_response
+            content = content.strip()
+            if not content:
+                raise ValueError("Empty or invalid response from LLM")
+            return content
 
         except ValueError as ve:
             logger.error(f"Validation error: {ve}")
@@ -177,10 +259,52 @@ class LLM:
             logger.error(f"Unexpected error in ask: {e}")
             raise
 
-    @retry(
-        wait=wait_random_exponential(min=1, max=60),
-        stop=stop_after_attempt(6),
-    )
+    async def _complete(
+        self,
+        messages: List[dict],
+        stream: bool,
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> Tuple[str, Optional[str]]:
+        """Request one completion, returning its text and finish reason."""
+        if not stream:
+            # Non-streaming request
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=temperature or self.temperature,
+                stream=False,
+                **kwargs,
+            )
+            if not response.choices:
+                raise ValueError("Empty or invalid response from LLM")
+            choice = response.choices[0]
+            return choice.message.content or "", choice.finish_reason
+
+        # Streaming request
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=self.max_tokens,
+            temperature=temperature or self.temperature,
+            stream=True,
+            **kwargs,
+        )
+
+        collected_messages = []
+        finish_reason = None
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            chunk_message = chunk.choices[0].delta.content or ""
+            collected_messages.append(chunk_message)
+            print(chunk_message, end="", flush=True)
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+
+        print()  # Newline after streaming
+        return "".join(collected_messages), finish_reason
+
     async def ask_tool(
         self,
         messages: List[Union[dict, Message]],
@@ -189,6 +313,7 @@ class LLM:
         tools: Optional[List[dict]] = None,
         tool_choice: Literal["none", "auto", "required"] = "auto",
         temperature: Optional[float] = None,
+        task: Optional[str] = None,
         **kwargs,
     ):
         """
@@ -201,6 +326,7 @@ class LLM:
             tools: List of tools to use
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
+            task: Optional task class, routed to the models configured for it in `[routing]`
             **kwargs: Additional completion arguments
 
         Returns:
@@ -211,6 +337,33 @@ class LLM:
             OpenAIError: If API call fails after retries
             Exception: For unexpected errors
         """
+        return await self._call_routed(
+            task,
+            "_ask_tool",
+            messages=messages,
+            system_msgs=system_msgs,
+            timeout=timeout,
+            tools=tools,
+            tool_choice=tool_choice,
+            temperature=temperature,
+            **kwargs,
+        )
+
+    @retry(
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(6),
+    )
+    async def _ask_tool(
+        self,
+        messages: List[Union[dict, Message]],
+        system_msgs: Optional[List[Union[dict, Message]]] = None,
+        timeout: int = 60,
+        tools: Optional[List[dict]] = None,
+        tool_choice: Literal["none", "auto", "required"] = "auto",
+        temperature: Optional[float] = None,
+        **kwargs,
+    ):
+        """Ask this LLM's model using functions/tools, retrying on errors."""
         try:
             # Validate tool_choice
             if tool_choice not in ["none", "auto", "required"]:
@@ -246,7 +399,12 @@ class LLM:
                 print(response)
                 raise ValueError("Invalid or empty response from LLM")
 
-            return response.choices[0].message
+            message = response.choices[0].message
+            if response.choices[0].finish_reason == "length":
+                await self._continue_message(
+                    message, messages, tools, temperature, timeout
+                )
+            return message
 
         except ValueError as ve:
             logger.error(f"Validation error in ask_tool: {ve}")
@@ -262,3 +420,55 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    async def _continue_message(
+        self,
+        message,
+        messages: List[dict],
+        tools: Optional[List[dict]],
+        temperature: Optional[float],
+        timeout: int,
+    ) -> None:
+        """Complete a tool call response cut off at `max_tokens`, in place.
+
+        The arguments of a truncated tool call are continued as plain text and
+        appended to the call; a truncated text response is continued like in `ask`.
+        """
+        tool_call = message.tool_calls[-1] if message.tool_calls else None
+        if tool_call is not None:
+            partial = tool_call.function.arguments or ""
+            prompt = CONTINUE_ARGUMENTS_PROMPT.format(name=tool_call.function.name)
+        else:
+            partial = message.content or ""
+            prompt = CONTINUE_PROMPT
+
+        finish_reason = "length"
+        continuations = 0
+        while finish_reason == "length" and continuations < self.max_continuations:
+            continuations += 1
+            logger.info(
+                f"Tool call response reached max_tokens, continuing ({continuations}/{self.max_continuations})"
+            )
+            # Keep the tool definitions for the history, but ask for text only
+            more, finish_reason = await self._complete(
+                messages
+                + [
+                    {"role": "assistant", "content": partial},
+                    {"role": "user", "content": prompt},
+                ],
+                stream=False,
+                temperature=temperature,
+                tools=tools,
+                tool_choice="none" if tools else NOT_GIVEN,
+                timeout=timeout,
+            )
+            partial = stitch(partial, more)
+
+        if finish_reason == "length":
+            logger.warning(
+                f"Tool call response still cut off at max_tokens after {continuations} continuations"
+            )
+        if tool_call is not None:
+            tool_call.function.arguments = partial
+        else:
+            message.content = partial
@@ -14,7 +14,7 @@ FileReaderOptimizedTool: Read and process large files by splitting them into man
 
 FileDownloader: Provide download links for generated test case files. Use this when you need to generate download links for files so users can download them from the frontend.
 
-Terminate: Terminate the interaction when the request is met OR if you cannot proceed further with the task. Always use this tool after completing the user's request to indicate that the task is finished.
+Terminate: Terminate the interaction when the request is met OR if you cannot proceed further with the task. Pass your final answer to the user in its `answer` parameter, so the answer and the termination come in the same response.
 
 When the user uploads a file, they will receive a message with the file name and file ID. For small files, you can use the FileReader tool. For larger files (over 50KB) or when you encounter timeout issues, use the FileReaderOptimizedTool with process_mode='chunks' to handle the file in manageable chunks and avoid timeouts.
 
@@ -27,5 +27,5 @@ When generating test cases based on uploaded documents, directly use AI to gener
 
 After generating test cases, save them as markdown files and provide download links for users to access the generated test cases.
 
-Based on user needs, proactively select the most appropriate tool or combination of tools. For complex tasks, you can break down the problem and use different tools step by step to solve it. After using each tool, clearly explain the execution results and suggest the next steps. When you have fully answered the user's question and completed the task, always call the Terminate tool with status "success" to end the interaction.
+Based on user needs, proactively select the most appropriate tool or combination of tools. For complex tasks, you can break down the problem and use different tools step by step to solve it. After using each tool, clearly explain the execution results and suggest the next steps. When you have fully answered the user's question and completed the task, call the Terminate tool with status "success" and your final answer to end the interaction.
 """
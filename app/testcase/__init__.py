@@ -0,0 +1,27 @@
+from app.testcase.dedup import DuplicateDetector, deduplicate
+from app.testcase.model import TestCase, TestCaseBatch, renumber, summarize
+from app.testcase.sections import DocumentSection, split_sections
+from app.testcase.storage import (
+    export_test_cases,
+    read_jsonl,
+    read_test_cases,
+    write_jsonl,
+    write_parquet,
+)
+
+
+__all__ = [
+    "DuplicateDetector",
+    "deduplicate",
+    "TestCase",
+    "TestCaseBatch",
+    "renumber",
+    "summarize",
+    "DocumentSection",
+    "split_sections",
+    "export_test_cases",
+    "read_jsonl",
+    "read_test_cases",
+    "write_jsonl",
+    "write_parquet",
+]
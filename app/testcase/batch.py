@@ -0,0 +1,223 @@
+"""Generating test cases for a batch of requirement documents with a pool of workers.
+
+The state of every document is recorded in a JSON file in the results
+directory after each document, so an interrupted or partly failed batch can be
+resumed: finished documents are skipped and the others processed again.
+"""
+
+import asyncio
+import glob
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from app.config import config
+from app.logger import logger
+from app.testcase.pipeline import DocumentError, run_pipeline
+
+
+DOCUMENT_EXTENSIONS = (".md", ".markdown", ".txt", ".pdf", ".docx")
+STATE_FILE = "batch_state.json"
+# Suffix of the generated files, which are never documents of a batch themselves
+OUTPUT_SUFFIX = "_测试用例"
+
+Status = Literal["pending", "done", "failed", "skipped"]
+
+
+class BatchItem(BaseModel):
+    """The state of one document of a batch."""
+
+    input_file: str
+    output_file: str
+    status: Status = "pending"
+    test_cases: int = 0
+    sections: int = 0
+    reused: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class BatchState(BaseModel):
+    items: Dict[str, BatchItem] = Field(default_factory=dict)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in ("done", "failed", "skipped", "pending")}
+        for item in self.items.values():
+            counts[item.status] += 1
+        return counts
+
+
+def find_documents(source: str, output_dir: Optional[str] = None) -> List[str]:
+    """The requirement documents in directory `source` (recursively), or matching glob `source`.
+
+    Generated test case files are left out, and so is `output_dir` if it lies
+    inside `source`, so outputs are not read back as input on the next run.
+    """
+    excluded = None
+    if os.path.isdir(source):
+        paths = (str(path) for path in Path(source).rglob("*"))
+        root = os.path.abspath(source)
+        if output_dir:
+            output_dir = os.path.abspath(output_dir)
+            if output_dir != root and os.path.commonpath([root, output_dir]) == root:
+                excluded = output_dir
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(
+        path
+        for path in paths
+        if os.path.isfile(path)
+        and path.lower().endswith(DOCUMENT_EXTENSIONS)
+        and not os.path.splitext(os.path.basename(path))[0].endswith(OUTPUT_SUFFIX)
+        and not (
+            excluded
+            and os.path.commonpath([excluded, os.path.abspath(path)]) == excluded
+        )
+    )
+
+
+class BatchRunner:
+    """Runs the test case pipeline for many documents, `workers` documents at a time.
+
+    All workers share one limit of `llm_concurrency` concurrent LLM calls, so
+    the number of workers only decides how many documents are read, split and
+    exported at the same time.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        output_format: str = "xlsx",
+        workers: int = 4,
+        llm_concurrency: Optional[int] = None,
+        reuse: bool = True,
+    ):
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.workers = workers
+        self.llm_concurrency = llm_concurrency or config.test_case.max_concurrency
+        self.reuse = reuse
+        self.state_path = os.path.join(output_dir, STATE_FILE)
+        self.state = self._load_state()
+
+    def _load_state(self) -> BatchState:
+        if not os.path.exists(self.state_path):
+            return BatchState()
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return BatchState.model_validate_json(f.read())
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable batch state {self.state_path}: {e}")
+            return BatchState()
+
+    def _save_state(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.state.model_dump_json(indent=2))
+        os.replace(tmp_path, self.state_path)
+
+    def _output_file(self, input_file: str, base: str) -> str:
+        """The output path mirroring the location of `input_file` below `base`."""
+        relative = os.path.relpath(input_file, base)
+        stem = os.path.splitext(relative)[0]
+        return os.path.join(self.output_dir, f"{stem}{OUTPUT_SUFFIX}.{self.output_format}")
+
+    def plan(self, documents: List[str], resume: bool = True) -> List[BatchItem]:
+        """The items to process; with `resume`, documents finished in an earlier run are left out."""
+        directories = [os.path.dirname(os.path.abspath(d)) for d in documents]
+        base = os.path.commonpath(directories) if directories else ""
+        items = []
+        for document in documents:
+            key = os.path.abspath(document)
+            item = self.state.items.get(key)
+            if (
+                resume
+                and item is not None
+                and item.status == "done"
+                and os.path.exists(item.output_file)
+            ):
+                continue
+            item = BatchItem(
+                input_file=document, output_file=self._output_file(key, base)
+            )
+            self.state.items[key] = item
+            items.append(item)
+        return items
+
+    async def run(self, documents: List[str], resume: bool = True) -> BatchState:
+        """Process the documents and return their state.
+
+        The state file also keeps documents of earlier runs over other sources,
+        but the returned state and the logged counts only cover `documents`.
+        """
+        items = self.plan(documents, resume)
+        skipped = len(documents) - len(items)
+        if skipped:
+            logger.info(f"Skipping {skipped} documents finished in an earlier run")
+        self._save_state()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+        limiter = asyncio.Semaphore(self.llm_concurrency)
+        finished = 0
+        started = time.monotonic()
+
+        async def worker() -> None:
+            nonlocal finished
+            while not queue.empty():
+                item = queue.get_nowait()
+                await self._process(item, limiter)
+                finished += 1
+                self._save_state()
+                if item.status == "done":
+                    detail = f"{item.test_cases} test cases in {item.seconds:.1f}s"
+                else:
+                    detail = item.error
+                logger.info(
+                    f"[{finished}/{len(items)}] {item.status}: {item.input_file} ({detail})"
+                )
+
+        await asyncio.gather(
+            *(worker() for _ in range(min(self.workers, len(items))))
+        )
+
+        state = BatchState(
+            items={
+                key: self.state.items[key]
+                for key in dict.fromkeys(os.path.abspath(d) for d in documents)
+            }
+        )
+        counts = state.counts()
+        logger.info(
+            f"Batch finished in {time.monotonic() - started:.1f}s: {counts['done']} done, "
+            f"{counts['failed']} failed, {counts['skipped']} skipped, {counts['pending']} pending. "
+            f"State saved to {self.state_path}"
+        )
+        return state
+
+    async def _process(self, item: BatchItem, limiter: asyncio.Semaphore) -> None:
+        started = time.monotonic()
+        try:
+            result = await run_pipeline(
+                item.input_file,
+                item.output_file,
+                document=os.path.abspath(item.input_file),
+                reuse=self.reuse,
+                limiter=limiter,
+            )
+        except DocumentError as e:
+            # Nothing to generate test cases from
+            item.status, item.error = "skipped", str(e)
+        except Exception as e:
+            item.status, item.error = "failed", f"{type(e).__name__}: {e}"
+        else:
+            item.status, item.error = "done", None
+            item.test_cases = result.test_cases
+            item.sections = result.sections
+            item.reused = result.reused
+        item.seconds = round(time.monotonic() - started, 2)
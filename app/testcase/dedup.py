@@ -0,0 +1,177 @@
+"""Near-duplicate detection for test cases with MinHash and locality-sensitive hashing.
+
+Texts are normalized, split into character shingles and reduced to MinHash
+signatures, all in vectorized NumPy passes over the whole corpus. LSH banding
+proposes candidate pairs; pairs whose estimated Jaccard similarity reaches the
+threshold are merged, and the earliest text of every group is kept.
+"""
+
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.testcase.model import TestCase
+
+
+# Punctuation, whitespace and step numbering do not distinguish test cases
+_NOISE = re.compile(r"(?m)^\s*\d+\s*[.、)）]|[\W_]+")
+
+
+def normalize(text: str) -> str:
+    return _NOISE.sub("", text.lower())
+
+
+def test_case_text(test_case: TestCase) -> str:
+    """The content compared between test cases: everything except ID, module and priority."""
+    return "\n".join(
+        [test_case.name, *test_case.preconditions, *test_case.steps, test_case.expected]
+    )
+
+
+def _lsh_shape(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick bands × rows whose S-curve threshold (1/bands)^(1/rows) lies just below `threshold`."""
+    best = (num_perm, 1)
+    best_gap = float("inf")
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        curve = (1 / bands) ** (1 / rows)
+        # Stay below the threshold, so that few true duplicates are missed
+        if curve <= threshold and threshold - curve < best_gap:
+            best, best_gap = (bands, rows), threshold - curve
+    return best
+
+
+class DuplicateDetector:
+    """Groups near-duplicate texts by estimated Jaccard similarity of their character shingles."""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_shape(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        # 32-bit xor-multiply-xorshift hash functions standing in for random permutations
+        self._seeds = rng.integers(0, 2**32, size=num_perm, dtype=np.uint32)
+        self._mult = rng.integers(0, 2**32, size=num_perm, dtype=np.uint32) | np.uint32(1)
+        self._band_mult = rng.integers(1, 2**63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+    def signatures(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """MinHash signatures of the non-empty texts, and the indices of those texts."""
+        k = self.shingle_size
+        normalized = [normalize(text) for text in texts]
+        # Texts shorter than a shingle still get one shingle
+        normalized = [t.ljust(k) if 0 < len(t) < k else t for t in normalized]
+        lengths = np.fromiter((len(t) for t in normalized), dtype=np.int64, count=len(normalized))
+        indices = np.flatnonzero(lengths)
+        if not len(indices):
+            return np.empty((0, self.num_perm), dtype=np.uint32), indices
+
+        codes = np.frombuffer("".join(normalized).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        ends = np.cumsum(lengths)
+        # A shingle starts at every position that leaves k characters in its text
+        starts = np.arange(len(codes) - k + 1)
+        text_ends = np.repeat(ends, lengths)[: len(starts)]
+        starts = starts[starts + k <= text_ends]
+
+        shingles = np.zeros(len(starts), dtype=np.uint64)
+        for offset in range(k):
+            shingles = shingles * np.uint64(1_000_003) + codes[starts + offset]
+        shingles = ((shingles * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)).astype(np.uint32)
+
+        # Shingles are grouped by text, so each text's minimum is a reduceat segment
+        segment_starts = np.searchsorted(starts, (ends - lengths)[indices])
+        signatures = np.empty((len(indices), self.num_perm), dtype=np.uint32)
+        hashed = np.empty_like(shingles)
+        for i in range(self.num_perm):
+            np.bitwise_xor(shingles, self._seeds[i], out=hashed)
+            hashed *= self._mult[i]
+            hashed ^= hashed >> np.uint32(15)
+            signatures[:, i] = np.minimum.reduceat(hashed, segment_starts)
+        return signatures, indices
+
+    def find_duplicates(self, texts: Sequence[str]) -> np.ndarray:
+        """For every text, the index of the earliest text it duplicates, or its own index."""
+        groups = np.arange(len(texts))
+        signatures, indices = self.signatures(texts)
+        if len(indices) < 2:
+            return groups
+
+        first, second = self._candidate_pairs(signatures)
+        if len(first):
+            similarity = (signatures[first] == signatures[second]).mean(axis=1)
+            keep = similarity >= self.threshold
+            first, second = first[keep], second[keep]
+
+        # Union-find with the smallest index as root, so the earliest text represents its group
+        parent = np.arange(len(indices))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for a, b in zip(first.tolist(), second.tolist()):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        roots = np.fromiter((find(i) for i in range(len(indices))), dtype=np.int64, count=len(indices))
+        groups[indices] = indices[roots]
+        return groups
+
+    def _candidate_pairs(self, signatures: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Pairs (earliest, other) of signatures that agree on all rows of at least one band."""
+        pairs = []
+        positions = np.arange(len(signatures))
+        for band in range(self.bands):
+            block = signatures[:, band * self.rows : (band + 1) * self.rows].astype(np.uint64)
+            keys = (block * self._band_mult).sum(axis=1)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            same = np.empty(len(order), dtype=bool)
+            same[0] = False
+            np.equal(sorted_keys[1:], sorted_keys[:-1], out=same[1:])
+            if not same.any():
+                continue
+            # Link every bucket member to the first (earliest) member of its bucket
+            bucket_start = np.maximum.accumulate(np.where(same, 0, positions))
+            members = np.flatnonzero(same)
+            pairs.append(np.stack([order[bucket_start[members]], order[members]], axis=1))
+        if not pairs:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        unique = np.unique(np.concatenate(pairs), axis=0)
+        return unique[:, 0], unique[:, 1]
+
+
+def deduplicate(
+    test_cases: Iterable[TestCase],
+    threshold: float = 0.8,
+    detector: Optional[DuplicateDetector] = None,
+) -> Tuple[List[TestCase], List[Tuple[str, str]]]:
+    """Drop test cases that nearly duplicate an earlier one.
+
+    Returns the kept test cases and (dropped ID, kept ID) pairs.
+    """
+    test_cases = list(test_cases)
+    detector = detector or DuplicateDetector(threshold)
+    groups = detector.find_duplicates([test_case_text(tc) for tc in test_cases])
+    kept, dropped = [], []
+    for i, group in enumerate(groups.tolist()):
+        if group == i:
+            kept.append(test_cases[i])
+        else:
+            dropped.append((test_cases[i].id, test_cases[group].id))
+    return kept, dropped
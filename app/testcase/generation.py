@@ -0,0 +1,55 @@
+"""Generating structured test cases with the LLM."""
+
+import json
+from typing import List, Optional
+
+from app.llm import LLM
+from app.logger import logger
+from app.prompt.test_case import GENERATE_PROMPT, SYSTEM_PROMPT
+from app.schema import Message
+from app.testcase.model import TestCase, TestCaseBatch
+from app.tool.create_chat_completion import CreateChatCompletion
+
+
+async def generate_test_cases(
+    document: str,
+    module: str = "",
+    id_prefix: str = "TC",
+    llm: Optional[LLM] = None,
+) -> List[TestCase]:
+    """Ask the LLM for test cases covering `document`, returned through the TestCaseBatch schema.
+
+    Test cases without a module are assigned `module`.
+    """
+    llm = llm or LLM()
+    tool = CreateChatCompletion(TestCaseBatch)
+    module_hint = f"All test cases belong to the module '{module}'.\n" if module else ""
+    response = await llm.ask_tool(
+        messages=[
+            Message.user_message(
+                GENERATE_PROMPT.format(
+                    module_hint=module_hint, id_prefix=id_prefix, document=document
+                )
+            )
+        ],
+        system_msgs=[Message.system_message(SYSTEM_PROMPT)],
+        tools=[tool.to_param()],
+        tool_choice="required",
+        task="test_case_generation",
+    )
+
+    test_cases: List[TestCase] = []
+    for tool_call in response.tool_calls or []:
+        if tool_call.function.name != tool.name:
+            continue
+        try:
+            batch = await tool.execute(**json.loads(tool_call.function.arguments))
+        except Exception as e:
+            logger.warning(f"Discarding malformed test cases from the LLM: {e}")
+            continue
+        test_cases.extend(batch.test_cases)
+
+    for test_case in test_cases:
+        if not test_case.module:
+            test_case.module = module
+    return test_cases
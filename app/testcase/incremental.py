@@ -0,0 +1,206 @@
+"""Regenerating test cases for a new version of a requirements document.
+
+The document is split into sections, and the test cases generated for a section
+are cached under the hash of its content. When a new version of the document is
+processed, only sections whose hash is not cached go through the LLM; the test
+cases of unchanged sections are reused.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from app.config import PROJECT_ROOT, TestCaseSettings, config
+from app.llm import LLM
+from app.logger import logger
+from app.prompt.test_case import GENERATE_PROMPT, SYSTEM_PROMPT
+from app.testcase.generation import generate_test_cases
+from app.testcase.model import TestCase, renumber
+from app.testcase.sections import DocumentSection, split_sections
+from app.testcase.storage import PathLike, read_jsonl, write_jsonl
+
+
+# Changing the prompts invalidates the cached test cases
+PROMPT_FINGERPRINT = hashlib.sha256(
+    (SYSTEM_PROMPT + GENERATE_PROMPT).encode("utf-8")
+).hexdigest()[:16]
+
+
+class SectionCache:
+    """Test cases per document section, one JSONL file per section hash under `root`.
+
+    For every named document, the section hashes of its last processed version
+    are kept in a manifest, to report which sections were removed.
+    """
+
+    def __init__(self, root: PathLike):
+        self.root = Path(root)
+
+    def key(self, section: DocumentSection) -> str:
+        return hashlib.sha256(
+            f"{PROMPT_FINGERPRINT}\n{section.digest}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, section: DocumentSection) -> Optional[List[TestCase]]:
+        path = self._section_path(self.key(section))
+        if not path.exists():
+            return None
+        try:
+            return list(read_jsonl(path))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cached test cases {path}: {e}")
+            return None
+
+    def put(self, section: DocumentSection, test_cases: List[TestCase]) -> None:
+        path = self._section_path(self.key(section))
+        tmp_path = path.with_suffix(".tmp")
+        write_jsonl(tmp_path, test_cases)
+        os.replace(tmp_path, path)
+
+    def load_manifest(self, document: str) -> Optional[List[str]]:
+        """Section keys of the last processed version of `document`, if there is one."""
+        path = self._manifest_path(document)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))["sections"]
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+            return None
+
+    def save_manifest(self, document: str, keys: List[str]) -> None:
+        path = self._manifest_path(document)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"document": document, "sections": keys}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+
+    def _section_path(self, key: str) -> Path:
+        return self.root / "sections" / key[:2] / f"{key}.jsonl"
+
+    def _manifest_path(self, document: str) -> Path:
+        name = hashlib.sha256(document.encode("utf-8")).hexdigest()[:32]
+        return self.root / "documents" / f"{name}.json"
+
+
+class RegenerationResult(BaseModel):
+    """Test cases of a document and how many sections needed the LLM."""
+
+    test_cases: List[TestCase]
+    sections: int
+    reused: int
+    generated: int
+    # Sections of the previous version of the document that no longer exist
+    removed: int = 0
+
+
+def create_section_cache(settings: Optional[TestCaseSettings] = None) -> SectionCache:
+    """Build the section cache described by the `[test_case]` configuration."""
+    settings = settings or config.test_case
+    root = Path(settings.cache_dir)
+    if not root.is_absolute():
+        root = PROJECT_ROOT / root
+    return SectionCache(root)
+
+
+_cache: Optional[SectionCache] = None
+
+
+def get_section_cache() -> SectionCache:
+    """Return the process-wide section cache."""
+    global _cache
+    if _cache is None:
+        _cache = create_section_cache()
+    return _cache
+
+
+async def regenerate_test_cases(
+    content: str,
+    document: Optional[str] = None,
+    cache: Optional[SectionCache] = None,
+    id_prefix: str = "TC",
+    llm: Optional[LLM] = None,
+    max_concurrency: Optional[int] = None,
+    reuse: bool = True,
+    limiter: Optional[asyncio.Semaphore] = None,
+) -> RegenerationResult:
+    """Generate test cases for `content`, reusing the cached test cases of unchanged sections.
+
+    Sections missing from the cache are generated concurrently, at most
+    `max_concurrency` at a time, or as many as `limiter` allows when it is
+    shared between several documents. With `reuse` off, every section is generated
+    again and the cache refreshed. `document` names the document across
+    versions, e.g. its file name; it is only used to report the sections
+    removed since the previous version. The test cases are numbered
+    {id_prefix}-001, ... in document order. Sections are cached as soon as
+    their test cases are generated, so a failed run can be repeated without
+    generating the finished sections again.
+    """
+    settings = config.test_case
+    cache = cache or get_section_cache()
+    llm = llm or LLM()
+    semaphore = limiter or asyncio.Semaphore(
+        max_concurrency or settings.max_concurrency
+    )
+    sections = split_sections(content, settings.max_section_chars)
+    keys = [cache.key(section) for section in sections]
+
+    async def generate(section: DocumentSection) -> List[TestCase]:
+        async with semaphore:
+            logger.info(f"Generating test cases for section '{section.title}'")
+            test_cases = await generate_test_cases(
+                section.full_text, module=section.title, llm=llm
+            )
+        # An empty result is more likely a failed generation than a section without test cases
+        if test_cases:
+            cache.put(section, test_cases)
+        return test_cases
+
+    results: Dict[str, List[TestCase]] = {}
+    missing: Dict[str, DocumentSection] = {}
+    for section, key in zip(sections, keys):
+        if key in results or key in missing:
+            continue
+        test_cases = cache.get(section) if reuse else None
+        if test_cases is not None:
+            results[key] = test_cases
+        else:
+            missing[key] = section
+
+    # Let the other sections finish and be cached when one of them fails
+    generated = await asyncio.gather(
+        *(generate(section) for section in missing.values()), return_exceptions=True
+    )
+    for key, test_cases in zip(missing, generated):
+        if isinstance(test_cases, BaseException):
+            raise test_cases
+        results[key] = test_cases
+
+    removed = 0
+    if document:
+        previous = cache.load_manifest(document)
+        if previous is not None:
+            removed = len(set(previous) - set(keys))
+        cache.save_manifest(document, keys)
+
+    logger.info(
+        f"Test cases for {len(sections)} sections: {len(results) - len(missing)} reused, "
+        f"{len(missing)} generated, {removed} removed since the previous version"
+    )
+    return RegenerationResult(
+        test_cases=renumber(
+            (test_case for key in keys for test_case in results[key]), id_prefix
+        ),
+        sections=len(sections),
+        reused=len(results) - len(missing),
+        generated=len(missing),
+        removed=removed,
+    )
@@ -0,0 +1,99 @@
+"""Typed intermediate representation of generated test cases."""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Literal
+
+from pydantic import BaseModel, Field
+
+
+Priority = Literal["P0", "P1", "P2", "P3"]
+PRIORITIES = ("P0", "P1", "P2", "P3")
+
+# Step numbering such as "1. ", "2、" or "3) " in markdown test cases
+_STEP_NUMBER = re.compile(r"^\d+\s*[.、)）]\s*")
+
+
+class TestCase(BaseModel):
+    """A single functional test case."""
+
+    # Not a pytest test class, despite its name
+    __test__ = False
+
+    id: str = Field(..., description="Unique test case ID, e.g. TC-001")
+    module: str = Field("", description="Feature module the test case belongs to")
+    name: str = Field(..., description="Short title of what is tested")
+    preconditions: List[str] = Field(
+        default_factory=list, description="Conditions that must hold before the test"
+    )
+    steps: List[str] = Field(..., description="Test steps, one action per item")
+    expected: str = Field(..., description="Expected result")
+    priority: Priority = Field(
+        "P2", description="P0 (critical) to P3 (low), by the impact of a failure"
+    )
+
+    def to_record(self) -> Dict[str, str]:
+        """Flatten into the record format produced by the markdown parser and used by ExcelConverter."""
+        return {
+            "id": self.id,
+            "module": self.module,
+            "name": self.name,
+            "precondition": " ".join(self.preconditions),
+            "steps": "\n".join(self.steps),
+            "expected": self.expected,
+            "priority": self.priority,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, str]) -> "TestCase":
+        """Build a test case from a record of the markdown parser."""
+        priority = (record.get("priority") or "").strip().upper()
+        precondition = (record.get("precondition") or "").strip()
+        return cls(
+            id=record.get("id") or "",
+            module=record.get("module") or "",
+            name=(record.get("name") or "").strip(),
+            preconditions=[precondition] if precondition else [],
+            steps=[
+                _STEP_NUMBER.sub("", line.strip())
+                for line in (record.get("steps") or "").splitlines()
+                if line.strip()
+            ],
+            expected=(record.get("expected") or "").strip(),
+            priority=priority if priority in PRIORITIES else "P2",
+        )
+
+
+class TestCaseBatch(BaseModel):
+    """Test cases generated in one LLM call."""
+
+    test_cases: List[TestCase] = Field(
+        ..., description="The test cases covering the given requirements"
+    )
+
+
+def renumber(test_cases: Iterable[TestCase], id_prefix: str = "TC") -> List[TestCase]:
+    """Copies of the test cases with IDs {id_prefix}-001, {id_prefix}-002, ... in order."""
+    return [
+        test_case.model_copy(update={"id": f"{id_prefix}-{i:03d}"})
+        for i, test_case in enumerate(test_cases, start=1)
+    ]
+
+
+def summarize(test_cases: Iterable[TestCase]) -> Dict:
+    """Count test cases in total, per module and per priority, and the average number of steps."""
+    total = 0
+    steps = 0
+    by_module: Counter = Counter()
+    by_priority: Counter = Counter()
+    for test_case in test_cases:
+        total += 1
+        steps += len(test_case.steps)
+        by_module[test_case.module or "-"] += 1
+        by_priority[test_case.priority] += 1
+    return {
+        "total": total,
+        "by_module": dict(by_module),
+        "by_priority": {p: by_priority[p] for p in PRIORITIES if by_priority[p]},
+        "average_steps": round(steps / total, 2) if total else 0.0,
+    }
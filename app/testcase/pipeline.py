@@ -0,0 +1,113 @@
+"""Test case generation for a requirements document, from the file to the exported test cases.
+
+The document is read and split into feature sections; the sections are
+generated concurrently through the LLM, reusing cached sections, and the test
+cases are merged, renumbered and exported in the format of the output file.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from app.llm import LLM
+from app.logger import logger
+from app.testcase.incremental import SectionCache, regenerate_test_cases
+from app.testcase.model import summarize
+from app.testcase.storage import export_test_cases
+from app.utils.file_reader import FileReader
+
+
+OUTPUT_FORMATS = ("xlsx", "csv", "md", "jsonl", "parquet")
+DEFAULT_OUTPUT_DIR = "outputs"
+
+
+class DocumentError(ValueError):
+    """The input document cannot be read or contains no text."""
+
+
+class PipelineResult(BaseModel):
+    """Where the test cases of a document were written, with generation statistics."""
+
+    input_file: str
+    output_file: str
+    test_cases: int
+    sections: int
+    reused: int
+    generated: int
+    removed: int
+    summary: Dict
+
+
+def read_document(path: str) -> str:
+    """Extract the text of a text, markdown, PDF or Word document."""
+    result = FileReader.read_file(path)
+    if result.get("error"):
+        raise DocumentError(result["error"])
+    return result["content"]
+
+
+def default_output_file(
+    input_file: str, output_format: str = "xlsx", output_dir: str = DEFAULT_OUTPUT_DIR
+) -> str:
+    stem = Path(input_file).stem
+    return os.path.join(output_dir, f"{stem}_测试用例.{output_format}")
+
+
+async def run_pipeline(
+    input_file: str,
+    output_file: Optional[str] = None,
+    document: Optional[str] = None,
+    reuse: bool = True,
+    max_concurrency: Optional[int] = None,
+    id_prefix: str = "TC",
+    split_by_module: bool = True,
+    cache: Optional[SectionCache] = None,
+    llm: Optional[LLM] = None,
+    limiter: Optional[asyncio.Semaphore] = None,
+) -> PipelineResult:
+    """Generate test cases for `input_file` and write them to `output_file`.
+
+    The output format follows the extension of `output_file`, by default an
+    .xlsx file next to the other outputs. `document` names the document across
+    versions to report removed sections; it defaults to the input file name.
+    """
+    output_file = output_file or default_output_file(input_file)
+    suffix = os.path.splitext(output_file)[1].lower().lstrip(".")
+    if suffix not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unsupported output format '{suffix}', expected one of {', '.join(OUTPUT_FORMATS)}"
+        )
+
+    content = await asyncio.to_thread(read_document, input_file)
+    if not content.strip():
+        raise DocumentError(f"No text found in {input_file}")
+
+    result = await regenerate_test_cases(
+        content,
+        document=document or os.path.basename(input_file),
+        cache=cache,
+        id_prefix=id_prefix,
+        llm=llm,
+        max_concurrency=max_concurrency,
+        reuse=reuse,
+        limiter=limiter,
+    )
+    if not result.sections:
+        raise DocumentError(f"No requirements found in {input_file}")
+    count = await asyncio.to_thread(
+        export_test_cases, output_file, result.test_cases, split_by_module
+    )
+    logger.info(f"Wrote {count} test cases for {input_file} to {output_file}")
+    return PipelineResult(
+        input_file=input_file,
+        output_file=output_file,
+        test_cases=count,
+        sections=result.sections,
+        reused=result.reused,
+        generated=result.generated,
+        removed=result.removed,
+        summary=summarize(result.test_cases),
+    )
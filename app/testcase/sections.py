@@ -0,0 +1,137 @@
+"""Splitting requirement documents into feature sections for test case generation."""
+
+import hashlib
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+# Markdown headings, multi-level numbering ("3.2 用户登录") and Chinese chapter headings
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+_NUMBERED_HEADING = re.compile(r"^(\d+(?:\.\d+)+)\.?\s*([^\s\d.].{0,60})$")
+_CHAPTER_HEADING = re.compile(r"^(第[一二三四五六七八九十百\d]+[章节部分])\s*(.{0,60})$")
+_CHINESE_NUMBERED_HEADING = re.compile(r"^([一二三四五六七八九十]+)[、.]\s*(.{1,60})$")
+# Numbered lines ending like a sentence are list items, not headings
+_SENTENCE_END = re.compile(r"[，。；：,;:！？!?]$")
+# Shorter text before the first heading, or under the first heading, is a title page
+# (name, version, authors), not requirements
+MIN_PREAMBLE_CHARS = 200
+
+
+class DocumentSection(BaseModel):
+    """A heading and the requirements below it, up to the next heading."""
+
+    title: str
+    text: str
+    # Lines carried over from before the section for context (the title page and
+    # headings without content of their own); not part of the digest
+    context: str = ""
+
+    @property
+    def full_text(self) -> str:
+        """The section text preceded by its context, as given to the LLM."""
+        return f"{self.context}\n{self.text}" if self.context else self.text
+
+    @property
+    def digest(self) -> str:
+        """Hash of the section's own content, ignoring indentation and blank lines.
+
+        The context is left out, so that e.g. a new version line on the title page
+        does not make the first section look changed.
+        """
+        lines = (line.strip() for line in self.text.splitlines())
+        content = "\n".join([self.title, *(line for line in lines if line)])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _heading(line: str) -> Optional[str]:
+    """The title of `line` if it is a section heading."""
+    if line.startswith("#"):
+        match = _MARKDOWN_HEADING.match(line)
+        return match.group(2).strip() if match else None
+    if len(line) > 64 or _SENTENCE_END.search(line):
+        return None
+    for pattern in (_NUMBERED_HEADING, _CHAPTER_HEADING, _CHINESE_NUMBERED_HEADING):
+        match = pattern.match(line)
+        if match:
+            return line
+    return None
+
+
+def _split_long(
+    title: str, lines: List[str], max_chars: int, context: List[str] = ()
+) -> List[DocumentSection]:
+    """Split the lines of one section into parts of at most about `max_chars`, preferring paragraph breaks.
+
+    The `context` lines go with the first part.
+    """
+    parts: List[DocumentSection] = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        if current and size + len(line) > max_chars:
+            # Break at the last blank line of the part, if it has one
+            cut = max(
+                (i for i, text in enumerate(current) if not text.strip()), default=None
+            )
+            if cut is not None and cut > 0:
+                parts.append(DocumentSection(title=title, text="\n".join(current[:cut])))
+                current = current[cut + 1 :]
+            else:
+                parts.append(DocumentSection(title=title, text="\n".join(current)))
+                current = []
+            size = sum(len(text) + 1 for text in current)
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        parts.append(DocumentSection(title=title, text="\n".join(current)))
+    if parts and context:
+        parts[0].context = "\n".join(context)
+    return parts
+
+
+def split_sections(content: str, max_chars: int = 6000) -> List[DocumentSection]:
+    """Split a document at its headings into sections of at most about `max_chars` characters.
+
+    A document without headings forms untitled sections; text before the first
+    heading does if it has at least MIN_PREAMBLE_CHARS characters. The first
+    titled section with less content than that is a title page, such as
+    "# 需求文档" over a version line, and is kept in the context of the following
+    section for context. Sections without any content besides their heading are
+    dropped, and their headings are kept in the context of the following section.
+    """
+    sections: List[DocumentSection] = []
+    title = ""
+    lines: List[str] = []
+    # Headings (and title page lines) of sections that had no content of their own
+    pending: List[str] = []
+    leading = True
+
+    def close(final: bool) -> None:
+        nonlocal leading
+        body = lines[1:] if title else lines
+        short = len("".join(body).strip()) < MIN_PREAMBLE_CHARS
+        if not title:
+            if short and not final:
+                return
+        elif leading:
+            leading = False
+            if short and not final:
+                pending.extend(lines)
+                return
+        if any(line.strip() for line in body):
+            sections.extend(_split_long(title, lines, max_chars, pending))
+            pending.clear()
+        elif title:
+            pending.append(lines[0])
+
+    for line in content.splitlines():
+        heading = _heading(line.strip())
+        if heading is not None:
+            close(final=False)
+            title, lines = heading, [line]
+            continue
+        lines.append(line)
+    close(final=True)
+    return sections
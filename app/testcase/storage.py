@@ -0,0 +1,170 @@
+"""Reading and writing test cases: JSONL as the native format, Parquet and markdown/CSV/XLSX exports."""
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Union
+
+from app.testcase.model import TestCase
+from app.utils.xlsx_writer import write_test_cases_csv, write_test_cases_xlsx
+
+
+PathLike = Union[str, Path]
+
+# Columns of the Parquet export, in order
+COLUMNS = ("id", "module", "name", "preconditions", "steps", "expected", "priority")
+
+
+class _Counted:
+    """Iterates over test cases, counting them on the way."""
+
+    def __init__(self, test_cases: Iterable[TestCase]):
+        self.test_cases = test_cases
+        self.count = 0
+
+    def __iter__(self) -> Iterator[TestCase]:
+        for test_case in self.test_cases:
+            self.count += 1
+            yield test_case
+
+
+def write_jsonl(path: PathLike, test_cases: Iterable[TestCase]) -> int:
+    """Write test cases as one JSON object per line, returning how many were written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for test_case in test_cases:
+            f.write(test_case.model_dump_json())
+            f.write("\n")
+            count += 1
+    return count
+
+
+def read_jsonl(path: PathLike) -> Iterator[TestCase]:
+    """Stream test cases from a JSONL file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield TestCase.model_validate_json(line)
+
+
+def write_parquet(path: PathLike, test_cases: Iterable[TestCase], batch_size: int = 10000) -> int:
+    """Write test cases to a Parquet file in batches of `batch_size` rows.
+
+    Requires the optional `pyarrow` package.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from e
+
+    schema = pa.schema(
+        [
+            ("id", pa.string()),
+            ("module", pa.string()),
+            ("name", pa.string()),
+            ("preconditions", pa.list_(pa.string())),
+            ("steps", pa.list_(pa.string())),
+            ("expected", pa.string()),
+            ("priority", pa.string()),
+        ]
+    )
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with pq.ParquetWriter(str(path), schema, compression="zstd") as writer:
+        batch: List[TestCase] = []
+
+        def flush():
+            columns = {name: [getattr(tc, name) for tc in batch] for name in COLUMNS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            batch.clear()
+
+        for test_case in test_cases:
+            batch.append(test_case)
+            count += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    return count
+
+
+def read_parquet(path: PathLike) -> Iterator[TestCase]:
+    """Stream test cases from a Parquet file written by `write_parquet`."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet import requires pyarrow: pip install pyarrow") from e
+
+    for batch in pq.ParquetFile(str(path)).iter_batches():
+        for row in batch.to_pylist():
+            yield TestCase(**row)
+
+
+def to_markdown_lines(test_cases: Iterable[TestCase]) -> Iterator[str]:
+    """Render test cases in the standard markdown format understood by the test case parser."""
+    module = None
+    for test_case in test_cases:
+        if test_case.module and test_case.module != module:
+            module = test_case.module
+            yield f"# 模块：{module}\n\n"
+        yield f"## 测试用例 {test_case.id}\n"
+        yield f"### 测试用例名称\n{test_case.name}\n"
+        yield f"### 优先级\n{test_case.priority}\n"
+        if test_case.preconditions:
+            yield "### 前置条件\n" + "".join(f"{p}\n" for p in test_case.preconditions)
+        yield "### 测试步骤\n" + "".join(
+            f"{i}. {step}\n" for i, step in enumerate(test_case.steps, start=1)
+        )
+        yield f"### 预期结果\n{test_case.expected}\n\n"
+
+
+def write_markdown(path: PathLike, test_cases: Iterable[TestCase], title: str = "测试用例") -> int:
+    """Write test cases as a markdown document, returning how many were written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    counted = _Counted(test_cases)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# {title}\n\n")
+        for chunk in to_markdown_lines(counted):
+            f.write(chunk)
+    return counted.count
+
+
+def read_test_cases(path: PathLike) -> Iterator[TestCase]:
+    """Stream test cases from a JSONL, Parquet or markdown file, chosen by extension."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".jsonl":
+        yield from read_jsonl(path)
+    elif suffix == ".parquet":
+        yield from read_parquet(path)
+    else:
+        from app.utils.test_case_parser import iter_test_cases
+
+        with open(path, "r", encoding="utf-8") as f:
+            for record in iter_test_cases(f):
+                yield TestCase.from_record(record)
+
+
+def export_test_cases(path: PathLike, test_cases: Iterable[TestCase], split_by_module: bool = True) -> int:
+    """Write test cases in the format given by the extension of `path`: .jsonl, .parquet, .md, .csv or .xlsx."""
+    suffix = os.path.splitext(str(path))[1].lower()
+    if suffix == ".jsonl":
+        return write_jsonl(path, test_cases)
+    if suffix == ".parquet":
+        return write_parquet(path, test_cases)
+    if suffix == ".md":
+        return write_markdown(path, test_cases)
+    if suffix in (".csv", ".xlsx"):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        counted = _Counted(test_cases)
+        records = (test_case.to_record() for test_case in counted)
+        if suffix == ".csv":
+            write_test_cases_csv(str(path), records)
+        else:
+            write_test_cases_xlsx(str(path), records, split_by_module)
+        return counted.count
+    raise ValueError(f"Unsupported test case file format: {suffix or path}")
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -8,6 +8,9 @@ class BaseTool(ABC, BaseModel):
     name: str
     description: str
     parameters: Optional[dict] = None
+    # Calls have no side effects, so they may be made early or concurrently; their
+    # blocking work has to run off the event loop for that to overlap with anything
+    read_only: bool = False
 
     class Config:
         arbitrary_types_allowed = True
@@ -20,6 +23,17 @@ class BaseTool(ABC, BaseModel):
     async def execute(self, **kwargs) -> Any:
         """Execute the tool with given parameters."""
 
+    async def cleanup(self) -> None:
+        """Release resources held for the current agent run; by default there are none."""
+
+    def speculate(self, text: str) -> List[Dict[str, Any]]:
+        """Predict calls the model is likely to make after reading `text`.
+
+        Only used for read-only tools, whose predicted calls may be run ahead of time.
+        Returns the arguments of each predicted call; by default nothing is predicted.
+        """
+        return []
+
     def to_param(self) -> Dict:
         """Convert tool to function call format."""
         return {
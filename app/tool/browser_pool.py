@@ -0,0 +1,196 @@
+"""Process-wide pool of headless browsers shared by BrowserUseTool instances."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from browser_use import Browser as BrowserUseBrowser
+from browser_use import BrowserConfig
+from browser_use.browser.context import BrowserContext
+
+from app.config import BrowserSettings, config
+from app.logger import logger
+
+
+class _PooledBrowser:
+    """A browser process owned by the pool and the bookkeeping needed to recycle it."""
+
+    def __init__(self, browser: BrowserUseBrowser):
+        self.browser = browser
+        self.active_contexts = 0
+        self.pages_opened = 0
+        self.retired = False
+
+
+class BrowserLease:
+    """A browser context leased from the pool, typically for the duration of one agent run."""
+
+    def __init__(
+        self, pool: "BrowserPool", entry: _PooledBrowser, context: BrowserContext
+    ):
+        self.pool = pool
+        self.context = context
+        self._entry = entry
+        self.released = False
+
+    def record_pages(self, count: int = 1) -> None:
+        """Count pages opened through this lease towards the browser's recycle budget."""
+        self._entry.pages_opened += count
+
+    async def release(self) -> None:
+        if not self.released:
+            self.released = True
+            await self.pool.release(self._entry, self.context)
+
+
+class BrowserPool:
+    """A bounded pool of browsers handing out isolated contexts.
+
+    At most `max_browsers` browser processes are started, each serving up to
+    `max_contexts_per_browser` leased contexts; callers beyond that wait up to
+    `acquire_timeout` seconds for a lease to be released. A browser that has
+    opened `recycle_after_pages` pages gets no new contexts and is closed once its
+    last context is released, and every new context is probed before it is
+    handed out.
+    """
+
+    def __init__(self, settings: Optional[BrowserSettings] = None):
+        self.settings = settings or config.browser
+        self._browsers: List[_PooledBrowser] = []
+        self._slots = asyncio.Semaphore(
+            self.settings.max_browsers * self.settings.max_contexts_per_browser
+        )
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, timeout: Optional[float] = None) -> BrowserLease:
+        """Lease a ready-to-use browser context, waiting for a free slot if necessary.
+
+        Raises TimeoutError if no slot becomes free within `timeout` seconds,
+        by default the configured `acquire_timeout`.
+        """
+        timeout = self.settings.acquire_timeout if timeout is None else timeout
+        try:
+            async with asyncio.timeout(timeout):
+                await self._slots.acquire()
+        except TimeoutError:
+            raise TimeoutError(
+                f"No browser context became free within {timeout:g}s; "
+                f"all {self.settings.max_browsers * self.settings.max_contexts_per_browser} are leased"
+            ) from None
+        try:
+            # Retry once on a fresh browser if the first one fails its readiness probe
+            for attempt in range(2):
+                async with self._lock:
+                    entry = self._pick_browser()
+                    entry.active_contexts += 1
+                try:
+                    context = await self._open_context(entry)
+                    return BrowserLease(self, entry, context)
+                except Exception as e:
+                    logger.warning(f"Browser context failed readiness probe: {e}")
+                    async with self._lock:
+                        entry.active_contexts -= 1
+                        entry.retired = True
+                    await self._close_if_idle(entry)
+                    if attempt:
+                        raise
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, entry: _PooledBrowser, context: BrowserContext) -> None:
+        """Close a leased context and recycle its browser if it is due."""
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"Error closing browser context: {e}")
+            entry.retired = True
+        finally:
+            entry.active_contexts -= 1
+            if entry.pages_opened >= self.settings.recycle_after_pages:
+                entry.retired = True
+            await self._close_if_idle(entry)
+            self._slots.release()
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[BrowserLease]:
+        lease = await self.acquire()
+        try:
+            yield lease
+        finally:
+            await lease.release()
+
+    async def close(self) -> None:
+        """Close every browser in the pool, including ones with contexts still leased."""
+        async with self._lock:
+            browsers, self._browsers = self._browsers, []
+        for entry in browsers:
+            await self._close_browser(entry)
+
+    def _pick_browser(self) -> _PooledBrowser:
+        for entry in self._browsers:
+            # Leases held for a long time can use up the budget before any is released
+            if entry.pages_opened >= self.settings.recycle_after_pages:
+                entry.retired = True
+        live = [entry for entry in self._browsers if not entry.retired]
+        available = [
+            entry
+            for entry in live
+            if entry.active_contexts < self.settings.max_contexts_per_browser
+        ]
+        least_busy = min(
+            available, key=lambda entry: entry.active_contexts, default=None
+        )
+        # Spread contexts over separate processes before stacking them on one browser
+        if least_busy is not None and (
+            least_busy.active_contexts == 0 or len(live) >= self.settings.max_browsers
+        ):
+            return least_busy
+        if len(live) < self.settings.max_browsers:
+            entry = _PooledBrowser(
+                BrowserUseBrowser(BrowserConfig(headless=self.settings.headless))
+            )
+            self._browsers.append(entry)
+            logger.info(f"Launched pooled browser ({len(live) + 1} running)")
+            return entry
+        if least_busy is None:
+            # The slot semaphore bounds leases to the pool capacity, so this means a bug
+            raise RuntimeError("No browser available in the pool")
+        return least_busy
+
+    async def _open_context(self, entry: _PooledBrowser) -> BrowserContext:
+        context = await entry.browser.new_context()
+        try:
+            async with asyncio.timeout(self.settings.probe_timeout):
+                page = await context.get_current_page()
+                await page.evaluate("1")
+        except BaseException:
+            await context.close()
+            raise
+        return context
+
+    async def _close_if_idle(self, entry: _PooledBrowser) -> None:
+        async with self._lock:
+            if not entry.retired or entry.active_contexts > 0:
+                return
+            if entry in self._browsers:
+                self._browsers.remove(entry)
+        await self._close_browser(entry)
+
+    @staticmethod
+    async def _close_browser(entry: _PooledBrowser) -> None:
+        try:
+            await entry.browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {e}")
+
+
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool."""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
@@ -2,14 +2,18 @@ import asyncio
 import json
 from typing import Optional
 
-from browser_use import Browser as BrowserUseBrowser
-from browser_use import BrowserConfig
 from browser_use.browser.context import BrowserContext
 from browser_use.dom.service import DomService
 from pydantic import Field, field_validator
 from pydantic_core.core_schema import ValidationInfo
 
+from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
+from app.tool.browser_pool import BrowserLease, BrowserPool, get_browser_pool
+from app.utils.page_extractor import DEFAULT_PAGE_TOKENS, PageExtractor
+
+
+_page_extractor = PageExtractor()
 
 
 _BROWSER_DESCRIPTION = """
@@ -21,6 +25,8 @@ content extraction, and tab management. Supported actions include:
 - 'screenshot': Capture a screenshot
 - 'get_html': Get page HTML content
 - 'get_text': Get text content of the page
+  ('get_html' and 'get_text' return the main content as compact markdown by default; use
+  mode 'raw' for the unprocessed page, and 'page' to read further pages of long content)
 - 'read_links': Get all links on the page
 - 'execute_js': Execute JavaScript code
 - 'scroll': Scroll the page
@@ -76,6 +82,15 @@ class BrowserUseTool(BaseTool):
                 "type": "integer",
                 "description": "Tab ID for 'switch_tab' action",
             },
+            "mode": {
+                "type": "string",
+                "enum": ["readable", "raw"],
+                "description": "Extraction mode for 'get_html' and 'get_text': 'readable' (default) returns the main content as markdown, 'raw' returns the unprocessed page",
+            },
+            "page": {
+                "type": "integer",
+                "description": "Page of the readable content to return for 'get_html' and 'get_text' (1-based, default 1)",
+            },
         },
         "required": ["action"],
         "dependencies": {
@@ -90,9 +105,14 @@ class BrowserUseTool(BaseTool):
     }
 
     lock: asyncio.Lock = Field(default_factory=asyncio.Lock)
-    browser: Optional[BrowserUseBrowser] = Field(default=None, exclude=True)
+    pool: Optional[BrowserPool] = Field(default=None, exclude=True)
+    lease: Optional[BrowserLease] = Field(default=None, exclude=True)
     context: Optional[BrowserContext] = Field(default=None, exclude=True)
     dom_service: Optional[DomService] = Field(default=None, exclude=True)
+    page_tokens: int = Field(
+        default=DEFAULT_PAGE_TOKENS,
+        description="Token budget of one page of readable content",
+    )
 
     @field_validator("parameters", mode="before")
     def validate_parameters(cls, v: dict, info: ValidationInfo) -> dict:
@@ -101,11 +121,11 @@ class BrowserUseTool(BaseTool):
         return v
 
     async def _ensure_browser_initialized(self) -> BrowserContext:
-        """Ensure browser and context are initialized."""
-        if self.browser is None:
-            self.browser = BrowserUseBrowser(BrowserConfig(headless=False))
+        """Lease a browser context from the shared pool on first use."""
         if self.context is None:
-            self.context = await self.browser.new_context()
+            pool = self.pool or get_browser_pool()
+            self.lease = await pool.acquire()
+            self.context = self.lease.context
             self.dom_service = DomService(await self.context.get_current_page())
         return self.context
 
@@ -118,6 +138,8 @@ class BrowserUseTool(BaseTool):
         script: Optional[str] = None,
         scroll_amount: Optional[int] = None,
         tab_id: Optional[int] = None,
+        mode: str = "readable",
+        page: int = 1,
         **kwargs,
     ) -> ToolResult:
         """
@@ -131,6 +153,8 @@ class BrowserUseTool(BaseTool):
             script: JavaScript code for execution
             scroll_amount: Pixels to scroll for scroll action
             tab_id: Tab ID for switch_tab action
+            mode: 'readable' or 'raw' extraction for get_html and get_text
+            page: Page of the readable content for get_html and get_text
             **kwargs: Additional arguments
 
         Returns:
@@ -144,6 +168,7 @@ class BrowserUseTool(BaseTool):
                     if not url:
                         return ToolResult(error="URL is required for 'navigate' action")
                     await context.navigate_to(url)
+                    self.lease.record_pages()
                     return ToolResult(output=f"Navigated to {url}")
 
                 elif action == "click":
@@ -178,6 +203,9 @@ class BrowserUseTool(BaseTool):
                         system=screenshot,
                     )
 
+                elif action in ("get_html", "get_text") and mode == "readable":
+                    return await self._get_readable_content(context, page)
+
                 elif action == "get_html":
                     html = await context.get_page_html()
                     truncated = html[:2000] + "..." if len(html) > 2000 else html
@@ -226,6 +254,7 @@ class BrowserUseTool(BaseTool):
                     if not url:
                         return ToolResult(error="URL is required for 'new_tab' action")
                     await context.create_new_tab(url)
+                    self.lease.record_pages()
                     return ToolResult(output=f"Opened new tab with URL {url}")
 
                 elif action == "close_tab":
@@ -242,6 +271,33 @@ class BrowserUseTool(BaseTool):
             except Exception as e:
                 return ToolResult(error=f"Browser action '{action}' failed: {str(e)}")
 
+    async def _get_readable_content(
+        self, context: BrowserContext, page: int
+    ) -> ToolResult:
+        """Return one token-budgeted page of the current page's main content as markdown."""
+        html = await context.get_page_html()
+        url = (await context.get_current_page()).url
+        # Parsing a whole page takes a while, so keep it off the event loop
+        result = await asyncio.to_thread(
+            _page_extractor.extract_page,
+            html,
+            url=url,
+            page=page,
+            max_tokens=self.page_tokens,
+        )
+        output = result["content"]
+        if output is None:
+            return ToolResult(
+                error=f"Page {page} is out of range: the content of {url} has "
+                f"{result['total_pages']} page(s)"
+            )
+        if result["total_pages"] > 1:
+            output = (
+                f"[Page {result['page']}/{result['total_pages']} of {url}; "
+                f"request other pages with the 'page' parameter]\n\n{output}"
+            )
+        return ToolResult(output=output)
+
     async def get_current_state(self) -> ToolResult:
         """Get the current browser state as a ToolResult."""
         async with self.lock:
@@ -258,23 +314,21 @@ class BrowserUseTool(BaseTool):
             except Exception as e:
                 return ToolResult(error=f"Failed to get browser state: {str(e)}")
 
-    async def cleanup(self):
-        """Clean up browser resources."""
+    async def cleanup(self) -> None:
+        """Return the leased browser context to the pool; the next action leases a new one."""
         async with self.lock:
-            if self.context is not None:
-                await self.context.close()
-                self.context = None
-                self.dom_service = None
-            if self.browser is not None:
-                await self.browser.close()
-                self.browser = None
+            if self.lease is not None:
+                await self.lease.release()
+            self.lease = None
+            self.context = None
+            self.dom_service = None
 
     def __del__(self):
-        """Ensure cleanup when object is destroyed."""
-        if self.browser is not None or self.context is not None:
-            try:
-                asyncio.run(self.cleanup())
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                loop.run_until_complete(self.cleanup())
-                loop.close()
+        """Release a lease that was never cleaned up, if an event loop is still around to do it."""
+        lease = getattr(self, "lease", None)
+        if lease is None or lease.released:
+            return
+        try:
+            asyncio.get_running_loop().create_task(lease.release())
+        except RuntimeError:
+            logger.warning("BrowserUseTool was discarded without cleanup(); lease leaked")
@@ -47,11 +47,15 @@ class CreateChatCompletion(BaseTool):
             self.response_type, BaseModel
         ):
             schema = self.response_type.model_json_schema()
-            return {
+            parameters = {
                 "type": "object",
                 "properties": schema["properties"],
                 "required": schema.get("required", self.required),
             }
+            # Nested models are referenced from "$defs"
+            if "$defs" in schema:
+                parameters["$defs"] = schema["$defs"]
+            return parameters
 
         return self._create_type_schema(self.response_type)
 
@@ -0,0 +1,217 @@
+"""Bounded undo history for file edits, stored as reverse diffs."""
+
+import json
+import shutil
+import tempfile
+import weakref
+import zlib
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+from app.exceptions import ToolError
+
+
+MAX_HISTORY_BYTES: int = 32 * 1024 * 1024
+MAX_SPILL_BYTES: int = 4 * MAX_HISTORY_BYTES
+_COMPARE_BLOCK: int = 4096
+# Rough per-entry bookkeeping cost, so that many tiny edits still count against the cap
+_ENTRY_OVERHEAD: int = 64
+
+
+class ReverseDiff(NamedTuple):
+    """Turns the text after an edit back into the text before it.
+
+    The edited text is `prefix + <changed> + suffix`; undoing replaces
+    `text[start:end]` with `old`. `checksum` identifies the edited text so that a
+    diff is never applied to a file that was changed by something else.
+    """
+
+    start: int
+    end: int
+    old: str
+    checksum: int
+
+    @property
+    def size(self) -> int:
+        return len(self.old) + _ENTRY_OVERHEAD
+
+    def apply(self, text: str) -> str:
+        if _checksum(text) != self.checksum:
+            raise ToolError(
+                "The file has been modified outside of the editor since the last edit, so it cannot be undone."
+            )
+        return text[: self.start] + self.old + text[self.end :]
+
+
+def _checksum(text: str) -> int:
+    return zlib.crc32(text.encode())
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    """Length of the common prefix of `a` and `b`, comparing block by block."""
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i : i + _COMPARE_BLOCK] == b[i : i + _COMPARE_BLOCK]:
+        i += _COMPARE_BLOCK
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return min(i, limit)
+
+
+def _common_suffix_len(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix of `a` and `b`, at most `limit` characters."""
+    i = 0
+    while i < limit:
+        n = min(_COMPARE_BLOCK, limit - i)
+        if a[len(a) - i - n : len(a) - i] != b[len(b) - i - n : len(b) - i]:
+            break
+        i += n
+    while i < limit and a[len(a) - i - 1] == b[len(b) - i - 1]:
+        i += 1
+    return i
+
+
+def make_reverse_diff(old_text: str, new_text: str) -> ReverseDiff:
+    """Build the diff that restores `old_text` from `new_text`."""
+    prefix = _common_prefix_len(old_text, new_text)
+    suffix = _common_suffix_len(
+        old_text, new_text, min(len(old_text), len(new_text)) - prefix
+    )
+    return ReverseDiff(
+        start=prefix,
+        end=len(new_text) - suffix,
+        old=old_text[prefix : len(old_text) - suffix],
+        checksum=_checksum(new_text),
+    )
+
+
+class EditHistory:
+    """Per-editor undo stacks for every edited file.
+
+    Each edit is stored as a `ReverseDiff` against the text it produced, so an edit
+    of a few lines costs a few lines no matter how large the file is. The total
+    size of all stacks is capped at `max_bytes`; when it is exceeded the oldest
+    edits of the least recently edited files are dropped first, or written to
+    `spill_dir` if one is configured and read back once they are needed again.
+
+    Spilled edits go to a directory of their own below `spill_dir` and are capped
+    at `max_spill_bytes`, beyond which the oldest are deleted. A file is deleted
+    as soon as its edit is undone, and `clear()`, or garbage collection of the
+    history, removes the whole directory.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_HISTORY_BYTES,
+        spill_dir: Optional[Path] = None,
+        max_spill_bytes: int = MAX_SPILL_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.max_spill_bytes = max_spill_bytes
+        self.total_bytes = 0
+        self.spilled_bytes = 0
+        self._stacks: "OrderedDict[Path, Deque[ReverseDiff]]" = OrderedDict()
+        # Sequence numbers of the spilled edits of each file, oldest first
+        self._spilled: Dict[Path, Deque[int]] = {}
+        # Path and size of every spilled edit by sequence number, oldest first
+        self._spill_files: "OrderedDict[int, Tuple[Path, int]]" = OrderedDict()
+        self._spill_seq = 0
+        self._spill_root: Optional[Path] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def record(self, path: Path, old_text: str, new_text: str) -> None:
+        """Remember how to undo an edit of `path` from `old_text` to `new_text`."""
+        diff = make_reverse_diff(old_text, new_text)
+        stack = self._stacks.setdefault(path, deque())
+        stack.append(diff)
+        self._stacks.move_to_end(path)
+        self.total_bytes += diff.size
+        self._evict()
+
+    def has_history(self, path: Path) -> bool:
+        return bool(self._stacks.get(path)) or bool(self._spilled.get(path))
+
+    def undo(self, path: Path, current_text: str) -> str:
+        """Return the text of `path` before its last edit and drop that edit from the history."""
+        stack = self._stacks.get(path)
+        if stack:
+            diff = stack[-1]
+            old_text = diff.apply(current_text)
+            stack.pop()
+            self.total_bytes -= diff.size
+            if not stack:
+                del self._stacks[path]
+            return old_text
+
+        if self._spilled.get(path):
+            seq = self._spilled[path][-1]
+            diff = self._load_spilled(seq)
+            old_text = diff.apply(current_text)
+            self._spilled[path].pop()
+            if not self._spilled[path]:
+                del self._spilled[path]
+            self._delete_spilled(seq)
+            return old_text
+
+        raise ToolError(f"No edit history found for {path}.")
+
+    def clear(self) -> None:
+        """Forget all edits and delete the spilled ones from disk."""
+        self._stacks.clear()
+        self._spilled.clear()
+        self._spill_files.clear()
+        self.total_bytes = 0
+        self.spilled_bytes = 0
+        if self._finalizer is not None:
+            # Removes the spill directory
+            self._finalizer()
+            self._finalizer = None
+            self._spill_root = None
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self._stacks:
+            path, stack = next(iter(self._stacks.items()))
+            # Never drop the most recent edit of the file being edited right now
+            if len(self._stacks) == 1 and len(stack) <= 1:
+                break
+            diff = stack.popleft()
+            self.total_bytes -= diff.size
+            if self.spill_dir is not None:
+                self._spill(path, diff)
+            if not stack:
+                del self._stacks[path]
+
+    def _spill(self, path: Path, diff: ReverseDiff) -> None:
+        if self._spill_root is None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._spill_root = Path(tempfile.mkdtemp(prefix="edits-", dir=self.spill_dir))
+            self._finalizer = weakref.finalize(
+                self, shutil.rmtree, self._spill_root, ignore_errors=True
+            )
+        seq = self._spill_seq
+        self._spill_seq += 1
+        target = self._spill_root / f"{seq:08d}.json"
+        target.write_text(json.dumps(diff._asdict()), encoding="utf-8")
+        # Diffs are spilled oldest first, so the last sequence number is the newest
+        self._spilled.setdefault(path, deque()).append(seq)
+        self._spill_files[seq] = (path, diff.size)
+        self.spilled_bytes += diff.size
+        while self.spilled_bytes > self.max_spill_bytes and self._spill_files:
+            oldest = next(iter(self._spill_files))
+            oldest_path = self._spill_files[oldest][0]
+            # The oldest spilled edit of all is also the oldest of its file
+            self._spilled[oldest_path].popleft()
+            if not self._spilled[oldest_path]:
+                del self._spilled[oldest_path]
+            self._delete_spilled(oldest)
+
+    def _load_spilled(self, seq: int) -> ReverseDiff:
+        target = self._spill_root / f"{seq:08d}.json"
+        return ReverseDiff(**json.loads(target.read_text(encoding="utf-8")))
+
+    def _delete_spilled(self, seq: int) -> None:
+        _, size = self._spill_files.pop(seq)
+        self.spilled_bytes -= size
+        (self._spill_root / f"{seq:08d}.json").unlink(missing_ok=True)
@@ -1,8 +1,18 @@
+import asyncio
 import os
 import mimetypes
+import re
+from typing import Any, Dict, List
+
 from app.tool.base import BaseTool
 
 
+# 上传文件以UUID作为文件ID
+_FILE_ID_PATTERN = re.compile(
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"
+)
+
+
 class FileReader(BaseTool):
     name: str = "file_reader"
     description: str = """Read content from a file by its ID or path.
@@ -23,6 +33,19 @@ class FileReader(BaseTool):
         },
         "required": [],
     }
+    read_only: bool = True
+
+    def speculate(self, text: str) -> List[Dict[str, Any]]:
+        """文本中提到的已上传文件很可能会被读取，提前预测这些调用"""
+        upload_dir = "uploads"
+        if not os.path.exists(upload_dir):
+            return []
+        filenames = os.listdir(upload_dir)
+        return [
+            {"file_id": file_id}
+            for file_id in dict.fromkeys(_FILE_ID_PATTERN.findall(text.lower()))
+            if any(filename.startswith(file_id) for filename in filenames)
+        ]
 
     async def execute(self, file_id: str = None, file_path: str = None) -> str:
         """
@@ -55,8 +78,8 @@ class FileReader(BaseTool):
             else:
                 return "Either file_id or file_path must be provided"
 
-            # Read the file content directly
-            result = self._read_file_directly(target_file_path)
+            # Parsing PDF and Word documents blocks, so keep it off the event loop
+            result = await asyncio.to_thread(self._read_file_directly, target_file_path)
             
             if result.get("error"):
                 return f"Error reading file: {result['error']}"
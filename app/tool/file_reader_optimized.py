@@ -1,3 +1,4 @@
+import asyncio
 import os
 from app.tool.base import BaseTool
 from app.utils.file_reader_optimized import FileReaderOptimized
@@ -34,6 +35,7 @@ class FileReaderOptimizedTool(BaseTool):
         },
         "required": [],
     }
+    read_only: bool = True
 
     async def execute(self, file_id: str = None, file_path: str = None, max_chunk_size: int = 100000, process_mode: str = "full") -> str:
         """
@@ -68,8 +70,10 @@ class FileReaderOptimizedTool(BaseTool):
             else:
                 return "Either file_id or file_path must be provided"
 
-            # Read the file with chunking
-            result = FileReaderOptimized.read_file(target_file_path, max_chunk_size)
+            # Read the file with chunking, off the event loop
+            result = await asyncio.to_thread(
+                FileReaderOptimized.read_file, target_file_path, max_chunk_size
+            )
             
             if result.get("error"):
                 return f"Error reading file: {result['error']}"
@@ -1,83 +1,229 @@
 import asyncio
-import requests
-from typing import List
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+import httpx
 from bs4 import BeautifulSoup
 
+from app.logger import logger
 from app.tool.base import BaseTool
 
 
+try:
+    import lxml  # noqa: F401
+
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+SEARCH_URL = "https://www.quark.cn/s?q={query}&uc_param_str=ntnwvepffrbiprsvchutosstxs&by=submit&from=kkframenew"
+SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+SEARCH_TIMEOUT: float = 10.0
+CACHE_TTL: float = 600.0  # seconds
+CACHE_MAX_ENTRIES: int = 512
+MAX_CONCURRENT_QUERIES: int = 8
+
+
+class _FetchCancelled(Exception):
+    """The request that concurrent identical queries were waiting for was cancelled."""
+
+
+class _QueryCache:
+    """TTL + LRU cache of search results that collapses concurrent identical queries into one request.
+
+    If the task making the request is cancelled, the queries waiting for it
+    retry the request themselves instead of being cancelled along with it.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def get(self, query: str) -> Optional[List[str]]:
+        entry = self._entries.get(query)
+        if entry is None:
+            return None
+        expires_at, links = entry
+        if expires_at < time.monotonic():
+            del self._entries[query]
+            return None
+        self._entries.move_to_end(query)
+        return links
+
+    def put(self, query: str, links: List[str]) -> None:
+        self._entries[query] = (time.monotonic() + self.ttl, links)
+        self._entries.move_to_end(query)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, query: str, fetch) -> List[str]:
+        while True:
+            links = self.get(query)
+            if links is not None:
+                return links
+
+            inflight = self._inflight.get(query)
+            if inflight is None:
+                return await self._fetch(query, fetch)
+            try:
+                return await asyncio.shield(inflight)
+            except _FetchCancelled:
+                continue
+
+    async def _fetch(self, query: str, fetch) -> List[str]:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[query] = future
+        try:
+            links = await fetch(query)
+            self.put(query, links)
+            future.set_result(links)
+            return links
+        except asyncio.CancelledError:
+            future.set_exception(_FetchCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise the error; mark it retrieved so the loop does not warn about it
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(query) is future:
+                del self._inflight[query]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_cache = _QueryCache()
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def _get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it for the running event loop if needed."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        previous, previous_loop = _client, _client_loop
+        _client = httpx.AsyncClient(
+            headers=SEARCH_HEADERS,
+            timeout=SEARCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONCURRENT_QUERIES,
+                max_keepalive_connections=MAX_CONCURRENT_QUERIES,
+            ),
+        )
+        _client_loop = loop
+        if previous is not None and not previous.is_closed:
+            await _close_client(previous, previous_loop)
+    return _client
+
+
+async def _close_client(
+    client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]
+) -> None:
+    """Close a client created on another event loop, on that loop if it is still running."""
+    try:
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            await client.aclose()
+    except Exception as e:
+        # The connections of a closed loop cannot be shut down cleanly any more
+        logger.debug(f"Failed to close the previous search client: {e}")
+
+
+def _parse_links(html: str) -> List[str]:
+    """Extract external result links from a Quark result page, in page order and without duplicates."""
+    soup = BeautifulSoup(html, _HTML_PARSER)
+    links = []
+    # 优先使用标准结果链接，再退回到页面上的所有链接
+    for selector in (".result a", "a[href]"):
+        for result in soup.select(selector):
+            href = result.get("href")
+            # 过滤站内跳转链接
+            if href and href.startswith("http") and "quark.cn" not in href:
+                links.append(href)
+    return list(dict.fromkeys(links))
+
+
 class GoogleSearch(BaseTool):
     name: str = "google_search"
     description: str = """Perform a Quark search and return a list of relevant links.
 Use this tool when you need to find information on the web, get up-to-date data, or research specific topics.
-The tool returns a list of URLs that match the search query.
+The tool returns a list of URLs that match the search query. Pass several queries in `queries` to search them in parallel.
 """
     parameters: dict = {
         "type": "object",
         "properties": {
             "query": {
                 "type": "string",
-                "description": "(required) The search query to submit to Quark.",
+                "description": "(required unless `queries` is given) The search query to submit to Quark.",
+            },
+            "queries": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "(optional) Several search queries to run in parallel. Results are returned per query.",
             },
             "num_results": {
                 "type": "integer",
-                "description": "(optional) The number of search results to return. Default is 10.",
+                "description": "(optional) The number of search results to return per query. Default is 10.",
                 "default": 10,
             },
         },
-        "required": ["query"],
+        "required": [],
     }
+    read_only: bool = True
 
-    async def execute(self, query: str, num_results: int = 10) -> List[str]:
+    async def execute(
+        self,
+        query: Optional[str] = None,
+        num_results: int = 10,
+        queries: Optional[List[str]] = None,
+    ) -> Union[List[str], Dict[str, List[str]]]:
         """
         Execute a Quark search and return a list of URLs.
 
         Args:
-            query (str): The search query to submit to Quark.
+            query (str, optional): The search query to submit to Quark.
             num_results (int, optional): The number of search results to return. Default is 10.
+            queries (List[str], optional): Several queries to search concurrently.
 
         Returns:
             List[str]: A list of URLs matching the search query, or a list containing an error message if the search fails.
+            When `queries` is given, a dict mapping each query to such a list.
         """
+        if queries:
+            all_queries = list(dict.fromkeys(([query] if query else []) + queries))
+            results = await asyncio.gather(
+                *(self._search(q, num_results) for q in all_queries)
+            )
+            return dict(zip(all_queries, results))
+
+        if not query:
+            return ["夸克搜索失败：未提供搜索关键词"]
+        return await self._search(query, num_results)
+
+    async def _search(self, query: str, num_results: int) -> List[str]:
         try:
-            # 构造夸克搜索URL
-            search_url = f"https://www.quark.cn/s?q={requests.utils.quote(query)}&uc_param_str=ntnwvepffrbiprsvchutosstxs&by=submit&from=kkframenew"
-            
-            # 设置请求头，模拟浏览器访问
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            
-            # 发送请求
-            response = requests.get(search_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # 解析HTML
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # 提取搜索结果链接
-            links = []
-            # 尝试不同的选择器来提取链接
-            selectors = [
-                ".result a",  # 标准结果链接
-                "a[href]",  # 所有链接
-            ]
-            
-            for selector in selectors:
-                for result in soup.select(selector)[:num_results]:
-                    href = result.get("href")
-                    if href:
-                        # 处理跳转链接
-                        if href.startswith("http") and "quark.cn" not in href:
-                            links.append(href)
-                if len(links) >= num_results:
-                    break
-            
-            # 去重并限制数量
-            links = list(dict.fromkeys(links))[:num_results]
-            
-            return links
+            links = await _cache.get_or_fetch(query, self._fetch)
+            return links[:num_results]
         except Exception as e:
             # 捕获所有异常，返回友好的错误信息
-            error_message = f"夸克搜索失败：{str(e)}"
-            return [error_message]
+            return [f"夸克搜索失败：{str(e)}"]
+
+    @staticmethod
+    async def _fetch(query: str) -> List[str]:
+        client = await _get_client()
+        response = await client.get(SEARCH_URL.format(query=quote(query)))
+        response.raise_for_status()
+        # 解析HTML属于CPU密集操作，放到线程中执行以免阻塞事件循环
+        return await asyncio.to_thread(_parse_links, response.text)
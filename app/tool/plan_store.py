@@ -0,0 +1,560 @@
+"""Storage backends for PlanningTool plans."""
+
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from app.config import PROJECT_ROOT, PlanningSettings, config
+
+
+PLAN_STATUSES = ("not_started", "in_progress", "completed", "blocked")
+# Statuses of steps that still have to be finished
+_OPEN_STATUSES = ("not_started", "in_progress")
+
+
+def count_statuses(step_statuses: List[str]) -> Dict[str, int]:
+    """Number of steps in each status."""
+    counts = dict.fromkeys(PLAN_STATUSES, 0)
+    for status in step_statuses:
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def plan_status(status_counts: Dict[str, int]) -> str:
+    """Overall status of a plan, derived from the number of steps in each status."""
+    total = sum(status_counts.values())
+    if total and status_counts.get("completed", 0) == total:
+        return "completed"
+    if status_counts.get("blocked"):
+        return "blocked"
+    if status_counts.get("not_started", 0) < total:
+        return "in_progress"
+    return "not_started"
+
+
+class StepProgress:
+    """The ready steps and the current step of a plan, kept up to date as steps change.
+
+    For every step it counts the prerequisites that are not completed yet, so a
+    status change only touches the changed step and the steps that depend on it.
+    Without `step_dependencies`, every step depends on the previous one.
+    """
+
+    def __init__(
+        self, step_statuses: List[str], step_dependencies: Optional[List[List[int]]]
+    ):
+        n_steps = len(step_statuses)
+        if step_dependencies is None:
+            step_dependencies = [[i - 1] if i else [] for i in range(n_steps)]
+        self._statuses = list(step_statuses)
+        self._dependents: List[List[int]] = [[] for _ in range(n_steps)]
+        self._waiting = [0] * n_steps
+        for i, dependencies in enumerate(step_dependencies):
+            for dependency in dependencies:
+                self._dependents[dependency].append(i)
+                if step_statuses[dependency] != "completed":
+                    self._waiting[i] += 1
+        self._ready = {i for i in range(n_steps) if self._is_ready(i)}
+        # Open steps by index; entries of steps finished since are skipped lazily
+        self._open = [i for i, status in enumerate(step_statuses) if status in _OPEN_STATUSES]
+
+    @property
+    def ready_steps(self) -> List[int]:
+        """Indices of not-started steps whose prerequisites are all completed."""
+        return sorted(self._ready)
+
+    @property
+    def current_step_index(self) -> Optional[int]:
+        """Index of the first step that is in progress or not started yet."""
+        while self._open and self._statuses[self._open[0]] not in _OPEN_STATUSES:
+            heapq.heappop(self._open)
+        return self._open[0] if self._open else None
+
+    def update(self, step_index: int, status: str) -> None:
+        previous = self._statuses[step_index]
+        if status == previous:
+            return
+        self._statuses[step_index] = status
+        if (previous == "completed") != (status == "completed"):
+            change = -1 if status == "completed" else 1
+            for dependent in self._dependents[step_index]:
+                self._waiting[dependent] += change
+                self._refresh(dependent)
+        self._refresh(step_index)
+        if status in _OPEN_STATUSES and previous not in _OPEN_STATUSES:
+            heapq.heappush(self._open, step_index)
+
+    def _is_ready(self, step_index: int) -> bool:
+        return self._statuses[step_index] == "not_started" and not self._waiting[step_index]
+
+    def _refresh(self, step_index: int) -> None:
+        if self._is_ready(step_index):
+            self._ready.add(step_index)
+        else:
+            self._ready.discard(step_index)
+
+
+class PlanStore(ABC):
+    """A keyed collection of plan dicts.
+
+    Plans are the dicts built by PlanningTool (`plan_id`, `title`, `steps`,
+    `step_statuses`, `step_notes`, `step_dependencies`), to which the store adds
+    `status_counts`. Callers that modify a plan returned by `get` must save it back
+    with `put`, except for step changes, which go through `update_step`.
+    """
+
+    @abstractmethod
+    def get(self, plan_id: str) -> Optional[Dict]:
+        """Return the plan with the given ID, or None if there is none."""
+
+    @abstractmethod
+    def put(self, plan: Dict) -> None:
+        """Insert or replace a plan."""
+
+    @abstractmethod
+    def update_step(
+        self,
+        plan_id: str,
+        step_index: int,
+        status: Optional[str] = None,
+        notes: Optional[str] = None,
+    ) -> None:
+        """Update the status and/or notes of a single step."""
+
+    @abstractmethod
+    def delete(self, plan_id: str) -> bool:
+        """Delete a plan, returning whether it existed."""
+
+    @abstractmethod
+    def list_plans(self, status: Optional[str] = None) -> List[Dict]:
+        """All plans, optionally only those with the given overall status, least recently updated first."""
+
+    def step_count(self, plan_id: str) -> Optional[int]:
+        """Number of steps of a plan, or None if there is no such plan."""
+        plan = self.get(plan_id)
+        return len(plan["steps"]) if plan is not None else None
+
+    def progress(self, plan_id: str) -> Optional[StepProgress]:
+        """Ready and current steps of a plan, or None if there is no such plan."""
+        plan = self.get(plan_id)
+        if plan is None:
+            return None
+        return StepProgress(plan["step_statuses"], plan.get("step_dependencies"))
+
+    def __contains__(self, plan_id: object) -> bool:
+        return isinstance(plan_id, str) and self.get(plan_id) is not None
+
+    def __getitem__(self, plan_id: str) -> Dict:
+        plan = self.get(plan_id)
+        if plan is None:
+            raise KeyError(plan_id)
+        return plan
+
+
+class InMemoryPlanStore(PlanStore):
+    """Plans kept in process memory, bounded by count and idle time.
+
+    When more than `max_plans` plans are stored the least recently used ones are
+    evicted, and plans not touched for `ttl` seconds expire. Plans are indexed by
+    overall status, so listing by status only visits the plans with that status,
+    and the ready steps of every plan are maintained as its steps change.
+    """
+
+    def __init__(self, max_plans: int = 256, ttl: Optional[float] = None):
+        self.max_plans = max_plans
+        self.ttl = ttl
+        self._plans: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._status: Dict[str, str] = {}
+        self._by_status: Dict[str, Set[str]] = {
+            status: set() for status in PLAN_STATUSES
+        }
+        self._progress: Dict[str, StepProgress] = {}
+        self._lock = threading.RLock()
+
+    def get(self, plan_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._plans.get(plan_id)
+            if entry is None:
+                return None
+            touched_at, plan = entry
+            if self._expired(touched_at):
+                self._remove(plan_id)
+                return None
+            self._plans[plan_id] = (time.monotonic(), plan)
+            self._plans.move_to_end(plan_id)
+            return plan
+
+    def put(self, plan: Dict) -> None:
+        with self._lock:
+            plan_id = plan["plan_id"]
+            self._plans[plan_id] = (time.monotonic(), plan)
+            self._plans.move_to_end(plan_id)
+            plan["status_counts"] = count_statuses(plan["step_statuses"])
+            self._progress[plan_id] = StepProgress(
+                plan["step_statuses"], plan.get("step_dependencies")
+            )
+            self._index(plan_id, plan_status(plan["status_counts"]))
+            self._evict()
+
+    def update_step(
+        self,
+        plan_id: str,
+        step_index: int,
+        status: Optional[str] = None,
+        notes: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            plan = self[plan_id]
+            if status:
+                counts = plan["status_counts"]
+                counts[plan["step_statuses"][step_index]] -= 1
+                counts[status] = counts.get(status, 0) + 1
+                plan["step_statuses"][step_index] = status
+                self._progress[plan_id].update(step_index, status)
+                self._index(plan_id, plan_status(counts))
+            if notes:
+                plan["step_notes"][step_index] = notes
+
+    def progress(self, plan_id: str) -> Optional[StepProgress]:
+        with self._lock:
+            if self.get(plan_id) is None:
+                return None
+            return self._progress[plan_id]
+
+    def delete(self, plan_id: str) -> bool:
+        with self._lock:
+            if plan_id not in self._plans:
+                return False
+            self._remove(plan_id)
+            return True
+
+    def list_plans(self, status: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            self._evict()
+            if status is None:
+                return [plan for _, plan in self._plans.values()]
+            entries = sorted(
+                (self._plans[plan_id] for plan_id in self._by_status.get(status, ())),
+                key=lambda entry: entry[0],
+            )
+            return [plan for _, plan in entries]
+
+    def _index(self, plan_id: str, status: str) -> None:
+        previous = self._status.get(plan_id)
+        if previous != status:
+            if previous is not None:
+                self._by_status[previous].discard(plan_id)
+            self._by_status[status].add(plan_id)
+            self._status[plan_id] = status
+
+    def _remove(self, plan_id: str) -> None:
+        del self._plans[plan_id]
+        del self._progress[plan_id]
+        self._by_status[self._status.pop(plan_id)].discard(plan_id)
+
+    def _expired(self, touched_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - touched_at > self.ttl
+
+    def _evict(self) -> None:
+        # Entries are ordered by last use, so expired and excess plans are at the front
+        while self._plans:
+            plan_id, (touched_at, _) = next(iter(self._plans.items()))
+            if len(self._plans) <= self.max_plans and not self._expired(touched_at):
+                break
+            self._remove(plan_id)
+
+
+class SQLitePlanStore(PlanStore):
+    """Plans persisted in a SQLite database, so they survive restarts.
+
+    Steps are stored one row per step and every plan row keeps the number of
+    steps in each status, so marking a step updates that step's row and adjusts
+    the plan's counters instead of reading the plan. Plans are indexed by overall
+    status and update time; plans not updated for `ttl` seconds are purged. The
+    ready steps of plans are cached per process and rebuilt when another
+    connection has updated the plan since.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS plans (
+        plan_id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        status TEXT NOT NULL,
+        step_dependencies TEXT NOT NULL,
+        updated_at REAL NOT NULL,
+        not_started INTEGER NOT NULL DEFAULT 0,
+        in_progress INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0,
+        blocked INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_plans_status ON plans (status, updated_at);
+    CREATE INDEX IF NOT EXISTS idx_plans_updated_at ON plans (updated_at);
+    CREATE TABLE IF NOT EXISTS plan_steps (
+        plan_id TEXT NOT NULL REFERENCES plans (plan_id) ON DELETE CASCADE,
+        step_index INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        status TEXT NOT NULL,
+        notes TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (plan_id, step_index)
+    );
+    """
+
+    def __init__(self, path: Path, ttl: Optional[float] = None):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(self._SCHEMA)
+        self._add_status_counters()
+        self._lock = threading.RLock()
+        # Ready steps per plan, with the plan's updated_at they were computed for
+        self._progress: Dict[str, Tuple[float, StepProgress]] = {}
+
+    def _add_status_counters(self) -> None:
+        """Add the status counter columns to a database created without them."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(plans)")}
+        missing = [status for status in PLAN_STATUSES if status not in columns]
+        if not missing:
+            return
+        with self._transaction():
+            for status in missing:
+                self._conn.execute(
+                    f"ALTER TABLE plans ADD COLUMN {status} INTEGER NOT NULL DEFAULT 0"
+                )
+                self._conn.execute(
+                    f"UPDATE plans SET {status} = (SELECT COUNT(*) FROM plan_steps "
+                    f"WHERE plan_steps.plan_id = plans.plan_id AND plan_steps.status = ?)",
+                    (status,),
+                )
+
+    def get(self, plan_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, step_dependencies FROM plans WHERE plan_id = ?",
+                (plan_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            steps = self._conn.execute(
+                "SELECT text, status, notes FROM plan_steps WHERE plan_id = ? ORDER BY step_index",
+                (plan_id,),
+            ).fetchall()
+        return self._to_plan(plan_id, row[0], row[1], steps)
+
+    def put(self, plan: Dict) -> None:
+        plan_id = plan["plan_id"]
+        counts = count_statuses(plan["step_statuses"])
+        with self._lock, self._transaction():
+            self._progress.pop(plan_id, None)
+            self._conn.execute(
+                "INSERT INTO plans (plan_id, title, status, step_dependencies, updated_at, "
+                "not_started, in_progress, completed, blocked) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (plan_id) DO UPDATE SET title = excluded.title, status = excluded.status, "
+                "step_dependencies = excluded.step_dependencies, updated_at = excluded.updated_at, "
+                "not_started = excluded.not_started, in_progress = excluded.in_progress, "
+                "completed = excluded.completed, blocked = excluded.blocked",
+                (
+                    plan_id,
+                    plan["title"],
+                    plan_status(counts),
+                    json.dumps(plan.get("step_dependencies")),
+                    time.time(),
+                    *(counts.get(status, 0) for status in PLAN_STATUSES),
+                ),
+            )
+            self._conn.execute("DELETE FROM plan_steps WHERE plan_id = ?", (plan_id,))
+            self._conn.executemany(
+                "INSERT INTO plan_steps (plan_id, step_index, text, status, notes) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (plan_id, i, text, status, notes)
+                    for i, (text, status, notes) in enumerate(
+                        zip(plan["steps"], plan["step_statuses"], plan["step_notes"])
+                    )
+                ],
+            )
+            self._purge_expired()
+
+    def update_step(
+        self,
+        plan_id: str,
+        step_index: int,
+        status: Optional[str] = None,
+        notes: Optional[str] = None,
+    ) -> None:
+        if status and status not in PLAN_STATUSES:
+            raise ValueError(f"Invalid step status: {status}")
+        with self._lock, self._transaction():
+            row = self._conn.execute(
+                "SELECT plan_steps.status, plans.updated_at FROM plan_steps "
+                "JOIN plans ON plans.plan_id = plan_steps.plan_id "
+                "WHERE plan_steps.plan_id = ? AND plan_steps.step_index = ?",
+                (plan_id, step_index),
+            ).fetchone()
+            if row is None:
+                raise KeyError(plan_id)
+            previous, previous_updated_at = row
+            updated_at = time.time()
+
+            if notes:
+                self._conn.execute(
+                    "UPDATE plan_steps SET notes = ? WHERE plan_id = ? AND step_index = ?",
+                    (notes, plan_id, step_index),
+                )
+            if not status or status == previous:
+                self._conn.execute(
+                    "UPDATE plans SET updated_at = ? WHERE plan_id = ?",
+                    (updated_at, plan_id),
+                )
+                self._touch_progress(plan_id, previous_updated_at, updated_at)
+                return
+
+            self._conn.execute(
+                "UPDATE plan_steps SET status = ? WHERE plan_id = ? AND step_index = ?",
+                (status, plan_id, step_index),
+            )
+            # Adjust the counters and derive the overall status from the adjusted
+            # values (as plan_status does) in one statement; the column names are
+            # PLAN_STATUSES, so nothing from outside ends up in the SQL
+            counter = {
+                name: f"({name} + {(name == status) - (name == previous)})"
+                for name in PLAN_STATUSES
+            }
+            total = " + ".join(counter.values())
+            self._conn.execute(
+                f"UPDATE plans SET "
+                f"{', '.join(f'{name} = {value}' for name, value in counter.items())}, "
+                f"status = CASE "
+                f"WHEN {total} > 0 AND {counter['completed']} = {total} THEN 'completed' "
+                f"WHEN {counter['blocked']} > 0 THEN 'blocked' "
+                f"WHEN {counter['not_started']} < {total} THEN 'in_progress' "
+                f"ELSE 'not_started' END, "
+                f"updated_at = ? WHERE plan_id = ?",
+                (updated_at, plan_id),
+            )
+            progress = self._touch_progress(plan_id, previous_updated_at, updated_at)
+            if progress is not None:
+                progress.update(step_index, status)
+
+    def step_count(self, plan_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {' + '.join(PLAN_STATUSES)} FROM plans WHERE plan_id = ?",
+                (plan_id,),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def progress(self, plan_id: str) -> Optional[StepProgress]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM plans WHERE plan_id = ?", (plan_id,)
+            ).fetchone()
+            if row is None:
+                self._progress.pop(plan_id, None)
+                return None
+            cached = self._progress.get(plan_id)
+            if cached is not None and cached[0] == row[0]:
+                return cached[1]
+            progress = super().progress(plan_id)
+            if progress is not None:
+                self._progress[plan_id] = (row[0], progress)
+            return progress
+
+    def _touch_progress(
+        self, plan_id: str, previous_updated_at: float, updated_at: float
+    ) -> Optional[StepProgress]:
+        """The cached progress of a plan, moved to `updated_at`, if it was current before this update."""
+        cached = self._progress.pop(plan_id, None)
+        if cached is None or cached[0] != previous_updated_at:
+            return None
+        self._progress[plan_id] = (updated_at, cached[1])
+        return cached[1]
+
+    def delete(self, plan_id: str) -> bool:
+        with self._lock:
+            self._progress.pop(plan_id, None)
+            deleted = self._conn.execute(
+                "DELETE FROM plans WHERE plan_id = ?", (plan_id,)
+            )
+            return deleted.rowcount > 0
+
+    def list_plans(self, status: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            if status is None:
+                rows = self._conn.execute(
+                    "SELECT plan_id FROM plans ORDER BY updated_at"
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT plan_id FROM plans WHERE status = ? ORDER BY updated_at",
+                    (status,),
+                ).fetchall()
+            plans = (self.get(row[0]) for row in rows)
+            return [plan for plan in plans if plan is not None]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _purge_expired(self) -> None:
+        if self.ttl is not None:
+            self._conn.execute(
+                "DELETE FROM plans WHERE updated_at < ?", (time.time() - self.ttl,)
+            )
+
+    @staticmethod
+    def _to_plan(
+        plan_id: str, title: str, dependencies: str, steps: List[Tuple[str, str, str]]
+    ) -> Dict:
+        step_statuses = [step[1] for step in steps]
+        return {
+            "plan_id": plan_id,
+            "title": title,
+            "steps": [step[0] for step in steps],
+            "step_statuses": step_statuses,
+            "step_notes": [step[2] for step in steps],
+            "step_dependencies": json.loads(dependencies),
+            "status_counts": count_statuses(step_statuses),
+        }
+
+
+def create_plan_store(settings: Optional[PlanningSettings] = None) -> PlanStore:
+    """Build the plan store described by the `[planning]` configuration."""
+    settings = settings or config.planning
+    if settings.store == "sqlite":
+        path = Path(settings.db_path)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        return SQLitePlanStore(path, ttl=settings.ttl)
+    return InMemoryPlanStore(max_plans=settings.max_plans, ttl=settings.ttl)
+
+
+_store: Optional[PlanStore] = None
+
+
+def get_plan_store() -> PlanStore:
+    """Return the process-wide plan store shared by PlanningTool instances."""
+    global _store
+    if _store is None:
+        _store = create_plan_store()
+    return _store
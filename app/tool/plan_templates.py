@@ -0,0 +1,275 @@
+"""Library of plans that completed before, matched to new requests by TF-IDF similarity."""
+
+import atexit
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.config import PROJECT_ROOT, PlanningSettings, config
+from app.logger import logger
+
+
+# Latin words and digits are tokens; runs of CJK characters are split into bigrams
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+|[\u3400-\u9fff]+")
+# The specifics of a request that its plan's steps refer to: URLs, quoted text,
+# file paths and names, and identifiers containing digits (file IDs, case IDs, ...)
+_ENTITY_PATTERN = re.compile(
+    r"""https?://[^\s'"<>]+"""
+    r"""|"[^"\n]+"|'[^'\n]+'|“[^”\n]+”|「[^」\n]+」"""
+    r"|(?:[A-Za-z]:)?[\w.\-]*[/\\][\w./\\\-]+"
+    r"|[\w\-]+\.[A-Za-z][A-Za-z0-9]{0,4}(?![\w.])"
+    r"|(?<![\w\-])(?=[\w\-]*\d)(?=[\w\-]*[A-Za-z])[\w\-]{4,}"
+    r"|(?<!\d)\d{4,}(?!\d)"
+)
+
+
+def _entities(text: str) -> List[str]:
+    """The specifics mentioned in `text`, in order of appearance."""
+    return [match.group(0) for match in _ENTITY_PATTERN.finditer(text)]
+
+
+def _tokenize(text: str) -> List[str]:
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        if word[0] >= "\u3400":
+            tokens.extend(word[i : i + 2] for i in range(max(1, len(word) - 1)))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class PlanTemplate(BaseModel):
+    """A plan recorded for a request, reusable for similar requests."""
+
+    request: str
+    title: str
+    steps: List[str]
+    step_dependencies: Optional[List[List[int]]] = None
+    uses: int = 0
+
+    def instantiate(self, request: str) -> Optional["PlanTemplate"]:
+        """This template with its request's specifics replaced by those of `request`.
+
+        The specifics (paths, URLs, IDs, quoted text) of the two requests are
+        paired up in order of appearance. Returns None if they cannot be paired,
+        or if a specific that changed does not appear literally in the title or
+        steps, as the plan could then still refer to the old file or record.
+        """
+        old, new = _entities(self.request), _entities(request)
+        if len(old) != len(new):
+            return None
+        replacements: Dict[str, str] = {}
+        for a, b in zip(old, new):
+            if replacements.setdefault(a, b) != b:
+                return None
+        replacements = {a: b for a, b in replacements.items() if a != b}
+        if not replacements:
+            return self.model_copy(deep=True)
+
+        plan_text = "\n".join([self.title, *self.steps])
+        if any(a not in plan_text for a in replacements):
+            return None
+        pattern = re.compile(
+            "|".join(re.escape(a) for a in sorted(replacements, key=len, reverse=True))
+        )
+
+        def substitute(text: str) -> str:
+            return pattern.sub(lambda match: replacements[match.group(0)], text)
+
+        return self.model_copy(
+            update={
+                "request": request,
+                "title": substitute(self.title),
+                "steps": [substitute(step) for step in self.steps],
+            },
+            deep=True,
+        )
+
+
+class PlanTemplateLibrary:
+    """Plan templates indexed for TF-IDF cosine similarity against incoming requests.
+
+    `match` returns the most similar template, instantiated for the new
+    request, if its similarity reaches `threshold`; `add` records a new template,
+    replacing one for a near-identical request. When `path` is given, templates
+    are loaded from and saved to that JSON file on `add` and `flush`; use counts
+    of matched templates are only kept in memory until then. At most
+    `max_templates` templates are kept, dropping the least used.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        threshold: float = 0.85,
+        max_templates: int = 500,
+    ):
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.max_templates = max_templates
+        self._templates: List[PlanTemplate] = []
+        self._term_counts: List[Counter] = []
+        self._document_frequency: Counter = Counter()
+        # Whether use counts changed since the library was last saved
+        self._dirty = False
+        if self.path and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def match(self, request: str) -> Optional[PlanTemplate]:
+        """Return the template most similar to `request` instantiated for it, if it is similar enough."""
+        index, similarity = self._best_match(request)
+        if index is None or similarity < self.threshold:
+            return None
+        template = self._templates[index]
+        instance = template.instantiate(request)
+        if instance is None:
+            logger.info(
+                f"Not reusing plan template '{template.title}' (similarity {similarity:.2f}): "
+                f"the requests mention different specifics"
+            )
+            return None
+        template.uses += 1
+        instance.uses = template.uses
+        self._dirty = True
+        logger.info(
+            f"Reusing plan template '{template.title}' (similarity {similarity:.2f})"
+        )
+        return instance
+
+    def flush(self) -> None:
+        """Save use counts changed by `match` since the library was last saved."""
+        if self._dirty:
+            self._save()
+
+    def add(
+        self,
+        request: str,
+        title: str,
+        steps: List[str],
+        step_dependencies: Optional[List[List[int]]] = None,
+    ) -> None:
+        """Record the plan used for `request`."""
+        template = PlanTemplate(
+            request=request,
+            title=title,
+            steps=steps,
+            step_dependencies=step_dependencies,
+        )
+        index, similarity = self._best_match(request)
+        if index is not None and similarity >= self.threshold:
+            template.uses = self._templates[index].uses
+            self._remove(index)
+        self._append(template)
+
+        if len(self._templates) > self.max_templates:
+            self._remove(
+                min(range(len(self._templates)), key=lambda i: self._templates[i].uses)
+            )
+        self._save()
+
+    def _best_match(self, request: str) -> Tuple[Optional[int], float]:
+        query = Counter(_tokenize(request))
+        if not query or not self._templates:
+            return None, 0.0
+
+        n_documents = len(self._templates) + 1
+        idf: Dict[str, float] = {}
+
+        def weights(counts: Counter) -> Dict[str, float]:
+            vector = {}
+            for term, count in counts.items():
+                if term not in idf:
+                    # Smoothed IDF, counting the query as one of the documents
+                    df = self._document_frequency.get(term, 0) + (term in query)
+                    idf[term] = math.log((1 + n_documents) / (1 + df)) + 1
+                vector[term] = count * idf[term]
+            return vector
+
+        query_vector = weights(query)
+        query_norm = math.sqrt(sum(w * w for w in query_vector.values()))
+
+        best_index, best_similarity = None, 0.0
+        for i, counts in enumerate(self._term_counts):
+            if not any(term in counts for term in query):
+                continue
+            vector = weights(counts)
+            norm = math.sqrt(sum(w * w for w in vector.values()))
+            dot = sum(w * vector.get(term, 0.0) for term, w in query_vector.items())
+            similarity = dot / (query_norm * norm) if norm else 0.0
+            if similarity > best_similarity:
+                best_index, best_similarity = i, similarity
+        return best_index, best_similarity
+
+    def _append(self, template: PlanTemplate) -> None:
+        counts = Counter(_tokenize(template.request))
+        self._templates.append(template)
+        self._term_counts.append(counts)
+        self._document_frequency.update(counts.keys())
+
+    def _remove(self, index: int) -> None:
+        del self._templates[index]
+        for term in self._term_counts.pop(index):
+            self._document_frequency[term] -= 1
+            if not self._document_frequency[term]:
+                del self._document_frequency[term]
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            for item in data:
+                self._append(PlanTemplate(**item))
+        except Exception as e:
+            logger.warning(f"Failed to load plan templates from {self.path}: {e}")
+
+    def _save(self) -> None:
+        self._dirty = False
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp_path.write_text(
+                json.dumps(
+                    [template.model_dump() for template in self._templates],
+                    ensure_ascii=False,
+                ),
+                encoding="utf-8",
+            )
+            tmp_path.replace(self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save plan templates to {self.path}: {e}")
+
+
+def create_plan_template_library(
+    settings: Optional[PlanningSettings] = None,
+) -> Optional[PlanTemplateLibrary]:
+    """Build the template library described by the `[planning]` configuration, or None if disabled."""
+    settings = settings or config.planning
+    if not settings.use_templates:
+        return None
+    path = Path(settings.template_path)
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    library = PlanTemplateLibrary(path, threshold=settings.template_threshold)
+    atexit.register(library.flush)
+    return library
+
+
+_library: Optional[PlanTemplateLibrary] = None
+_library_created = False
+
+
+def get_plan_template_library() -> Optional[PlanTemplateLibrary]:
+    """Return the process-wide plan template library, or None if templates are disabled."""
+    global _library, _library_created
+    if not _library_created:
+        _library = create_plan_template_library()
+        _library_created = True
+    return _library
@@ -1,8 +1,17 @@
 # tool/planning.py
 from typing import Dict, List, Literal, Optional
 
+from pydantic import BaseModel, Field
+
 from app.exceptions import ToolError
 from app.tool.base import BaseTool, ToolResult
+from app.tool.plan_store import (
+    PLAN_STATUSES,
+    PlanStore,
+    count_statuses,
+    get_plan_store,
+    plan_status,
+)
 
 
 _PLANNING_TOOL_DESCRIPTION = """
@@ -11,6 +20,31 @@ The tool provides functionality for creating plans, updating plan steps, and tra
 """
 
 
+class PlanState(BaseModel):
+    """A typed view of a stored plan, for reading its progress without rendering it as text.
+
+    The ready steps and the current step come from the plan store, which keeps
+    them up to date as step statuses change.
+    """
+
+    plan_id: str
+    title: str
+    steps: List[str]
+    step_statuses: List[str]
+    step_notes: List[str]
+    step_dependencies: List[List[int]]
+    status_counts: Dict[str, int]
+    # Index of the first step that is in progress or not started yet
+    current_step_index: Optional[int] = None
+    # Indices of not-started steps whose prerequisites are all completed
+    ready_steps: List[int] = Field(default_factory=list)
+
+    @property
+    def status(self) -> str:
+        """Overall status: not_started, in_progress, completed or blocked."""
+        return plan_status(self.status_counts)
+
+
 class PlanningTool(BaseTool):
     """
     A planning tool that allows the agent to create and manage plans for solving complex tasks.
@@ -48,6 +82,11 @@ class PlanningTool(BaseTool):
                 "type": "array",
                 "items": {"type": "string"},
             },
+            "step_dependencies": {
+                "description": "Optional for create and update commands. For each step, the list of 0-based indices of the steps that must be completed before it can start. Steps without prerequisites can run in parallel. If omitted, every step depends on the previous one.",
+                "type": "array",
+                "items": {"type": "array", "items": {"type": "integer"}},
+            },
             "step_index": {
                 "description": "Index of the step to update (0-based). Required for mark_step command.",
                 "type": "integer",
@@ -61,12 +100,18 @@ class PlanningTool(BaseTool):
                 "description": "Additional notes for a step. Optional for mark_step command.",
                 "type": "string",
             },
+            "plan_status": {
+                "description": "Only list plans with this overall status. Optional for list command.",
+                "enum": ["not_started", "in_progress", "completed", "blocked"],
+                "type": "string",
+            },
         },
         "required": ["command"],
         "additionalProperties": False,
     }
 
-    plans: dict = {}  # Dictionary to store plans by plan_id
+    # Plans by plan_id; the default store is shared by all instances in the process
+    plans: PlanStore = Field(default_factory=get_plan_store)
     _current_plan_id: Optional[str] = None  # Track the current active plan
 
     async def execute(
@@ -78,11 +123,15 @@ class PlanningTool(BaseTool):
         plan_id: Optional[str] = None,
         title: Optional[str] = None,
         steps: Optional[List[str]] = None,
+        step_dependencies: Optional[List[List[int]]] = None,
         step_index: Optional[int] = None,
         step_status: Optional[
             Literal["not_started", "in_progress", "completed", "blocked"]
         ] = None,
         step_notes: Optional[str] = None,
+        plan_status: Optional[
+            Literal["not_started", "in_progress", "completed", "blocked"]
+        ] = None,
         **kwargs,
     ):
         """
@@ -93,17 +142,19 @@ class PlanningTool(BaseTool):
         - plan_id: Unique identifier for the plan
         - title: Title for the plan (used with create command)
         - steps: List of steps for the plan (used with create command)
+        - step_dependencies: Prerequisite step indices of each step (used with create and update commands)
         - step_index: Index of the step to update (used with mark_step command)
         - step_status: Status to set for a step (used with mark_step command)
         - step_notes: Additional notes for a step (used with mark_step command)
+        - plan_status: Overall status of the plans to list (used with list command)
         """
 
         if command == "create":
-            return self._create_plan(plan_id, title, steps)
+            return self._create_plan(plan_id, title, steps, step_dependencies)
         elif command == "update":
-            return self._update_plan(plan_id, title, steps)
+            return self._update_plan(plan_id, title, steps, step_dependencies)
         elif command == "list":
-            return self._list_plans()
+            return self._list_plans(plan_status)
         elif command == "get":
             return self._get_plan(plan_id)
         elif command == "set_active":
@@ -118,7 +169,11 @@ class PlanningTool(BaseTool):
             )
 
     def _create_plan(
-        self, plan_id: Optional[str], title: Optional[str], steps: Optional[List[str]]
+        self,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]] = None,
     ) -> ToolResult:
         """Create a new plan with the given ID, title, and steps."""
         if not plan_id:
@@ -148,9 +203,12 @@ class PlanningTool(BaseTool):
             "steps": steps,
             "step_statuses": ["not_started"] * len(steps),
             "step_notes": [""] * len(steps),
+            "step_dependencies": self._validate_dependencies(
+                step_dependencies, len(steps)
+            ),
         }
 
-        self.plans[plan_id] = plan
+        self.plans.put(plan)
         self._current_plan_id = plan_id  # Set as active plan
 
         return ToolResult(
@@ -158,17 +216,20 @@ class PlanningTool(BaseTool):
         )
 
     def _update_plan(
-        self, plan_id: Optional[str], title: Optional[str], steps: Optional[List[str]]
+        self,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]] = None,
     ) -> ToolResult:
         """Update an existing plan with new title or steps."""
         if not plan_id:
             raise ToolError("Parameter `plan_id` is required for command: update")
 
-        if plan_id not in self.plans:
+        plan = self.plans.get(plan_id)
+        if plan is None:
             raise ToolError(f"No plan found with ID: {plan_id}")
 
-        plan = self.plans[plan_id]
-
         if title:
             plan["title"] = title
 
@@ -198,23 +259,39 @@ class PlanningTool(BaseTool):
                     new_statuses.append("not_started")
                     new_notes.append("")
 
+            # Keep the old dependencies if the steps were only reworded
+            if step_dependencies is None and len(steps) == len(old_steps):
+                step_dependencies = plan.get("step_dependencies")
+
             plan["steps"] = steps
             plan["step_statuses"] = new_statuses
             plan["step_notes"] = new_notes
+            plan["step_dependencies"] = self._validate_dependencies(
+                step_dependencies, len(steps)
+            )
+        elif step_dependencies is not None:
+            plan["step_dependencies"] = self._validate_dependencies(
+                step_dependencies, len(plan["steps"])
+            )
 
+        self.plans.put(plan)
         return ToolResult(
             output=f"Plan updated successfully: {plan_id}\n\n{self._format_plan(plan)}"
         )
 
-    def _list_plans(self) -> ToolResult:
-        """List all available plans."""
-        if not self.plans:
+    def _list_plans(self, plan_status: Optional[str] = None) -> ToolResult:
+        """List all available plans, optionally only those with the given status."""
+        plans = self.plans.list_plans(plan_status)
+        if not plans:
+            if plan_status:
+                return ToolResult(output=f"No plans with status: {plan_status}")
             return ToolResult(
                 output="No plans available. Create a plan with the 'create' command."
             )
 
         output = "Available plans:\n"
-        for plan_id, plan in self.plans.items():
+        for plan in plans:
+            plan_id = plan["plan_id"]
             current_marker = " (active)" if plan_id == self._current_plan_id else ""
             completed = sum(
                 1 for status in plan["step_statuses"] if status == "completed"
@@ -235,10 +312,10 @@ class PlanningTool(BaseTool):
                 )
             plan_id = self._current_plan_id
 
-        if plan_id not in self.plans:
+        plan = self.plans.get(plan_id)
+        if plan is None:
             raise ToolError(f"No plan found with ID: {plan_id}")
 
-        plan = self.plans[plan_id]
         return ToolResult(output=self._format_plan(plan))
 
     def _set_active_plan(self, plan_id: Optional[str]) -> ToolResult:
@@ -246,12 +323,13 @@ class PlanningTool(BaseTool):
         if not plan_id:
             raise ToolError("Parameter `plan_id` is required for command: set_active")
 
-        if plan_id not in self.plans:
+        plan = self.plans.get(plan_id)
+        if plan is None:
             raise ToolError(f"No plan found with ID: {plan_id}")
 
         self._current_plan_id = plan_id
         return ToolResult(
-            output=f"Plan '{plan_id}' is now the active plan.\n\n{self._format_plan(self.plans[plan_id])}"
+            output=f"Plan '{plan_id}' is now the active plan.\n\n{self._format_plan(plan)}"
         )
 
     def _mark_step(
@@ -270,70 +348,132 @@ class PlanningTool(BaseTool):
                 )
             plan_id = self._current_plan_id
 
-        if plan_id not in self.plans:
+        self.set_step_status(plan_id, step_index, step_status, step_notes)
+
+        return ToolResult(
+            output=f"Step {step_index} updated in plan '{plan_id}'.\n\n{self._format_plan(self.plans[plan_id])}"
+        )
+
+    def set_step_status(
+        self,
+        plan_id: str,
+        step_index: Optional[int],
+        step_status: Optional[str] = None,
+        step_notes: Optional[str] = None,
+    ) -> None:
+        """Update the status and/or notes of a step without rendering the plan."""
+        step_count = self.plans.step_count(plan_id)
+        if step_count is None:
             raise ToolError(f"No plan found with ID: {plan_id}")
 
         if step_index is None:
             raise ToolError("Parameter `step_index` is required for command: mark_step")
 
-        plan = self.plans[plan_id]
-
-        if step_index < 0 or step_index >= len(plan["steps"]):
+        if step_index < 0 or step_index >= step_count:
             raise ToolError(
-                f"Invalid step_index: {step_index}. Valid indices range from 0 to {len(plan['steps'])-1}."
+                f"Invalid step_index: {step_index}. Valid indices range from 0 to {step_count-1}."
             )
 
-        if step_status and step_status not in [
-            "not_started",
-            "in_progress",
-            "completed",
-            "blocked",
-        ]:
+        if step_status and step_status not in PLAN_STATUSES:
             raise ToolError(
                 f"Invalid step_status: {step_status}. Valid statuses are: not_started, in_progress, completed, blocked"
             )
 
-        if step_status:
-            plan["step_statuses"][step_index] = step_status
-
-        if step_notes:
-            plan["step_notes"][step_index] = step_notes
-
-        return ToolResult(
-            output=f"Step {step_index} updated in plan '{plan_id}'.\n\n{self._format_plan(plan)}"
-        )
+        self.plans.update_step(plan_id, step_index, step_status, step_notes)
 
     def _delete_plan(self, plan_id: Optional[str]) -> ToolResult:
         """Delete a plan."""
         if not plan_id:
             raise ToolError("Parameter `plan_id` is required for command: delete")
 
-        if plan_id not in self.plans:
+        if not self.plans.delete(plan_id):
             raise ToolError(f"No plan found with ID: {plan_id}")
 
-        del self.plans[plan_id]
-
         # If the deleted plan was the active plan, clear the active plan
         if self._current_plan_id == plan_id:
             self._current_plan_id = None
 
         return ToolResult(output=f"Plan '{plan_id}' has been deleted.")
 
+    @staticmethod
+    def _validate_dependencies(
+        step_dependencies: Optional[List[List[int]]], n_steps: int
+    ) -> List[List[int]]:
+        """Validate per-step prerequisites, defaulting to a sequential chain of steps."""
+        if step_dependencies is None:
+            return [[i - 1] if i else [] for i in range(n_steps)]
+
+        if not isinstance(step_dependencies, list) or len(step_dependencies) != n_steps:
+            raise ToolError(
+                f"Parameter `step_dependencies` must contain one list of step indices per step ({n_steps} steps)."
+            )
+        dependencies = []
+        for i, deps in enumerate(step_dependencies):
+            if not isinstance(deps, list) or not all(
+                isinstance(dep, int) and 0 <= dep < n_steps and dep != i
+                for dep in deps
+            ):
+                raise ToolError(
+                    f"Invalid dependencies for step {i}: {deps}. Each must be a list of other step indices from 0 to {n_steps - 1}."
+                )
+            dependencies.append(sorted(set(deps)))
+
+        # Reject cycles: repeatedly peel off steps whose prerequisites are all resolved
+        resolved = set()
+        while len(resolved) < n_steps:
+            ready = {
+                i
+                for i in range(n_steps)
+                if i not in resolved and all(d in resolved for d in dependencies[i])
+            }
+            if not ready:
+                raise ToolError(
+                    "Parameter `step_dependencies` contains a cycle between steps: "
+                    f"{sorted(set(range(n_steps)) - resolved)}"
+                )
+            resolved |= ready
+        return dependencies
+
+    def get_plan_state(self, plan_id: Optional[str] = None) -> Optional[PlanState]:
+        """The typed state of a plan (the active plan by default), or None if it does not exist."""
+        plan_id = plan_id or self._current_plan_id or ""
+        plan = self.plans.get(plan_id)
+        progress = self.plans.progress(plan_id)
+        if plan is None or progress is None:
+            return None
+        return PlanState(
+            plan_id=plan["plan_id"],
+            title=plan["title"],
+            steps=plan["steps"],
+            step_statuses=plan["step_statuses"],
+            step_notes=plan["step_notes"],
+            step_dependencies=plan.get("step_dependencies")
+            or self._validate_dependencies(None, len(plan["steps"])),
+            status_counts=plan.get("status_counts")
+            or count_statuses(plan["step_statuses"]),
+            current_step_index=progress.current_step_index,
+            ready_steps=progress.ready_steps,
+        )
+
+    def get_ready_steps(self, plan_id: str) -> List[int]:
+        """Indices of not-started steps whose prerequisites are all completed."""
+        state = self.get_plan_state(plan_id)
+        if state is None:
+            raise ToolError(f"No plan found with ID: {plan_id}")
+        return state.ready_steps
+
     def _format_plan(self, plan: Dict) -> str:
         """Format a plan for display."""
         output = f"Plan: {plan['title']} (ID: {plan['plan_id']})\n"
         output += "=" * len(output) + "\n\n"
 
-        # Calculate progress statistics
+        # Progress statistics are kept up to date by the plan store
         total_steps = len(plan["steps"])
-        completed = sum(1 for status in plan["step_statuses"] if status == "completed")
-        in_progress = sum(
-            1 for status in plan["step_statuses"] if status == "in_progress"
-        )
-        blocked = sum(1 for status in plan["step_statuses"] if status == "blocked")
-        not_started = sum(
-            1 for status in plan["step_statuses"] if status == "not_started"
-        )
+        counts = plan.get("status_counts") or count_statuses(plan["step_statuses"])
+        completed = counts.get("completed", 0)
+        in_progress = counts.get("in_progress", 0)
+        blocked = counts.get("blocked", 0)
+        not_started = counts.get("not_started", 0)
 
         output += f"Progress: {completed}/{total_steps} steps completed "
         if total_steps > 0:
@@ -345,6 +485,12 @@ class PlanningTool(BaseTool):
         output += f"Status: {completed} completed, {in_progress} in progress, {blocked} blocked, {not_started} not started\n\n"
         output += "Steps:\n"
 
+        # Only spell out dependencies when the plan is not a plain sequence
+        dependencies = plan.get("step_dependencies")
+        show_dependencies = dependencies is not None and dependencies != (
+            self._validate_dependencies(None, total_steps)
+        )
+
         # Add each step with its status and notes
         for i, (step, status, notes) in enumerate(
             zip(plan["steps"], plan["step_statuses"], plan["step_notes"])
@@ -356,7 +502,10 @@ class PlanningTool(BaseTool):
                 "blocked": "[!]",
             }.get(status, "[ ]")
 
-            output += f"{i}. {status_symbol} {step}\n"
+            output += f"{i}. {status_symbol} {step}"
+            if show_dependencies and dependencies[i]:
+                output += f" (after steps {', '.join(map(str, dependencies[i]))})"
+            output += "\n"
             if notes:
                 output += f"   Notes: {notes}\n"
 
@@ -1,11 +1,16 @@
-from collections import defaultdict
+import fnmatch
+import os
+from array import array
+from collections import OrderedDict
 from pathlib import Path
-from typing import Literal, get_args
+from typing import Iterator, Literal, Optional, get_args
+
+from pydantic import Field, PrivateAttr
 
 from app.exceptions import ToolError
 from app.tool import BaseTool
 from app.tool.base import CLIResult, ToolResult
-from app.tool.run import run
+from app.tool.edit_history import MAX_HISTORY_BYTES, EditHistory
 
 
 Command = Literal[
@@ -19,6 +24,16 @@ SNIPPET_LINES: int = 4
 
 MAX_RESPONSE_LEN: int = 16000
 
+# Directory listing defaults for the `view` command
+MAX_VIEW_DEPTH: int = 2
+IGNORE_PATTERNS: tuple[str, ...] = (".*",)
+
+# Line index: remember the byte offset of every LINE_INDEX_STRIDE-th line, and
+# keep indexes for at most LINE_INDEX_CACHE_SIZE files
+LINE_INDEX_STRIDE: int = 256
+LINE_INDEX_CACHE_SIZE: int = 32
+_READ_CHUNK_SIZE: int = 1 << 20
+
 TRUNCATED_MESSAGE: str = "<response clipped><NOTE>To save on context only part of this file has been shown to you. You should retry this tool after you have searched inside the file with `grep -n` in order to find the line numbers of what you are looking for.</NOTE>"
 
 _STR_REPLACE_EDITOR_DESCRIPTION = """Custom editing tool for viewing, creating and editing files
@@ -44,6 +59,90 @@ def maybe_truncate(content: str, truncate_after: int | None = MAX_RESPONSE_LEN):
     )
 
 
+def walk_directory(
+    root: Path,
+    max_depth: int = MAX_VIEW_DEPTH,
+    ignore_patterns: tuple[str, ...] = IGNORE_PATTERNS,
+) -> Iterator[Path]:
+    """Yield `root` and the entries below it up to `max_depth` levels deep, skipping ignored names."""
+    yield root
+    if max_depth < 1:
+        return
+    try:
+        entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        if any(fnmatch.fnmatch(entry.name, pattern) for pattern in ignore_patterns):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk_directory(
+                Path(entry.path), max_depth - 1, ignore_patterns
+            )
+        else:
+            yield Path(entry.path)
+
+
+class _LineIndex:
+    """Sparse byte-offset index of the lines of a file.
+
+    Stores the offset of every `stride`-th line so that a range of lines can be read
+    by seeking close to it instead of reading the whole file.
+    """
+
+    def __init__(self, path: Path, stride: int = LINE_INDEX_STRIDE):
+        stat = path.stat()
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.stride = stride
+        self.checkpoints = array("Q", [0])
+        n_newlines = 0
+        offset = 0
+        with path.open("rb") as f:
+            while chunk := f.read(_READ_CHUNK_SIZE):
+                pos = chunk.find(b"\n")
+                while pos != -1:
+                    n_newlines += 1
+                    if n_newlines % stride == 0:
+                        self.checkpoints.append(offset + pos + 1)
+                    pos = chunk.find(b"\n", pos + 1)
+                offset += len(chunk)
+        # Lines are counted like `str.split("\n")`: a trailing newline opens an empty line
+        self.n_lines = n_newlines + 1
+
+    def is_current(self, path: Path) -> bool:
+        stat = path.stat()
+        return self.signature == (stat.st_mtime_ns, stat.st_size)
+
+    def read_lines(self, path: Path, init_line: int, final_line: int) -> str:
+        """Return lines `init_line`..`final_line` (1-based, inclusive) joined by newlines."""
+        checkpoint = (init_line - 1) // self.stride
+        with path.open("rb") as f:
+            f.seek(self.checkpoints[checkpoint])
+            for _ in range((init_line - 1) % self.stride):
+                f.readline()
+            lines = [f.readline() for _ in range(final_line - init_line + 1)]
+        content = b"".join(lines).decode().replace("\r\n", "\n")
+        # Every line but the last one of the file carries its newline terminator
+        if final_line < self.n_lines:
+            content = content[:-1]
+        return content
+
+
+_line_indexes: "OrderedDict[Path, _LineIndex]" = OrderedDict()
+
+
+def get_line_index(path: Path) -> _LineIndex:
+    """Return the line index of `path`, rebuilding it if the file changed since it was cached."""
+    index = _line_indexes.get(path)
+    if index is None or not index.is_current(path):
+        index = _LineIndex(path)
+        _line_indexes[path] = index
+    _line_indexes.move_to_end(path)
+    while len(_line_indexes) > LINE_INDEX_CACHE_SIZE:
+        _line_indexes.popitem(last=False)
+    return index
+
+
 class StrReplaceEditor(BaseTool):
     """A tool for executing bash commands"""
 
@@ -86,7 +185,30 @@ class StrReplaceEditor(BaseTool):
         "required": ["command", "path"],
     }
 
-    _file_history: list = defaultdict(list)
+    max_history_bytes: int = Field(
+        default=MAX_HISTORY_BYTES,
+        description="Upper bound on the memory used by the undo history of all files",
+    )
+    history_spill_dir: Optional[Path] = Field(
+        default=None,
+        description="Directory to write evicted undo history to instead of dropping it",
+    )
+
+    _file_history: EditHistory = PrivateAttr()
+
+    def model_post_init(self, __context) -> None:
+        self._file_history = EditHistory(
+            max_bytes=self.max_history_bytes, spill_dir=self.history_spill_dir
+        )
+
+    def close(self) -> None:
+        """Drop the undo history, deleting edits spilled to disk.
+
+        Not done in `cleanup()`, which runs after every agent run: edits of
+        earlier runs must stay undoable. Without a call to `close()`, the spill
+        files are deleted when the editor is garbage-collected.
+        """
+        self._file_history.clear()
 
     async def execute(
         self,
@@ -108,7 +230,7 @@ class StrReplaceEditor(BaseTool):
             if file_text is None:
                 raise ToolError("Parameter `file_text` is required for command: create")
             self.write_file(_path, file_text)
-            self._file_history[_path].append(file_text)
+            self._file_history.record(_path, file_text, file_text)
             result = ToolResult(output=f"File created successfully at: {_path}")
         elif command == "str_replace":
             if old_str is None:
@@ -166,22 +288,22 @@ class StrReplaceEditor(BaseTool):
                     "The `view_range` parameter is not allowed when `path` points to a directory."
                 )
 
-            _, stdout, stderr = await run(
-                rf"find {path} -maxdepth 2 -not -path '*/\.*'"
+            listing = "\n".join(str(entry) for entry in walk_directory(path))
+            return CLIResult(
+                output=f"Here's the files and directories up to {MAX_VIEW_DEPTH} levels deep in {path}, excluding hidden items:\n{listing}\n"
             )
-            if not stderr:
-                stdout = f"Here's the files and directories up to 2 levels deep in {path}, excluding hidden items:\n{stdout}\n"
-            return CLIResult(output=stdout, error=stderr)
 
-        file_content = self.read_file(path)
         init_line = 1
         if view_range:
             if len(view_range) != 2 or not all(isinstance(i, int) for i in view_range):
                 raise ToolError(
                     "Invalid `view_range`. It should be a list of two integers."
                 )
-            file_lines = file_content.split("\n")
-            n_lines_file = len(file_lines)
+            try:
+                line_index = get_line_index(path)
+            except Exception as e:
+                raise ToolError(f"Ran into {e} while trying to read {path}") from None
+            n_lines_file = line_index.n_lines
             init_line, final_line = view_range
             if init_line < 1 or init_line > n_lines_file:
                 raise ToolError(
@@ -197,9 +319,13 @@ class StrReplaceEditor(BaseTool):
                 )
 
             if final_line == -1:
-                file_content = "\n".join(file_lines[init_line - 1 :])
-            else:
-                file_content = "\n".join(file_lines[init_line - 1 : final_line])
+                final_line = n_lines_file
+            try:
+                file_content = line_index.read_lines(path, init_line, final_line)
+            except Exception as e:
+                raise ToolError(f"Ran into {e} while trying to read {path}") from None
+        else:
+            file_content = self.read_file(path)
 
         return CLIResult(
             output=self._make_output(file_content, str(path), init_line=init_line)
@@ -235,8 +361,8 @@ class StrReplaceEditor(BaseTool):
         # Write the new content to the file
         self.write_file(path, new_file_content)
 
-        # Save the content to history
-        self._file_history[path].append(file_content)
+        # Save the reverse edit to history
+        self._file_history.record(path, file_content, new_file_content)
 
         # Create a snippet of the edited section
         replacement_line = file_content.split(old_str)[0].count("\n")
@@ -281,7 +407,7 @@ class StrReplaceEditor(BaseTool):
         snippet = "\n".join(snippet_lines)
 
         self.write_file(path, new_file_text)
-        self._file_history[path].append(file_text)
+        self._file_history.record(path, file_text, new_file_text)
 
         success_msg = f"The file {path} has been edited. "
         success_msg += self._make_output(
@@ -294,10 +420,10 @@ class StrReplaceEditor(BaseTool):
 
     def undo_edit(self, path: Path):
         """Implement the undo_edit command."""
-        if not self._file_history[path]:
+        if not self._file_history.has_history(path):
             raise ToolError(f"No edit history found for {path}.")
 
-        old_text = self._file_history[path].pop()
+        old_text = self._file_history.undo(path, self.read_file(path))
         self.write_file(path, old_text)
 
         return CLIResult(
@@ -315,6 +441,7 @@ class StrReplaceEditor(BaseTool):
         """Write the content of a file to a given path; raise a ToolError if an error occurs."""
         try:
             path.write_text(file)
+            _line_indexes.pop(path, None)
         except Exception as e:
             raise ToolError(f"Ran into {e} while trying to write to {path}") from None
 
@@ -1,7 +1,10 @@
+from typing import Optional
+
 from app.tool.base import BaseTool
 
 
-_TERMINATE_DESCRIPTION = """Terminate the interaction when the request is met OR if the assistant cannot proceed further with the task."""
+_TERMINATE_DESCRIPTION = """Terminate the interaction when the request is met OR if the assistant cannot proceed further with the task.
+When the request is met, pass the final answer for the user in `answer`, so that it is delivered together with the termination."""
 
 
 class Terminate(BaseTool):
@@ -14,11 +17,18 @@ class Terminate(BaseTool):
                 "type": "string",
                 "description": "The finish status of the interaction.",
                 "enum": ["success", "failure"],
-            }
+            },
+            "answer": {
+                "type": "string",
+                "description": "(optional) The final answer to the user's request.",
+            },
         },
         "required": ["status"],
     }
 
-    async def execute(self, status: str) -> str:
+    async def execute(self, status: str, answer: Optional[str] = None) -> str:
         """Finish the current execution"""
-        return f"The interaction has been completed with status: {status}"
+        result = f"The interaction has been completed with status: {status}"
+        if answer:
+            result += f"\n\n{answer}"
+        return result
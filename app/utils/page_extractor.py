@@ -0,0 +1,196 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import html2text
+from bs4 import BeautifulSoup, Tag
+
+
+try:
+    import lxml  # noqa: F401
+
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+# 与正文无关、直接删除的标签
+_NOISE_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "form",
+    "button",
+    "input",
+    "select",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+)
+# class/id 命中这些关键词的元素视为页面框架（导航、广告、评论等）
+_BOILERPLATE_PATTERN = re.compile(
+    r"(^|[-_\s])(nav|navbar|menu|breadcrumbs?|footer|header|sidebar|side-bar|"
+    r"cookie|consent|banner|ads?|advert\w*|promo\w*|sponsor\w*|share|social|"
+    r"comments?|related|recommend\w*|popup|modal|subscribe|newsletter)($|[-_\s])",
+    re.IGNORECASE,
+)
+_CANDIDATE_TAGS = ("article", "main", "section", "div", "td")
+_CJK_PATTERN = re.compile(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+DEFAULT_PAGE_TOKENS: int = 2000
+CACHE_MAX_ENTRIES: int = 64
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数：中日韩字符按1个token计，其余按4个字符1个token计"""
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def paginate(text: str, max_tokens: int = DEFAULT_PAGE_TOKENS) -> List[str]:
+    """按段落把文本切分为若干页，每页不超过 max_tokens（单个超长段落会被硬切分）"""
+    pages: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for paragraph in text.split("\n\n"):
+        tokens = estimate_tokens(paragraph)
+        if current and current_tokens + tokens > max_tokens:
+            pages.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        while tokens > max_tokens:
+            # 超长段落按比例切分
+            cut = max(1, len(paragraph) * max_tokens // tokens)
+            pages.append(paragraph[:cut])
+            paragraph = paragraph[cut:]
+            tokens = estimate_tokens(paragraph)
+        if paragraph:
+            current.append(paragraph)
+            current_tokens += tokens
+    if current:
+        pages.append("\n\n".join(current))
+    return pages or [""]
+
+
+class PageExtractor:
+    """网页正文提取工具类，去除页面框架后转换为Markdown，并按URL和DOM哈希缓存结果
+
+    解析整页HTML较慢，异步代码应通过 asyncio.to_thread 调用；缓存由锁保护，
+    可在多个线程中同时使用。
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def extract_markdown(self, html: str, url: str = "") -> str:
+        """提取页面正文并转换为Markdown
+
+        Args:
+            html: 页面HTML
+            url: 页面URL，用于缓存和补全相对链接
+
+        Returns:
+            正文的Markdown文本
+        """
+        key = (url, hashlib.sha1(html.encode("utf-8", "ignore")).hexdigest())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        markdown = self._convert(html, url)
+        with self._lock:
+            self._cache[key] = markdown
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return markdown
+
+    def extract_page(
+        self,
+        html: str,
+        url: str = "",
+        page: int = 1,
+        max_tokens: int = DEFAULT_PAGE_TOKENS,
+    ) -> Dict[str, object]:
+        """提取正文并返回指定页
+
+        Returns:
+            包含 content、page、total_pages 的字典；页码超出范围时 content 为 None
+        """
+        pages = paginate(self.extract_markdown(html, url), max_tokens)
+        content = pages[page - 1] if 1 <= page <= len(pages) else None
+        return {"content": content, "page": page, "total_pages": len(pages)}
+
+    @staticmethod
+    def _convert(html: str, url: str) -> str:
+        soup = BeautifulSoup(html, _HTML_PARSER)
+        title = soup.title.get_text(strip=True) if soup.title else ""
+
+        for tag in soup(_NOISE_TAGS):
+            tag.decompose()
+        for tag in soup.find_all(PageExtractor._is_boilerplate):
+            tag.decompose()
+
+        root = PageExtractor._find_main_content(soup)
+
+        converter = html2text.HTML2Text(baseurl=url)
+        converter.body_width = 0
+        converter.ignore_images = True
+        converter.ignore_emphasis = False
+        converter.skip_internal_links = True
+        markdown = converter.handle(str(root))
+        # 合并多余空行
+        markdown = re.sub(r"\n{3,}", "\n\n", markdown).strip()
+
+        if title and not markdown.startswith("#"):
+            markdown = f"# {title}\n\n{markdown}"
+        return markdown
+
+    @staticmethod
+    def _is_boilerplate(tag: Tag) -> bool:
+        if tag.name in ("html", "body", "main", "article"):
+            return False
+        if tag.get("role") in ("navigation", "banner", "contentinfo", "complementary"):
+            return True
+        if tag.get("aria-hidden") == "true":
+            return True
+        attrs = " ".join(tag.get("class") or []) + " " + (tag.get("id") or "")
+        return bool(_BOILERPLATE_PATTERN.search(attrs))
+
+    @staticmethod
+    def _find_main_content(soup: BeautifulSoup) -> Tag:
+        """优先使用语义化标签，否则选择文本密度最高（正文多、链接少）的块"""
+        for selector in ("article", "main", "[role=main]"):
+            candidates = soup.select(selector)
+            if candidates:
+                return max(candidates, key=lambda tag: len(tag.get_text()))
+
+        body = soup.body or soup
+        best: Optional[Tag] = None
+        best_score = 0.0
+        for tag in body.find_all(_CANDIDATE_TAGS):
+            text_length = len(tag.get_text(" ", strip=True))
+            if text_length < 200:
+                continue
+            link_length = sum(
+                len(link.get_text(" ", strip=True)) for link in tag.find_all("a")
+            )
+            score = (text_length - 2 * link_length) * (
+                1 + len(tag.find_all("p", recursive=False))
+            )
+            if score > best_score:
+                best, best_score = tag, score
+        # 正文块过小时保留整个body，避免丢失内容
+        if best is None or len(best.get_text(strip=True)) < 0.3 * len(
+            body.get_text(strip=True)
+        ):
+            return body
+        return best
@@ -0,0 +1,279 @@
+"""单遍扫描的测试用例 Markdown 解析器
+
+逐行读取输入，用预编译的正则识别三种写法：
+
+- 标准格式：``## 测试用例 TC-001`` 开始一条用例，``### 测试用例名称/前置条件/测试步骤/预期结果`` 分段
+- 简单格式：包含“测试用例”和“名称”或“ID”的行开始一条用例，之后按关键字归入各字段
+- Markdown 表格：表头含“用例ID/名称/步骤/预期结果”等列，每行一条用例
+
+``# 模块：xxx`` 形式的标题设置之后用例所属的模块。各字段先收集到列表，用例结束时
+才拼接成字符串；解析结果以生成器逐条产出，输入可以是文件对象等任意行迭代器。
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+# 解析结果中每条用例包含的字段
+FIELDS = ("id", "module", "name", "precondition", "steps", "expected", "priority")
+_TEXT_FIELDS = FIELDS[2:]
+
+# 标准格式
+_CASE_HEADING = re.compile(r"^##\s*测试用例")
+_SECTION_HEADING = re.compile(
+    r"^###\s*(测试用例名称|用例名称|前置条件|测试步骤|预期结果|优先级)\s*[:：]?\s*(.*)$"
+)
+_SECTION_FIELDS = {
+    "测试用例名称": "name",
+    "用例名称": "name",
+    "前置条件": "precondition",
+    "测试步骤": "steps",
+    "预期结果": "expected",
+    "优先级": "priority",
+}
+_MODULE_HEADING = re.compile(r"^#{1,3}\s*(?:功能)?模块\s*[:：]\s*(.+)$")
+
+# 简单格式
+_SIMPLE_CASE_NAME = re.compile(r"名称|ID")
+_SIMPLE_FIELD = re.compile(r"前置条件|测试步骤|预期结果")
+_SIMPLE_FIELDS = {
+    "前置条件": "precondition",
+    "测试步骤": "steps",
+    "预期结果": "expected",
+}
+
+# Markdown 表格
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-{2,}:?\s*(?:\|\s*:?-{2,}:?\s*)*\|?$")
+_TABLE_BREAK = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_TABLE_COLUMNS = (
+    ("id", re.compile(r"ID|编号", re.IGNORECASE)),
+    ("module", re.compile(r"模块")),
+    ("precondition", re.compile(r"前置|前提")),
+    ("steps", re.compile(r"步骤")),
+    ("expected", re.compile(r"预期|期望")),
+    ("priority", re.compile(r"优先级")),
+    ("name", re.compile(r"名称|标题|用例|场景")),
+)
+
+# 多行字段的分隔符，其余字段以空格拼接
+_LINE_FIELDS = {"steps"}
+
+
+def _split_row(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+
+def _table_columns(cells: List[str]) -> Optional[List[Optional[str]]]:
+    """将表头单元格映射为字段名，无法识别为测试用例表时返回 None"""
+    columns: List[Optional[str]] = []
+    for cell in cells:
+        field = None
+        for name, pattern in _TABLE_COLUMNS:
+            if name not in columns and pattern.search(cell):
+                field = name
+                break
+        columns.append(field)
+    found = {field for field in columns if field}
+    if len(found) >= 2 and found & {"name", "steps", "expected"}:
+        return columns
+    return None
+
+
+class _CaseBuilder:
+    """正在解析的一条用例，各字段以列表收集"""
+
+    __slots__ = ("id", "module", "parts")
+
+    def __init__(self, case_id: str, module: Optional[str]):
+        self.id = case_id
+        self.module = module
+        self.parts: Dict[str, List[str]] = {}
+
+    def add(self, field: str, text: str) -> None:
+        if text:
+            self.parts.setdefault(field, []).append(text)
+
+    def has(self, field: str) -> bool:
+        return field in self.parts
+
+    def build(self) -> Dict[str, str]:
+        case = {"id": self.id, "module": self.module}
+        for field in _TEXT_FIELDS:
+            parts = self.parts.get(field)
+            if not parts:
+                case[field] = ""
+            elif field in _LINE_FIELDS:
+                case[field] = "\n".join(parts)
+            else:
+                case[field] = " ".join(parts)
+        return case
+
+
+def _default_case(lines: List[str]) -> Dict[str, str]:
+    """未识别出任何用例时，把整段内容作为一条用例"""
+    content = "\n".join(lines).strip()
+    name = content[:100].strip()
+    if len(content) > 100:
+        name += "..."
+    return {
+        "id": "1",
+        "module": None,
+        "name": name,
+        "precondition": "无",
+        "steps": content,
+        "expected": "测试通过",
+        "priority": "",
+    }
+
+
+def iter_test_cases(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """逐行解析测试用例，每解析完一条就产出一条
+
+    格式按第一条用例的写法确定；简单格式中出现标准格式的用例标题时改用标准格式。
+    """
+    mode: Optional[str] = None  # "standard" / "simple"
+    case: Optional[_CaseBuilder] = None
+    section: Optional[str] = None
+    # 当前段落的内容列表
+    parts: List[str] = []
+    module: Optional[str] = None
+    simple_id = 0
+    count = 0
+    # 尚未遇到任何用例前的内容，用于生成默认用例
+    preamble: Optional[List[str]] = []
+    # 表格：候选表头与已确认的列映射
+    header: Optional[List[Optional[str]]] = None
+    columns: Optional[List[Optional[str]]] = None
+
+    for raw in lines:
+        line = raw.strip()
+        if preamble is not None:
+            preamble.append(line)
+
+        if columns is not None:
+            if line.startswith("|"):
+                cells = _split_row(line)
+                row = _CaseBuilder("", module)
+                for field, cell in zip(columns, cells):
+                    if not field or not cell:
+                        continue
+                    if field == "id":
+                        row.id = cell
+                    elif field == "module":
+                        row.module = cell
+                    elif field in _LINE_FIELDS:
+                        for part in _TABLE_BREAK.split(cell):
+                            row.add(field, part.strip())
+                    else:
+                        row.add(field, _TABLE_BREAK.sub(" ", cell))
+                if row.parts:
+                    count += 1
+                    if not row.id:
+                        row.id = str(count)
+                    preamble = None
+                    yield row.build()
+                continue
+            columns = None
+
+        if header is not None:
+            candidate, header = header, None
+            if _TABLE_SEPARATOR.match(line):
+                if case is not None:
+                    count += 1
+                    yield case.build()
+                    case, section = None, None
+                columns = candidate
+                continue
+
+        if not line:
+            continue
+
+        first = line[0]
+        if first == "#":
+            if mode == "standard" and case is not None and line.startswith("###"):
+                match = _SECTION_HEADING.match(line)
+                if match:
+                    section = _SECTION_FIELDS[match.group(1)]
+                    parts = case.parts.setdefault(section, [])
+                    if match.group(2):
+                        parts.append(match.group(2).strip())
+                    continue
+
+            if "模块" in line:
+                match = _MODULE_HEADING.match(line)
+                if match:
+                    if case is not None:
+                        count += 1
+                        yield case.build()
+                        case, section = None, None
+                    module = match.group(1).strip()
+                    continue
+
+            if line.startswith("##") and _CASE_HEADING.match(line):
+                if case is not None:
+                    count += 1
+                    yield case.build()
+                mode = "standard"
+                preamble = None
+                case = _CaseBuilder(line.rsplit(None, 1)[-1], module)
+                section = None
+                continue
+
+            if mode == "standard":
+                if case is not None and (line.startswith("## ") or line == "##"):
+                    # 其他二级标题结束当前用例
+                    count += 1
+                    yield case.build()
+                    case, section = None, None
+                continue
+
+        elif mode == "standard":
+            if section is not None:
+                # 标准格式用例内部的表格也属于用例内容
+                parts.append(line)
+                continue
+            if case is not None:
+                continue
+
+        if first == "|":
+            header = _table_columns(_split_row(line))
+            if header is not None:
+                continue
+
+        if mode == "standard":
+            continue
+
+        # 简单格式
+        if "测试用例" in line and _SIMPLE_CASE_NAME.search(line):
+            if case is not None:
+                count += 1
+                yield case.build()
+            mode = "simple"
+            preamble = None
+            simple_id += 1
+            case = _CaseBuilder(str(simple_id), module)
+            case.add("name", line)
+        elif case is not None:
+            match = _SIMPLE_FIELD.search(line)
+            if match:
+                case.add(_SIMPLE_FIELDS[match.group(0)], line)
+            elif first != "#" and case.has("steps"):
+                # 默认追加到测试步骤
+                case.add("steps", line)
+
+    if case is not None:
+        count += 1
+        yield case.build()
+
+    if not count and preamble is not None:
+        yield _default_case(preamble)
+
+
+def parse_test_cases(content: str) -> List[Dict[str, str]]:
+    """解析整段 Markdown 文本中的测试用例"""
+    return list(iter_test_cases(content.splitlines()))
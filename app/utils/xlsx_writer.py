@@ -0,0 +1,358 @@
+"""只写模式的流式 XLSX 写入器
+
+不依赖第三方库，直接生成 Office Open XML。每个工作表的行先写入临时文件，
+关闭时再逐个压缩进 zip 包，内存占用与行数无关。单元格使用内联字符串，
+不维护共享字符串表。
+"""
+
+import csv
+import re
+import tempfile
+import zipfile
+from typing import Dict, IO, Iterable, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+
+# Excel 单元格最多容纳的字符数
+MAX_CELL_CHARS = 32767
+# 工作表名称的长度上限与禁用字符
+MAX_SHEET_NAME_CHARS = 31
+_INVALID_SHEET_NAME_CHARS = re.compile(r"[\[\]:*?/\\]")
+# XML 1.0 不允许的控制字符
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# 测试用例表格的列、.xlsx 中的列宽与自动换行的列
+TEST_CASE_HEADERS = ["测试用例ID", "测试用例名称", "前置条件", "测试步骤", "预期结果", "实际结果", "测试状态", "备注"]
+TEST_CASE_COLUMN_WIDTHS = [14, 30, 30, 50, 40, 20, 12, 20]
+TEST_CASE_WRAP_COLUMNS = (1, 2, 3, 4)
+# 不属于任何模块的测试用例所在的工作表
+DEFAULT_TEST_CASE_SHEET = "测试用例"
+
+# styles.xml 中 cellXfs 的序号
+STYLE_DEFAULT = 0
+STYLE_HEADER = 1
+STYLE_WRAP = 2
+
+_CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font>'
+    "</fonts>"
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FFD9E1F2"/><bgColor indexed="64"/></patternFill></fill>'
+    "</fills>"
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment vertical="center" wrapText="1"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1">'
+    '<alignment vertical="top" wrapText="1"/></xf>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+
+def column_letter(index: int) -> str:
+    """将从0开始的列序号转换为列字母（0 -> A, 26 -> AA）"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    text = _INVALID_XML_CHARS.sub("", str(value))
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS]
+    return escape(text)
+
+
+class XlsxSheet:
+    """一个工作表，行数据追加写入临时文件"""
+
+    def __init__(
+        self,
+        name: str,
+        columns: Sequence[str],
+        widths: Optional[Sequence[float]] = None,
+        wrap_columns: Iterable[int] = (),
+        freeze_header: bool = True,
+    ):
+        self.name = name
+        self.row_count = 0
+        self._letters = [column_letter(i) for i in range(len(columns))]
+        self._wrap_columns = set(wrap_columns)
+        self._columns = len(columns)
+        # 临时文件只保存行数据，工作表开头在关闭时写入，以便带上数据区域
+        self._file: IO[str] = tempfile.TemporaryFile(
+            "w+", encoding="utf-8", newline=""
+        )
+
+        parts = []
+        if freeze_header:
+            parts.append(
+                '<sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                "</sheetView></sheetViews>"
+            )
+        if widths:
+            parts.append("<cols>")
+            for i, width in enumerate(widths, start=1):
+                parts.append(f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>')
+            parts.append("</cols>")
+        self._head = "".join(parts)
+        self._write(columns, header=True)
+
+    def write_row(self, values: Sequence) -> None:
+        """追加一行数据"""
+        self._write(values, header=False)
+
+    def write_rows(self, rows: Iterable[Sequence]) -> None:
+        for values in rows:
+            self._write(values, header=False)
+
+    def _write(self, values: Sequence, header: bool) -> None:
+        self.row_count += 1
+        row = self.row_count
+        parts = [f'<row r="{row}">']
+        for i, value in enumerate(values):
+            letter = self._letters[i] if i < len(self._letters) else column_letter(i)
+            if header:
+                style = f' s="{STYLE_HEADER}"'
+            elif i in self._wrap_columns:
+                style = f' s="{STYLE_WRAP}"'
+            else:
+                style = ""
+            parts.append(
+                f'<c r="{letter}{row}"{style} t="inlineStr"><is><t xml:space="preserve">'
+                f"{_cell_text(value)}</t></is></c>"
+            )
+        parts.append("</row>")
+        self._file.write("".join(parts))
+
+    def _head_xml(self) -> str:
+        last_cell = f"{column_letter(max(self._columns, 1) - 1)}{max(self.row_count, 1)}"
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            f'<dimension ref="A1:{last_cell}"/>{self._head}<sheetData>'
+        )
+
+    def _copy_to(self, dest: IO[bytes]) -> None:
+        """将完整的工作表 XML 写入 zip 条目"""
+        dest.write(self._head_xml().encode("utf-8"))
+        self._file.seek(0)
+        while True:
+            chunk = self._file.read(1 << 20)
+            if not chunk:
+                break
+            dest.write(chunk.encode("utf-8"))
+        dest.write(b"</sheetData></worksheet>")
+
+    def _discard(self) -> None:
+        self._file.close()
+
+
+class XlsxWriter:
+    """流式写入 .xlsx 文件
+
+    用法::
+
+        with XlsxWriter("cases.xlsx") as writer:
+            sheet = writer.add_sheet("登录", ["ID", "名称"], widths=[12, 40])
+            sheet.write_row(["TC-001", "正常登录"])
+    """
+
+    def __init__(self, path: str, compresslevel: int = 6):
+        self.path = path
+        self.compresslevel = compresslevel
+        self._sheets: List[XlsxSheet] = []
+        self._names: Dict[str, XlsxSheet] = {}
+        self._closed = False
+
+    def __enter__(self) -> "XlsxWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    @property
+    def sheets(self) -> List[XlsxSheet]:
+        return list(self._sheets)
+
+    def add_sheet(
+        self,
+        name: str,
+        columns: Sequence[str],
+        widths: Optional[Sequence[float]] = None,
+        wrap_columns: Iterable[int] = (),
+        freeze_header: bool = True,
+    ) -> XlsxSheet:
+        """新建工作表并写入表头行，名称会按 Excel 规则清理并去重"""
+        sheet = XlsxSheet(
+            self._unique_name(name), columns, widths, wrap_columns, freeze_header
+        )
+        self._sheets.append(sheet)
+        self._names[sheet.name.lower()] = sheet
+        return sheet
+
+    def close(self) -> None:
+        """将所有工作表打包写入目标文件"""
+        if self._closed:
+            return
+        self._closed = True
+        if not self._sheets:
+            self.add_sheet("Sheet1", [])
+
+        content_types = [_CONTENT_TYPES_HEAD]
+        workbook = [
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            "<sheets>"
+        ]
+        workbook_rels = [
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        ]
+
+        with zipfile.ZipFile(
+            self.path,
+            "w",
+            compression=zipfile.ZIP_DEFLATED,
+            compresslevel=self.compresslevel,
+        ) as zf:
+            for i, sheet in enumerate(self._sheets, start=1):
+                part = f"worksheets/sheet{i}.xml"
+                with zf.open(f"xl/{part}", "w", force_zip64=True) as dest:
+                    sheet._copy_to(dest)
+                sheet._discard()
+
+                content_types.append(
+                    f'<Override PartName="/xl/{part}" '
+                    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                )
+                workbook.append(
+                    f'<sheet name="{escape(sheet.name, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+                )
+                workbook_rels.append(
+                    f'<Relationship Id="rId{i}" '
+                    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                    f'Target="{part}"/>'
+                )
+
+            styles_id = len(self._sheets) + 1
+            workbook_rels.append(
+                f'<Relationship Id="rId{styles_id}" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+                'Target="styles.xml"/>'
+            )
+            content_types.append("</Types>")
+            workbook.append("</sheets></workbook>")
+            workbook_rels.append("</Relationships>")
+
+            zf.writestr("[Content_Types].xml", "".join(content_types))
+            zf.writestr("_rels/.rels", _ROOT_RELS)
+            zf.writestr("xl/workbook.xml", "".join(workbook))
+            zf.writestr("xl/_rels/workbook.xml.rels", "".join(workbook_rels))
+            zf.writestr("xl/styles.xml", _STYLES)
+        self._sheets = []
+
+    def discard(self) -> None:
+        """放弃写入，删除所有临时文件"""
+        self._closed = True
+        for sheet in self._sheets:
+            sheet._discard()
+        self._sheets = []
+
+    def _unique_name(self, name: str) -> str:
+        name = _INVALID_SHEET_NAME_CHARS.sub("_", name).strip("' ") or "Sheet"
+        name = name[:MAX_SHEET_NAME_CHARS]
+        candidate, n = name, 2
+        while candidate.lower() in self._names:
+            suffix = f" ({n})"
+            candidate = name[: MAX_SHEET_NAME_CHARS - len(suffix)] + suffix
+            n += 1
+        return candidate
+
+
+def test_case_row(test_case: dict) -> list:
+    """测试用例记录对应的表格行，实际结果、测试状态与备注留空"""
+    return [
+        test_case.get("id", ""),
+        test_case.get("name", ""),
+        test_case.get("precondition", ""),
+        test_case.get("steps", ""),
+        test_case.get("expected", ""),
+        "",  # 实际结果
+        "",  # 测试状态
+        "",  # 备注
+    ]
+
+
+def write_test_cases_csv(output_file: str, test_cases: Iterable[dict]) -> None:
+    """将测试用例记录写入带 BOM 的 UTF-8 CSV 文件，便于 Excel 识别编码"""
+    with open(output_file, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(TEST_CASE_HEADERS)
+        for test_case in test_cases:
+            writer.writerow(test_case_row(test_case))
+
+
+def write_test_cases_xlsx(
+    output_file: str, test_cases: Iterable[dict], split_by_module: bool = True
+) -> None:
+    """将测试用例记录流式写入 .xlsx 工作簿，可按模块分工作表"""
+    with XlsxWriter(output_file) as writer:
+        sheets: Dict[str, XlsxSheet] = {}
+        for test_case in test_cases:
+            module = (
+                test_case.get("module") if split_by_module else None
+            ) or DEFAULT_TEST_CASE_SHEET
+            sheet = sheets.get(module)
+            if sheet is None:
+                sheet = writer.add_sheet(
+                    module,
+                    TEST_CASE_HEADERS,
+                    widths=TEST_CASE_COLUMN_WIDTHS,
+                    wrap_columns=TEST_CASE_WRAP_COLUMNS,
+                )
+                sheets[module] = sheet
+            sheet.write_row(test_case_row(test_case))
+        if not sheets:
+            writer.add_sheet(
+                DEFAULT_TEST_CASE_SHEET,
+                TEST_CASE_HEADERS,
+                widths=TEST_CASE_COLUMN_WIDTHS,
+                wrap_columns=TEST_CASE_WRAP_COLUMNS,
+            )
@@ -10,6 +10,16 @@ from fastapi.responses import JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
+# 下载接口按扩展名返回的内容类型，其余文件按二进制流下载
+DOWNLOAD_MEDIA_TYPES = {
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".csv": "text/csv; charset=utf-8",
+    ".md": "text/markdown; charset=utf-8",
+    ".txt": "text/plain; charset=utf-8",
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
 # 直接读取文件的函数
 def read_file_directly(file_path: str) -> Dict[str, Any]:
     """直接读取文件内容，支持不同类型的文件格式
@@ -127,7 +137,9 @@ class ConnectionManager:
             try:
                 agent = self.agents[client_id]
                 if hasattr(agent, 'cleanup') and callable(agent.cleanup):
-                    agent.cleanup()
+                    result = agent.cleanup()
+                    if asyncio.iscoroutine(result):
+                        asyncio.create_task(result)
             except Exception as e:
                 logger.error(f"清理代理资源时出错: {str(e)}")
             del self.agents[client_id]
@@ -277,6 +289,10 @@ async def run_agent_with_reasoning_stream(agent: Manus, content: str, websocket:
             "content": 100
         })
         
+        # 优先使用代理调用 terminate 结束时给出的最终回答（answer 参数，未提供时为结束前的最后一条回复）
+        if getattr(agent, "final_answer", None):
+            final_answer = agent.final_answer
+
         # 确保最终回答不为空
         if not final_answer or len(final_answer.strip()) == 0:
             # 如果仍然为空，尝试从所有步骤结果中提取
@@ -581,6 +597,59 @@ async def transform_user_stories(file_id: str):
         logger.error(f"用户故事生成失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"用户故事生成失败: {str(e)}")
 
+@app.post("/api/generate-test-cases")
+async def generate_test_cases(
+    file_id: str,
+    output_format: str = "xlsx",
+    reuse: bool = True,
+    document: Optional[str] = None,
+):
+    """按章节并发生成测试用例API端点
+
+    Args:
+        file_id: 上传文件的ID
+        output_format: 导出格式，xlsx/csv/md/jsonl/parquet
+        reuse: 是否复用未改动章节已生成的测试用例
+        document: 文档名称（如原始文件名），用于统计相对上一版本删除的章节
+    """
+    import urllib.parse
+
+    from app.testcase.pipeline import OUTPUT_FORMATS, run_pipeline
+
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {output_format}")
+    try:
+        # 查找文件
+        upload_dir = "uploads"
+        file_path = None
+
+        for filename in os.listdir(upload_dir):
+            if filename.startswith(file_id):
+                file_path = os.path.join(upload_dir, filename)
+                break
+
+        if not file_path:
+            raise HTTPException(status_code=404, detail="文件不存在")
+
+        output_file = os.path.join("outputs", f"{file_id}_测试用例.{output_format}")
+        result = await run_pipeline(
+            file_path, output_file, document=document, reuse=reuse
+        )
+
+        logger.info(f"测试用例生成成功: {file_path} -> {output_file}")
+
+        return {
+            **result.model_dump(),
+            "download_url": f"/api/download/{urllib.parse.quote(os.path.basename(output_file))}",
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"测试用例生成失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"测试用例生成失败: {str(e)}")
+
 @app.get("/api/version")
 async def get_version():
     """获取API版本信息"""
@@ -649,9 +718,12 @@ async def download_file(file_path: str):
     if not found_path:
         raise HTTPException(status_code=404, detail="File not found")
     
-    # 返回文件下载响应
+    # 返回文件下载响应，xlsx/csv 等按实际类型返回，便于浏览器和 Excel 识别
+    media_type = DOWNLOAD_MEDIA_TYPES.get(
+        os.path.splitext(found_path)[1].lower(), "application/octet-stream"
+    )
     return FileResponse(
         path=found_path,
         filename=os.path.basename(found_path),
-        media_type="application/octet-stream"
+        media_type=media_type
     ) 
\ No newline at end of file
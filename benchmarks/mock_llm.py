@@ -0,0 +1,282 @@
+"""A local OpenAI-compatible chat completions server with scripted responses.
+
+Responses are chosen by a script: a list of rules, of which the first whose
+`when` conditions match the request is used. Conditions:
+
+- `tool`: a tool of this name is offered in the request
+- `tool_choice`: the request's tool choice, e.g. "required"
+- `turn`: the number of assistant messages already in the conversation
+- `contains`: a substring of the last message
+
+A rule replies with `tool_calls` (a list of {"name", "arguments"}) and/or
+`content`; `content_tokens` pads the content with filler text to about that
+many tokens. Replies take `latency` seconds to the first token and then
+stream at `tokens_per_second`; content beyond the request's `max_tokens` is
+cut off with finish reason "length".
+
+Run standalone with `python -m benchmarks.mock_llm --port 8765`.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+
+# Rough size of a token, for turning text lengths into token counts
+CHARS_PER_TOKEN = 4
+# Tokens sent per chunk of a streamed response
+STREAM_CHUNK_TOKENS = 8
+
+_FILLER = (
+    "The system shall validate every input field, reject invalid values with a clear "
+    "message and keep the data entered so far. "
+)
+
+
+def _test_case_batch(count: int = 5) -> Dict[str, Any]:
+    return {
+        "test_cases": [
+            {
+                "id": f"TC-{i:03d}",
+                "module": "Benchmark",
+                "name": f"Validate input field {i}",
+                "preconditions": ["The user is logged in"],
+                "steps": ["Open the form", f"Enter an invalid value in field {i}", "Submit"],
+                "expected": "An error message is shown and the form keeps its data",
+                "priority": "P1",
+            }
+            for i in range(1, count + 1)
+        ]
+    }
+
+
+DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {
+        "when": {"tool": "planning", "tool_choice": "required"},
+        "tool_calls": [
+            {
+                "name": "planning",
+                "arguments": {
+                    "command": "create",
+                    "plan_id": "benchmark",
+                    "title": "Benchmark plan",
+                    "steps": ["Collect the input", "Process the input", "Report the result"],
+                },
+            }
+        ],
+    },
+    {
+        "when": {"tool": "create_chat_completion"},
+        "tool_calls": [{"name": "create_chat_completion", "arguments": _test_case_batch()}],
+    },
+    {
+        "when": {"tool": "python_execute", "turn": 0},
+        "content": "Let me compute that.",
+        "tool_calls": [
+            {"name": "python_execute", "arguments": {"code": "result = sum(range(1000))"}}
+        ],
+    },
+    {"content": "The task is complete.", "content_tokens": 200},
+]
+
+
+class MockSettings(BaseModel):
+    latency: float = Field(0.2, description="Seconds to the first token")
+    jitter: float = Field(0.0, description="Random extra latency, up to this many seconds")
+    tokens_per_second: float = Field(200.0, description="Output token rate")
+    script: List[Dict[str, Any]] = Field(default_factory=lambda: list(DEFAULT_SCRIPT))
+
+
+def _matches(when: Dict[str, Any], body: Dict[str, Any]) -> bool:
+    messages = body.get("messages") or []
+    if "tool" in when:
+        names = {
+            (tool.get("function") or {}).get("name") for tool in body.get("tools") or []
+        }
+        if when["tool"] not in names:
+            return False
+    if "tool_choice" in when and body.get("tool_choice") != when["tool_choice"]:
+        return False
+    if "turn" in when:
+        turn = sum(1 for message in messages if message.get("role") == "assistant")
+        if turn != when["turn"]:
+            return False
+    if "contains" in when:
+        last = messages[-1].get("content") if messages else ""
+        if when["contains"] not in str(last or ""):
+            return False
+    return True
+
+
+def _content(rule: Dict[str, Any]) -> str:
+    content = rule.get("content") or ""
+    target = rule.get("content_tokens", 0) * CHARS_PER_TOKEN
+    if len(content) < target:
+        filler = _FILLER * (target // len(_FILLER) + 1)
+        content = f"{content} {filler}"[:target]
+    return content
+
+
+def _tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class MockLLM:
+    """Replies to chat completion requests according to the script."""
+
+    def __init__(self, settings: Optional[MockSettings] = None):
+        self.settings = settings or MockSettings()
+        self.requests = 0
+
+    def reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        rule = next(
+            (r for r in self.settings.script if _matches(r.get("when") or {}, body)),
+            {"content": "OK"},
+        )
+        content = _content(rule)
+        tool_calls = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": call["name"],
+                    "arguments": json.dumps(call.get("arguments") or {}, ensure_ascii=False),
+                },
+            }
+            for call in rule.get("tool_calls") or []
+            # Scripted tool calls are only made if the request offers the tool
+            if any(
+                (tool.get("function") or {}).get("name") == call["name"]
+                for tool in body.get("tools") or []
+            )
+            and body.get("tool_choice") != "none"
+        ]
+
+        finish_reason = "tool_calls" if tool_calls else "stop"
+        max_tokens = body.get("max_tokens")
+        if max_tokens and _tokens(content) > max_tokens:
+            content = content[: max_tokens * CHARS_PER_TOKEN]
+            finish_reason = "length"
+
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages") or [])
+        completion_tokens = _tokens(content) + sum(
+            _tokens(call["function"]["arguments"]) for call in tool_calls
+        )
+        return {
+            "content": content or None,
+            "tool_calls": tool_calls or None,
+            "finish_reason": finish_reason,
+            "usage": {
+                "prompt_tokens": prompt_chars // CHARS_PER_TOKEN,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_chars // CHARS_PER_TOKEN + completion_tokens,
+            },
+        }
+
+    def first_token_delay(self) -> float:
+        return self.settings.latency + random.uniform(0, self.settings.jitter)
+
+
+def create_app(settings: Optional[MockSettings] = None) -> FastAPI:
+    mock = MockLLM(settings)
+    app = FastAPI(title="Mock LLM")
+    app.state.mock = mock
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        mock.requests += 1
+        reply = mock.reply(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "mock")
+        rate = mock.settings.tokens_per_second
+
+        if not body.get("stream"):
+            await asyncio.sleep(
+                mock.first_token_delay() + reply["usage"]["completion_tokens"] / rate
+            )
+            message = {"role": "assistant", "content": reply["content"]}
+            if reply["tool_calls"]:
+                message["tool_calls"] = reply["tool_calls"]
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": message,
+                            "finish_reason": reply["finish_reason"],
+                        }
+                    ],
+                    "usage": reply["usage"],
+                }
+            )
+
+        async def events():
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+                data = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+            await asyncio.sleep(mock.first_token_delay())
+            yield chunk({"role": "assistant", "content": ""})
+            content = reply["content"] or ""
+            step = STREAM_CHUNK_TOKENS * CHARS_PER_TOKEN
+            for start in range(0, len(content), step):
+                yield chunk({"content": content[start : start + step]})
+                await asyncio.sleep(STREAM_CHUNK_TOKENS / rate)
+            for index, call in enumerate(reply["tool_calls"] or []):
+                await asyncio.sleep(_tokens(call["function"]["arguments"]) / rate)
+                yield chunk({"tool_calls": [{"index": index, **call}]})
+            yield chunk({}, reply["finish_reason"])
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds to the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--script", help="JSON file with the response rules")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency=args.latency, jitter=args.jitter, tokens_per_second=args.tokens_per_second
+    )
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            settings.script = json.load(f)
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""End-to-end benchmarks against a local mock LLM server.
+
+    python -m benchmarks.run                                  # all scenarios
+    python -m benchmarks.run manus websocket --concurrency 16
+    python -m benchmarks.run --output report.json --baseline previous.json
+
+The mock server runs in its own process. Every scenario runs in a fresh
+process as well, with all LLM configurations pointed at the mock server and
+the working directory in a temporary directory, so that its peak RSS is its
+own. The report has p50/p95 latency, throughput and peak RSS per scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from benchmarks.mock_llm import MockSettings
+from benchmarks.scenarios import SCENARIOS, Measurement, ScenarioSettings
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Report values compared against a baseline, and whether higher is better
+COMPARED_METRICS = {
+    "p50": False,
+    "p95": False,
+    "throughput": True,
+    "peak_rss_mb": False,
+}
+# Smaller changes are not called better or worse
+NOISE_PERCENT = 5
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """The q-th percentile (0-100) of `values`, interpolating between the closest ranks."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(measurement: Measurement) -> Dict:
+    def rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 4) if value is not None else None
+
+    latencies = measurement.latencies
+    return {
+        "operations": len(latencies),
+        "errors": measurement.errors,
+        "first_error": measurement.first_error,
+        "elapsed": round(measurement.elapsed, 3),
+        "p50": rounded(percentile(latencies, 50)),
+        "p95": rounded(percentile(latencies, 95)),
+        "mean": rounded(sum(latencies) / len(latencies)) if latencies else None,
+        "max": rounded(max(latencies)) if latencies else None,
+        # Operations per second
+        "throughput": rounded(len(latencies) / measurement.elapsed)
+        if measurement.elapsed
+        else None,
+        "unit": measurement.unit,
+        "units_per_second": rounded(measurement.units / measurement.elapsed)
+        if measurement.elapsed
+        else None,
+    }
+
+
+def _run_scenario(name: str, settings: Dict, llm_url: str) -> Dict:
+    """Run one scenario in this (fresh) process and return its report."""
+    sys.path.insert(0, PROJECT_ROOT)
+    from app.config import config
+    from app.logger import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    # Streamed LLM responses and tool output are printed to stdout, also by other threads
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    for llm_settings in config.llm.values():
+        llm_settings.base_url = llm_url
+        llm_settings.api_key = "benchmark"
+        llm_settings.api_type = ""
+    # Every run should go through the LLM instead of reusing plans or cached test cases
+    config.planning.use_templates = False
+    config.planning.store = "memory"
+
+    with tempfile.TemporaryDirectory(prefix=f"benchmark_{name}_") as workdir:
+        os.chdir(workdir)
+        config.test_case.cache_dir = os.path.join(workdir, "test_case_cache")
+        measurement = asyncio.run(SCENARIOS[name]["run"](ScenarioSettings(**settings)))
+        os.chdir(PROJECT_ROOT)
+
+    report = summarize(measurement)
+    report["settings"] = settings
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def _serve_mock(settings: Dict, port: int) -> None:
+    import uvicorn
+
+    from benchmarks.mock_llm import create_app
+
+    uvicorn.run(
+        create_app(MockSettings(**settings)), host="127.0.0.1", port=port, log_level="warning"
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"Mock LLM server did not start on port {port}")
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(report: Dict, baseline: Dict) -> List[str]:
+    """Lines describing the change of every compared metric against `baseline`."""
+    lines = [f"Compared with {baseline.get('revision') or baseline.get('timestamp')}:"]
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        changes = []
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            if abs(change) < NOISE_PERCENT:
+                verdict = ""
+            elif (change > 0) == higher_is_better:
+                verdict = ", better"
+            else:
+                verdict = ", worse"
+            changes.append(f"{metric} {old:g} -> {new:g} ({change:+.1f}%{verdict})")
+        lines.append(f"  {name}: " + "; ".join(changes))
+    return lines
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks against a local mock LLM server")
+    parser.add_argument(
+        "scenarios", nargs="*", help=f"Scenarios to run (default: all): {', '.join(SCENARIOS)}"
+    )
+    parser.add_argument("-n", "--iterations", type=int, help="Operations per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, help="Operations at the same time")
+    parser.add_argument("--messages-per-session", type=int, default=3)
+    parser.add_argument("--pdf-pages", type=int, default=200)
+    parser.add_argument("--test-cases", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock seconds to the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mock random extra latency")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Mock output token rate")
+    parser.add_argument("--script", help="JSON file with the mock server's response rules")
+    parser.add_argument("-o", "--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare with")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    mock_settings = MockSettings(
+        latency=args.latency, jitter=args.jitter, tokens_per_second=args.tokens_per_second
+    )
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            mock_settings.script = json.load(f)
+
+    context = multiprocessing.get_context("spawn")
+    port = _free_port()
+    server = context.Process(
+        target=_serve_mock, args=(mock_settings.model_dump(), port), daemon=True
+    )
+    server.start()
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "mock": mock_settings.model_dump(exclude={"script"}),
+        "scenarios": {},
+    }
+    try:
+        _wait_for_port(port)
+        for name in names:
+            settings = {
+                "iterations": args.iterations or SCENARIOS[name]["iterations"],
+                "concurrency": args.concurrency or SCENARIOS[name]["concurrency"],
+                "messages_per_session": args.messages_per_session,
+                "pdf_pages": args.pdf_pages,
+                "test_cases": args.test_cases,
+            }
+            print(f"Running {name} ...", file=sys.stderr)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(
+                    _run_scenario, name, settings, f"http://127.0.0.1:{port}/v1"
+                ).result()
+            report["scenarios"][name] = result
+            print(
+                f"{name:>16}: p50 {result['p50']}s  p95 {result['p95']}s  "
+                f"{result['throughput']} ops/s  {result['units_per_second']} {result['unit']}/s  "
+                f"peak RSS {result['peak_rss_mb']} MB  errors {result['errors']}",
+                file=sys.stderr,
+            )
+    finally:
+        server.terminate()
+        server.join()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            print("\n".join(compare(report, json.load(f))), file=sys.stderr)
+    return 1 if any(s["errors"] for s in report["scenarios"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
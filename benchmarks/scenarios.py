@@ -0,0 +1,265 @@
+"""Benchmark scenarios. Each one runs an operation `iterations` times, `concurrency` at a time."""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class ScenarioSettings(BaseModel):
+    iterations: int
+    concurrency: int
+    # Scenario specific sizes
+    messages_per_session: int = 3
+    pdf_pages: int = 200
+    test_cases: int = 20000
+
+
+class Measurement(BaseModel):
+    """Latencies of the successful operations and how much work they did."""
+
+    latencies: List[float]
+    errors: int
+    elapsed: float
+    # Units of work, e.g. messages or test cases, for the throughput in units per second
+    units: int
+    unit: str
+    first_error: Optional[str] = None
+
+
+async def run_concurrently(
+    operation: Callable[[int], Awaitable[int]],
+    iterations: int,
+    concurrency: int,
+    unit: str,
+) -> Measurement:
+    """Run `operation(i)` for i in range(iterations), `concurrency` at a time.
+
+    The operation returns how many units of work it did.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: List[str] = []
+    units = 0
+
+    async def timed(i: int) -> None:
+        nonlocal units
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                done = await operation(i)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+            latencies.append(time.perf_counter() - started)
+            units += done
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(iterations)))
+    return Measurement(
+        latencies=latencies,
+        errors=len(errors),
+        elapsed=time.perf_counter() - started,
+        units=units,
+        unit=unit,
+        first_error=errors[0] if errors else None,
+    )
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 50) -> None:
+    """Write a text PDF of `pages` pages with the standard Helvetica font."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # the page tree, once the page objects are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(1, pages + 1):
+        lines = "".join(
+            f"(Requirement {page}.{line}: the system shall validate the input of field {line} "
+            f"and report invalid values.) Tj T*\n"
+            for line in range(1, lines_per_page + 1)
+        )
+        stream = f"BT /F1 9 Tf 36 760 Td 14 TL\n{lines}ET".encode("latin-1")
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref)
+        )
+
+
+def write_test_case_markdown(path: str, count: int) -> None:
+    """Write `count` test cases in the standard markdown format, in modules of 500."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# 测试用例\n\n")
+        for i in range(1, count + 1):
+            if i % 500 == 1:
+                f.write(f"# 模块：模块{i // 500 + 1}\n\n")
+            f.write(
+                f"## 测试用例 TC-{i:05d}\n"
+                f"### 测试用例名称\n验证输入字段{i}的校验规则\n"
+                f"### 优先级\nP{i % 4}\n"
+                f"### 前置条件\n用户已登录\n"
+                f"### 测试步骤\n1. 打开表单\n2. 在字段{i}中输入非法值\n3. 提交表单\n"
+                f"### 预期结果\n提示错误信息，已填写的数据保留\n\n"
+            )
+
+
+async def manus(settings: ScenarioSettings) -> Measurement:
+    """Complete `Manus` runs: a tool call followed by the answer."""
+    from app.agent.manus import Manus
+
+    async def operation(i: int) -> int:
+        await Manus().run("Compute the sum of the numbers below 1000")
+        return 1
+
+    return await run_concurrently(operation, settings.iterations, settings.concurrency, "runs")
+
+
+async def planning_flow(settings: ScenarioSettings) -> Measurement:
+    """Complete `PlanningFlow` runs with a `Manus` executor for a three-step plan."""
+    from app.agent.manus import Manus
+    from app.flow.planning import PlanningFlow
+
+    async def operation(i: int) -> int:
+        flow = PlanningFlow(Manus(), plan_id=f"benchmark_{i}_{uuid.uuid4().hex[:8]}")
+        await flow.execute("Collect, process and report the benchmark input")
+        return 1
+
+    return await run_concurrently(operation, settings.iterations, settings.concurrency, "runs")
+
+
+class _WebServer:
+    """The web app served by uvicorn on a free local port, on the current event loop."""
+
+    def __init__(self):
+        import uvicorn
+
+        from app.web.api import app
+
+        self.config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+        self.server = uvicorn.Server(self.config)
+        self.task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> str:
+        self.task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            if self.task.done():
+                self.task.result()
+            await asyncio.sleep(0.05)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"127.0.0.1:{port}"
+
+    async def __aexit__(self, *exc) -> None:
+        self.server.should_exit = True
+        await self.task
+
+
+async def websocket_sessions(settings: ScenarioSettings) -> Measurement:
+    """WebSocket chat sessions, each sending `messages_per_session` messages and awaiting the results."""
+    import websockets
+
+    async with _WebServer() as address:
+
+        async def operation(i: int) -> int:
+            async with websockets.connect(
+                f"ws://{address}/ws/chat/benchmark-{i}", max_size=None
+            ) as websocket:
+                for _ in range(settings.messages_per_session):
+                    await websocket.send(
+                        json.dumps(
+                            {"type": "message", "content": "Compute the sum of the numbers below 1000"}
+                        )
+                    )
+                    while True:
+                        message = json.loads(await websocket.recv())
+                        if message.get("type") == "error":
+                            raise RuntimeError(message.get("content"))
+                        if message.get("type") == "result":
+                            break
+            return settings.messages_per_session
+
+        return await run_concurrently(
+            operation, settings.iterations, settings.concurrency, "messages"
+        )
+
+
+async def upload_pdf(settings: ScenarioSettings) -> Measurement:
+    """Uploads of a large PDF, each followed by reading the uploaded file back as text."""
+    import httpx
+
+    path = os.path.abspath("benchmark.pdf")
+    write_pdf(path, settings.pdf_pages)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    async with _WebServer() as address:
+        async with httpx.AsyncClient(base_url=f"http://{address}", timeout=600) as client:
+
+            async def operation(i: int) -> int:
+                response = await client.post(
+                    "/api/upload", files={"file": ("benchmark.pdf", data, "application/pdf")}
+                )
+                response.raise_for_status()
+                file_id = response.json()["file_id"]
+                response = await client.get(f"/api/read-file/{file_id}")
+                response.raise_for_status()
+                if "Requirement" not in response.json().get("content", ""):
+                    raise RuntimeError("No text extracted from the uploaded PDF")
+                return settings.pdf_pages
+
+            return await run_concurrently(
+                operation, settings.iterations, settings.concurrency, "pages"
+            )
+
+
+async def excel_converter(settings: ScenarioSettings) -> Measurement:
+    """`ExcelConverter` runs converting a large markdown file of test cases to .xlsx."""
+    from app.tool.excel_converter import ExcelConverter
+
+    path = os.path.abspath("test_cases.md")
+    write_test_case_markdown(path, settings.test_cases)
+
+    async def operation(i: int) -> int:
+        result = await ExcelConverter().execute(path, os.path.abspath(f"test_cases_{i}.xlsx"))
+        if "Successfully" not in str(result):
+            raise RuntimeError(str(result))
+        return settings.test_cases
+
+    return await run_concurrently(
+        operation, settings.iterations, settings.concurrency, "test cases"
+    )
+
+
+# Scenarios with their default iterations and concurrency
+SCENARIOS: Dict[str, Dict] = {
+    "manus": {"run": manus, "iterations": 20, "concurrency": 4},
+    "planning_flow": {"run": planning_flow, "iterations": 10, "concurrency": 2},
+    "websocket": {"run": websocket_sessions, "iterations": 16, "concurrency": 8},
+    "upload_pdf": {"run": upload_pdf, "iterations": 8, "concurrency": 4},
+    "excel_converter": {"run": excel_converter, "iterations": 3, "concurrency": 1},
+}
@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import json
+
+from app.logger import logger
+from app.testcase.pipeline import run_pipeline
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate test cases for a requirements document, section by section"
+    )
+    parser.add_argument("input", help="Requirements document (.md, .txt, .pdf or .docx)")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Output file; the extension picks the format (.xlsx, .csv, .md, .jsonl, .parquet)",
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, help="Sections generated at the same time"
+    )
+    parser.add_argument(
+        "--document", help="Name of the document across versions (default: file name)"
+    )
+    parser.add_argument("--id-prefix", default="TC", help="Test case ID prefix")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Generate every section again instead of reusing unchanged sections",
+    )
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    result = await run_pipeline(
+        args.input,
+        args.output,
+        document=args.document,
+        reuse=not args.full,
+        max_concurrency=args.concurrency,
+        id_prefix=args.id_prefix,
+    )
+    logger.info(
+        f"{result.test_cases} test cases from {result.sections} sections "
+        f"({result.generated} generated, {result.reused} reused) written to {result.output_file}"
+    )
+    print(json.dumps(result.summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
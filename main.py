@@ -1,10 +1,12 @@
+import argparse
 import asyncio
+import sys
 
 from app.agent.manus import Manus
 from app.logger import logger
 
 
-async def main():
+async def interactive():
     agent = Manus()
     while True:
         try:
@@ -23,5 +25,70 @@ async def main():
             break
 
 
+async def batch(args: argparse.Namespace) -> int:
+    from app.testcase.batch import BatchRunner, find_documents
+
+    documents = find_documents(args.source, args.output_dir)
+    if not documents:
+        logger.error(f"No requirement documents found in {args.source}")
+        return 1
+
+    runner = BatchRunner(
+        args.output_dir,
+        output_format=args.format,
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        reuse=not args.full,
+    )
+    logger.info(f"Generating test cases for {len(documents)} documents")
+    state = await runner.run(documents, resume=not args.restart)
+    counts = state.counts()
+    return 1 if counts["failed"] or counts["pending"] else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OpenManus")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser(
+        "batch", help="Generate test cases for a directory or glob of documents"
+    )
+    batch_parser.add_argument(
+        "source", help="Directory (searched recursively) or glob of requirement documents"
+    )
+    batch_parser.add_argument(
+        "-o", "--output-dir", default="results", help="Results directory (default: results)"
+    )
+    batch_parser.add_argument(
+        "-f",
+        "--format",
+        default="xlsx",
+        choices=["xlsx", "csv", "md", "jsonl", "parquet"],
+        help="Output format (default: xlsx)",
+    )
+    batch_parser.add_argument(
+        "-w", "--workers", type=int, default=4, help="Documents processed at the same time"
+    )
+    batch_parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        help="LLM calls at the same time across all documents (default: [test_case] max_concurrency)",
+    )
+    batch_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Process every document, not only those not finished in an earlier run",
+    )
+    batch_parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Generate every section again instead of reusing unchanged sections",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.command == "batch":
+        sys.exit(asyncio.run(batch(args)))
+    asyncio.run(interactive())
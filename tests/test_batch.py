@@ -0,0 +1,38 @@
+import asyncio
+
+from app.testcase import batch
+from app.testcase.batch import BatchItem, BatchRunner, find_documents
+
+
+def test_generated_outputs_are_not_documents(tmp_path):
+    (tmp_path / "login.md").write_text("# 登录", encoding="utf-8")
+    (tmp_path / "login_测试用例.md").write_text("| 用例 |", encoding="utf-8")
+    (tmp_path / "results").mkdir()
+    (tmp_path / "results" / "notes.md").write_text("x", encoding="utf-8")
+
+    documents = find_documents(str(tmp_path), str(tmp_path / "results"))
+
+    assert documents == [str(tmp_path / "login.md")]
+    # An output directory around the source does not hide the documents
+    assert find_documents(str(tmp_path / "results"), str(tmp_path)) == [
+        str(tmp_path / "results" / "notes.md")
+    ]
+
+
+def test_state_of_earlier_sources_does_not_count(tmp_path, monkeypatch):
+    async def pipeline(input_file, output_file, **kwargs):
+        open(output_file, "w").close()
+        return type("Result", (), {"test_cases": 1, "sections": 1, "reused": 0})()
+
+    monkeypatch.setattr(batch, "run_pipeline", pipeline)
+    document = tmp_path / "a.md"
+    document.write_text("# A", encoding="utf-8")
+    runner = BatchRunner(str(tmp_path / "results"), output_format="md")
+    runner.state.items["/elsewhere/old.md"] = BatchItem(
+        input_file="/elsewhere/old.md", output_file="old.md", status="failed"
+    )
+
+    state = asyncio.run(runner.run([str(document)]))
+
+    assert state.counts() == {"done": 1, "failed": 0, "skipped": 0, "pending": 0}
+    assert "/elsewhere/old.md" in runner.state.items
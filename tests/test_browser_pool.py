@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("browser_use")
+
+from app.config import BrowserSettings
+from app.tool import browser_pool
+from app.tool.browser_pool import BrowserPool
+
+
+class FakePage:
+    async def evaluate(self, script):
+        return 1
+
+
+class FakeContext:
+    async def get_current_page(self):
+        return FakePage()
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    launched = 0
+
+    def __init__(self, config):
+        FakeBrowser.launched += 1
+        self.closed = False
+
+    async def new_context(self):
+        return FakeContext()
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeBrowser.launched = 0
+    monkeypatch.setattr(browser_pool, "BrowserUseBrowser", FakeBrowser)
+    return BrowserPool(
+        BrowserSettings(
+            max_browsers=1,
+            max_contexts_per_browser=2,
+            recycle_after_pages=3,
+            acquire_timeout=0.2,
+        )
+    )
+
+
+def test_acquire_times_out_when_every_context_is_leased(pool):
+    async def run():
+        leases = [await pool.acquire(), await pool.acquire()]
+        with pytest.raises(TimeoutError):
+            await pool.acquire()
+        await leases[0].release()
+        # A released lease frees its slot for the next caller
+        lease = await pool.acquire()
+        await lease.release()
+        await leases[1].release()
+
+    asyncio.run(run())
+
+
+def test_browser_over_its_page_budget_gets_no_new_contexts(pool):
+    async def run():
+        first = await pool.acquire()
+        first.record_pages(3)
+        # The first browser still serves `first`, but a new lease needs a new browser
+        second = await pool.acquire()
+        assert FakeBrowser.launched == 2
+        old_browser = first._entry.browser
+        await first.release()
+        assert old_browser.closed
+        await second.release()
+
+    asyncio.run(run())
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.testcase import dedup
+from app.testcase.dedup import DuplicateDetector
+from app.testcase.model import TestCase
+from app.tool.excel_converter import ExcelConverter
+
+
+LOGIN = "使用正确的手机号和验证码登录，系统提示登录成功并跳转到首页"
+REGISTER = "使用未注册的邮箱注册新账号，系统发送激活邮件并提示查收"
+SEARCH = "在搜索框输入商品名称后点击搜索，结果列表只显示名称匹配的商品"
+
+
+def test_near_duplicates_are_grouped_under_the_earliest():
+    texts = [
+        LOGIN,
+        REGISTER,
+        # Differs only in punctuation, whitespace and step numbering
+        "1. " + LOGIN.replace("，", " ") + "。",
+        SEARCH,
+        LOGIN + "！",
+    ]
+
+    groups = DuplicateDetector(0.8).find_duplicates(texts)
+
+    assert groups.tolist() == [0, 1, 0, 3, 0]
+
+
+def test_distinct_texts_are_kept():
+    texts = [LOGIN, REGISTER, SEARCH, LOGIN.replace("手机号", "邮箱地址")]
+
+    assert DuplicateDetector(0.9).find_duplicates(texts).tolist() == [0, 1, 2, 3]
+
+
+def test_empty_and_very_short_texts():
+    detector = DuplicateDetector(0.8)
+
+    assert detector.find_duplicates([]).tolist() == []
+    assert detector.find_duplicates([LOGIN]).tolist() == [0]
+    # Empty texts are never duplicates, not even of each other
+    assert detector.find_duplicates(["", "", "。"]).tolist() == [0, 1, 2]
+    # Texts shorter than a shingle are compared too
+    assert detector.find_duplicates(["ab", "AB", "cd", ""]).tolist() == [0, 0, 2, 3]
+
+
+def test_invalid_threshold():
+    with pytest.raises(ValueError):
+        DuplicateDetector(0)
+
+
+def test_deduplicate_reports_the_dropped_test_cases():
+    cases = [
+        TestCase(id="TC-1", name="登录", steps=[LOGIN], expected="成功"),
+        TestCase(id="TC-2", name="注册", steps=[REGISTER], expected="成功"),
+        TestCase(id="TC-3", module="其他", name="登录", steps=[LOGIN + "。"], expected="成功"),
+    ]
+
+    kept, dropped = dedup.deduplicate(cases)
+
+    assert [tc.id for tc in kept] == ["TC-1", "TC-2"]
+    assert dropped == [("TC-3", "TC-1")]
+
+
+def test_excel_converter_dedup_threshold(tmp_path):
+    source = tmp_path / "cases.jsonl"
+    cases = [
+        TestCase(id="TC-1", name="登录", steps=[LOGIN], expected="成功"),
+        TestCase(id="TC-2", name="登录", steps=[LOGIN + "！"], expected="成功"),
+        TestCase(id="TC-3", name="搜索", steps=[SEARCH], expected="显示结果"),
+    ]
+    source.write_text("\n".join(tc.model_dump_json() for tc in cases), encoding="utf-8")
+    output = tmp_path / "cases.csv"
+
+    asyncio.run(
+        ExcelConverter().execute(
+            input_file=str(source), output_file=str(output), dedup_threshold=0.8
+        )
+    )
+
+    rows = output.read_text(encoding="utf-8-sig").splitlines()
+    assert [row.split(",")[0] for row in rows[1:]] == ["TC-1", "TC-3"]
@@ -0,0 +1,51 @@
+import gc
+
+from app.tool.edit_history import EditHistory
+
+
+PATH = "/workspace/notes.txt"
+
+
+def _edit(history: EditHistory, versions: list) -> None:
+    for old, new in zip(versions, versions[1:]):
+        history.record(PATH, old, new)
+
+
+def _spilled_files(spill_dir):
+    return sorted(p.name for p in spill_dir.rglob("*.json"))
+
+
+def test_spilled_edits_are_deleted_when_undone(tmp_path):
+    history = EditHistory(max_bytes=300, spill_dir=tmp_path)
+    versions = [c * 100 for c in "abcde"]
+    _edit(history, versions)
+    assert _spilled_files(tmp_path)
+
+    text = versions[-1]
+    for expected in reversed(versions[:-1]):
+        text = history.undo(PATH, text)
+        assert text == expected
+
+    assert _spilled_files(tmp_path) == []
+    assert not history.has_history(PATH)
+
+
+def test_spilled_edits_are_capped(tmp_path):
+    history = EditHistory(max_bytes=300, spill_dir=tmp_path, max_spill_bytes=400)
+    _edit(history, [c * 100 for c in "abcdefghij"])
+
+    assert len(_spilled_files(tmp_path)) == 2
+    assert history.spilled_bytes <= 400
+
+
+def test_clear_and_garbage_collection_remove_the_spill_directory(tmp_path):
+    history = EditHistory(max_bytes=300, spill_dir=tmp_path)
+    _edit(history, [c * 100 for c in "abcde"])
+    history.clear()
+    assert list(tmp_path.iterdir()) == []
+
+    history = EditHistory(max_bytes=300, spill_dir=tmp_path)
+    _edit(history, [c * 100 for c in "abcde"])
+    del history
+    gc.collect()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.tool import google_search
+from app.tool.google_search import GoogleSearch
+
+
+# Seconds the stub takes to answer, long enough for concurrent queries to overlap
+DELAY = 0.3
+
+
+class _SearchStub(BaseHTTPRequestHandler):
+    requests: list = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)["q"][0]
+        self.requests.append(query)
+        time.sleep(DELAY)
+        body = (
+            f'<div class="result"><a href="https://example.com/{query}/1">1</a></div>'
+            f'<div class="result"><a href="https://example.com/{query}/2">2</a></div>'
+            '<a href="https://www.quark.cn/internal">internal</a>'
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    _SearchStub.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SearchStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(
+        google_search,
+        "SEARCH_URL",
+        f"http://127.0.0.1:{server.server_address[1]}/s?q={{query}}",
+    )
+    google_search._cache.clear()
+    yield _SearchStub.requests
+    server.shutdown()
+    server.server_close()
+    google_search._cache.clear()
+
+
+def test_concurrent_identical_queries_share_one_request(stub):
+    async def search():
+        tool = GoogleSearch()
+        results = await asyncio.gather(*(tool.execute(query="pytest") for _ in range(3)))
+        cached = await tool.execute(query="pytest", num_results=1)
+        return results, cached
+
+    results, cached = asyncio.run(search())
+
+    expected = ["https://example.com/pytest/1", "https://example.com/pytest/2"]
+    assert results == [expected] * 3
+    assert cached == expected[:1]
+    assert stub == ["pytest"]
+
+
+def test_queries_fan_out_in_parallel(stub):
+    started = time.perf_counter()
+    results = asyncio.run(GoogleSearch().execute(queries=["a", "b", "c"]))
+
+    assert list(results) == ["a", "b", "c"]
+    assert results["b"] == ["https://example.com/b/1", "https://example.com/b/2"]
+    assert sorted(stub) == ["a", "b", "c"]
+    assert time.perf_counter() - started < 3 * DELAY
+
+
+def test_cancelling_the_request_owner_does_not_cancel_waiters(stub):
+    async def search():
+        tool = GoogleSearch()
+        owner = asyncio.create_task(tool.execute(query="shared"))
+        await asyncio.sleep(DELAY / 3)
+        waiter = asyncio.create_task(tool.execute(query="shared"))
+        await asyncio.sleep(DELAY / 3)
+        owner.cancel()
+        return await waiter, owner
+
+    links, owner = asyncio.run(search())
+
+    assert owner.cancelled()
+    assert links == ["https://example.com/shared/1", "https://example.com/shared/2"]
+    # The waiter made the request again after the owner was cancelled
+    assert stub == ["shared", "shared"]
+
+
+def test_client_of_a_previous_event_loop_is_closed(stub):
+    first = asyncio.run(google_search._get_client())
+    second = asyncio.run(google_search._get_client())
+
+    assert second is not first
+    assert first.is_closed
@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("html2text")
+
+from app.utils.page_extractor import PageExtractor
+
+
+HTML = "<html><title>T</title><body>" + ("<p>" + "word " * 400 + "</p>") * 5 + "</body></html>"
+
+
+def test_pages_in_range():
+    result = PageExtractor().extract_page(HTML, "https://example.com", page=2, max_tokens=200)
+
+    assert result["page"] == 2
+    assert result["total_pages"] > 2
+    assert "word" in result["content"]
+
+
+@pytest.mark.parametrize("page", [0, 99])
+def test_out_of_range_page_has_no_content(page):
+    result = PageExtractor().extract_page(HTML, "https://example.com", page=page, max_tokens=200)
+
+    assert result["content"] is None
+    assert result["page"] == page
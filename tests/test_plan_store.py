@@ -0,0 +1,126 @@
+import random
+import sqlite3
+
+import pytest
+
+from app.tool.plan_store import (
+    PLAN_STATUSES,
+    InMemoryPlanStore,
+    SQLitePlanStore,
+    count_statuses,
+    plan_status,
+)
+from app.tool.planning import PlanningTool
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryPlanStore()
+    else:
+        store = SQLitePlanStore(tmp_path / "plans.db")
+        yield store
+        store.close()
+
+
+def _plan(plan_id: str, dependencies):
+    n_steps = len(dependencies)
+    return {
+        "plan_id": plan_id,
+        "title": plan_id,
+        "steps": [f"step {i}" for i in range(n_steps)],
+        "step_statuses": ["not_started"] * n_steps,
+        "step_notes": [""] * n_steps,
+        "step_dependencies": dependencies,
+    }
+
+
+def test_progress_matches_recomputation_after_random_updates(store):
+    # A diamond followed by a chain: 0 -> (1, 2) -> 3 -> 4 -> 5
+    dependencies = [[], [0], [0], [1, 2], [3], [4]]
+    store.put(_plan("p", dependencies))
+    tool = PlanningTool(plans=store)
+    statuses = ["not_started"] * len(dependencies)
+    rng = random.Random(7)
+
+    for _ in range(200):
+        index = rng.randrange(len(statuses))
+        status = rng.choice(PLAN_STATUSES)
+        tool.set_step_status("p", index, status)
+        statuses[index] = status
+
+        state = tool.get_plan_state("p")
+        assert state.step_statuses == statuses
+        assert state.ready_steps == [
+            i
+            for i, s in enumerate(statuses)
+            if s == "not_started" and all(statuses[d] == "completed" for d in dependencies[i])
+        ]
+        assert state.current_step_index == next(
+            (i for i, s in enumerate(statuses) if s in ("not_started", "in_progress")), None
+        )
+        assert state.status_counts == count_statuses(statuses)
+        listed = [plan["plan_id"] for plan in store.list_plans(plan_status(count_statuses(statuses)))]
+        assert listed == ["p"]
+
+
+def test_list_plans_by_status_in_update_order(store):
+    for plan_id in ("a", "b", "c"):
+        store.put(_plan(plan_id, [[], [0]]))
+    store.update_step("c", 0, "completed")
+    store.update_step("a", 0, "completed")
+
+    assert [plan["plan_id"] for plan in store.list_plans("in_progress")] == ["c", "a"]
+    assert [plan["plan_id"] for plan in store.list_plans("not_started")] == ["b"]
+
+
+def test_sqlite_step_update_only_touches_counters(tmp_path):
+    store = SQLitePlanStore(tmp_path / "plans.db")
+    store.put(_plan("p", [[], [0], [1]]))
+    store.update_step("p", 0, "completed", "done")
+    store.update_step("p", 1, "in_progress")
+
+    row = store._conn.execute(
+        "SELECT status, not_started, in_progress, completed, blocked FROM plans WHERE plan_id = 'p'"
+    ).fetchone()
+    assert row == ("in_progress", 1, 1, 1, 0)
+    assert store.step_count("p") == 3
+    store.close()
+
+
+def test_sqlite_progress_is_rebuilt_after_another_connection_writes(tmp_path):
+    path = tmp_path / "plans.db"
+    store = SQLitePlanStore(path)
+    other = SQLitePlanStore(path)
+    store.put(_plan("p", [[], [0]]))
+    assert store.progress("p").ready_steps == [0]
+
+    other.update_step("p", 0, "completed")
+
+    assert store.progress("p").ready_steps == [1]
+    store.close()
+    other.close()
+
+
+def test_sqlite_adds_counters_to_an_existing_database(tmp_path):
+    path = tmp_path / "plans.db"
+    conn = sqlite3.connect(str(path))
+    conn.executescript(
+        """
+        CREATE TABLE plans (plan_id TEXT PRIMARY KEY, title TEXT NOT NULL, status TEXT NOT NULL,
+            step_dependencies TEXT NOT NULL, updated_at REAL NOT NULL);
+        CREATE TABLE plan_steps (plan_id TEXT NOT NULL, step_index INTEGER NOT NULL,
+            text TEXT NOT NULL, status TEXT NOT NULL, notes TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (plan_id, step_index));
+        INSERT INTO plans VALUES ('p', 'old', 'in_progress', 'null', 0);
+        INSERT INTO plan_steps VALUES ('p', 0, 'a', 'completed', ''), ('p', 1, 'b', 'not_started', '');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    store = SQLitePlanStore(path)
+    assert store.step_count("p") == 2
+    store.update_step("p", 1, "completed")
+    assert store.list_plans("completed")[0]["plan_id"] == "p"
+    store.close()
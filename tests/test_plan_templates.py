@@ -0,0 +1,38 @@
+from app.tool.plan_templates import PlanTemplateLibrary
+
+
+REQUEST = (
+    "Read the uploaded requirements document with file_id abc123def, generate functional "
+    "test cases for every module, convert them to Excel and offer the download"
+)
+
+
+def test_match_substitutes_the_new_requests_specifics():
+    library = PlanTemplateLibrary()
+    library.add(REQUEST, "Plan", ["Read file abc123def", "Generate test cases"])
+
+    template = library.match(REQUEST.replace("abc123def", "zzz999yyy"))
+
+    assert template is not None
+    assert template.steps == ["Read file zzz999yyy", "Generate test cases"]
+
+
+def test_no_match_when_a_changed_specific_cannot_be_substituted():
+    library = PlanTemplateLibrary()
+    library.add(REQUEST, "Plan", ["Read the uploaded file", "Generate test cases"])
+
+    assert library.match(REQUEST.replace("abc123def", "zzz999yyy")) is None
+    assert library.match(REQUEST) is not None
+
+
+def test_use_counts_are_saved_on_flush(tmp_path):
+    path = tmp_path / "templates.json"
+    library = PlanTemplateLibrary(path)
+    library.add(REQUEST, "Plan", ["Read file abc123def"])
+    saved = path.read_text(encoding="utf-8")
+
+    library.match(REQUEST)
+    assert path.read_text(encoding="utf-8") == saved
+
+    library.flush()
+    assert PlanTemplateLibrary(path).match(REQUEST).uses == 2
@@ -0,0 +1,136 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.agent.base import BaseAgent
+from app.flow.planning import PlanningFlow
+from app.flow.scheduler import SchedulerFlow
+from app.schema import AgentState
+
+
+# Prompts given to the executor, in step order
+PROMPTS = []
+
+
+class RecordingAgent(BaseAgent):
+    """Finishes every step at once, recording the prompt it was given."""
+
+    name: str = "recorder"
+
+    async def step(self):
+        PROMPTS.append(self.memory.messages[-1].content)
+        self.update_memory("assistant", f"Wrote out_{len(PROMPTS) - 1}.txt.")
+        self.state = AgentState.FINISHED
+        return "done"
+
+
+def _run_plan(n_steps: int, **flow_args) -> list:
+    PROMPTS.clear()
+    flow = PlanningFlow(
+        RecordingAgent(), plan_id=f"plan_{uuid.uuid4().hex}", plan_templates=None, **flow_args
+    )
+
+    async def finalize():
+        return ""
+
+    flow._finalize_plan = finalize
+
+    async def run():
+        await flow.planning_tool.execute(
+            command="create",
+            plan_id=flow.active_plan_id,
+            title="plan",
+            steps=[f"step {i}" for i in range(n_steps)],
+        )
+        await flow.execute("")
+
+    asyncio.run(run())
+    return list(PROMPTS)
+
+
+def test_sequential_step_sees_all_earlier_results():
+    prompts = _run_plan(4)
+
+    last = prompts[3]
+    for i in range(3):
+        assert f"out_{i}.txt" in last
+
+
+def test_earlier_results_are_capped_keeping_the_latest():
+    prompts = _run_plan(6, max_context_chars=80)
+
+    last = prompts[5]
+    assert "out_4.txt" in last
+    assert "out_0.txt" not in last
+    assert "omitted for length" in last
+
+
+# Memories the interruptible agent started its steps with
+SEEN = []
+
+
+class InterruptibleAgent(BaseAgent):
+    """Step 1 records partial work and then hangs until the run is interrupted."""
+
+    name: str = "interruptible"
+
+    async def step(self):
+        messages = self.memory.messages
+        SEEN.append([m.content for m in messages])
+        if "step 1" in messages[0].content and len(messages) == 1:
+            self.update_memory("assistant", "Read half of the document.")
+            await asyncio.sleep(60)
+        self.state = AgentState.FINISHED
+        return "done"
+
+
+@pytest.mark.parametrize("flow_class", [PlanningFlow, SchedulerFlow])
+def test_resume_continues_a_step_running_on_a_pooled_executor(tmp_path, flow_class):
+    from app.checkpoint import CheckpointStore
+
+    plan_id = f"plan_{uuid.uuid4().hex}"
+    checkpoints = CheckpointStore(tmp_path)
+    SEEN.clear()
+
+    async def interrupted_run():
+        flow = flow_class(
+            InterruptibleAgent(),
+            plan_id=plan_id,
+            plan_templates=None,
+            checkpoint_id="run",
+            checkpoints=checkpoints,
+        )
+        await flow.planning_tool.execute(
+            command="create",
+            plan_id=plan_id,
+            title="plan",
+            steps=["step 0", "step 1"],
+            step_dependencies=[[], []],
+        )
+        task = asyncio.create_task(flow.execute(""))
+        # Step 0 finishes while step 1 is still running on a cloned executor
+        while not checkpoints.load("run"):
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(interrupted_run())
+    assert list(checkpoints.load("run")["running"]) == ["1"]
+
+    async def resumed_run():
+        flow = flow_class(InterruptibleAgent(), plan_templates=None, checkpoints=checkpoints)
+
+        async def finalize():
+            return ""
+
+        flow._finalize_plan = finalize
+        return await flow.resume("run")
+
+    SEEN.clear()
+    result = asyncio.run(resumed_run())
+
+    # Only step 1 ran again, starting from its saved context, without a second prompt
+    assert len(SEEN) == 1
+    assert SEEN[0][-1] == "Read half of the document."
+    assert sum("step 1" in (content or "") for content in SEEN[0]) == 1
+    assert "Step 0" in result and "Step 1" in result
@@ -0,0 +1,138 @@
+import asyncio
+import re
+import uuid
+from collections import deque
+
+from app.agent.base import BaseAgent
+from app.agent.toolcall import ToolCallAgent
+from app.flow.scheduler import SchedulerFlow
+from app.schema import AgentState
+from app.tool import Terminate, ToolCollection
+from app.tool.file_reader import FileReader
+
+
+# (agent name, step text) of every executed step
+RUNS = []
+
+
+class StubAgent(BaseAgent):
+    """Finishes a step at once, recording which agent ran it."""
+
+    async def step(self):
+        prompt = self.memory.messages[0].content
+        RUNS.append((self.name, re.search(r'working on step \d+: "(.*)"', prompt).group(1)))
+        self.state = AgentState.FINISHED
+        return "done"
+
+
+def _flow(**flow_args) -> SchedulerFlow:
+    flow = SchedulerFlow(
+        {"code": StubAgent(name="code"), "doc": StubAgent(name="doc")},
+        plan_id=f"plan_{uuid.uuid4().hex}",
+        plan_templates=None,
+        **flow_args,
+    )
+
+    async def finalize():
+        return ""
+
+    flow._finalize_plan = finalize
+    return flow
+
+
+def _run(flow: SchedulerFlow, steps: list) -> dict:
+    RUNS.clear()
+
+    async def run():
+        await flow.planning_tool.execute(
+            command="create",
+            plan_id=flow.active_plan_id,
+            title="plan",
+            steps=steps,
+            step_dependencies=[[] for _ in steps],
+        )
+        await flow.execute("")
+
+    asyncio.run(run())
+    return {text: name for name, text in RUNS}
+
+
+def test_steps_are_routed_to_the_pool_of_their_tag():
+    flow = _flow(work_stealing=False)
+
+    ran_on = _run(flow, ["[CODE] build", "[READ] spec", "[DOC] notes", "plain"])
+
+    assert ran_on == {
+        "[CODE] build": "code",
+        "[READ] spec": "doc",
+        "[DOC] notes": "doc",
+        # Untagged steps go to the first executor
+        "plain": "code",
+    }
+
+
+def test_pools_are_filled_to_their_sizes():
+    flow = _flow(pool_sizes={"code": 3})
+    flow._fill_pools()
+
+    assert len(flow.executor_pools["code"]) == 3
+    assert len(flow.executor_pools["doc"]) == flow.default_pool_size
+
+
+def _queued(*indices) -> deque:
+    return deque({"index": i, "text": f"step {i}"} for i in indices)
+
+
+def test_idle_pool_steals_the_oldest_queued_steps():
+    flow = _flow(pool_sizes={"code": 1, "doc": 2})
+    flow._fill_pools()
+    queues = {"code": _queued(0, 1, 2, 3), "doc": deque()}
+
+    assignments = flow._assign_steps(queues)
+
+    assert [(key, step["index"]) for key, _, step in assignments] == [
+        ("code", 0),
+        ("doc", 1),
+        ("doc", 2),
+    ]
+    assert [step["index"] for step in queues["code"]] == [3]
+    assert flow.executor_pools["code"] == [] and flow.executor_pools["doc"] == []
+
+
+def test_stealing_follows_steal_from_and_can_be_disabled():
+    for flow_args in ({"steal_from": {"doc": []}}, {"work_stealing": False}):
+        flow = _flow(pool_sizes={"code": 1, "doc": 1}, **flow_args)
+        flow._fill_pools()
+        queues = {"code": _queued(0, 1), "doc": deque()}
+
+        assignments = flow._assign_steps(queues)
+
+        assert [(key, step["index"]) for key, _, step in assignments] == [("code", 0)]
+        assert len(queues["code"]) == 1
+
+
+def test_pooled_clones_keep_the_agent_configuration():
+    template = ToolCallAgent(
+        name="reader",
+        available_tools=ToolCollection(FileReader(), Terminate()),
+        tool_choices="required",
+        special_tool_names=["terminate"],
+        prefetch=True,
+        max_steps=3,
+    )
+    template.update_memory("user", "an earlier request")
+    flow = SchedulerFlow({"reader": template}, plan_templates=None, default_pool_size=2)
+    flow._fill_pools()
+
+    clone = flow.executor_pools["reader"][1]
+    assert clone is not template
+    assert (clone.tool_choices, clone.special_tool_names, clone.prefetch, clone.max_steps) == (
+        "required",
+        ["terminate"],
+        True,
+        3,
+    )
+    assert [tool.name for tool in clone.available_tools] == ["file_reader", "terminate"]
+    # Tools are separate instances, and the run state starts empty
+    assert clone.available_tools.tools[0] is not template.available_tools.tools[0]
+    assert clone.memory.messages == [] and clone.llm is template.llm
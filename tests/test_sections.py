@@ -0,0 +1,38 @@
+from app.testcase.sections import MIN_PREAMBLE_CHARS, _split_long, split_sections
+
+
+def test_titled_title_page_is_not_a_section():
+    sections = split_sections("# 需求文档\n版本 1.0\n\n## 登录\n用户可以使用手机号登录。\n")
+
+    assert [section.title for section in sections] == ["登录"]
+    # The title page stays as context of the first section
+    assert sections[0].context == "# 需求文档\n版本 1.0\n"
+    assert sections[0].full_text.startswith("# 需求文档\n版本 1.0")
+
+
+def test_long_first_section_is_kept():
+    body = "需求内容。" * (MIN_PREAMBLE_CHARS // 5 + 1)
+    sections = split_sections(f"# 概述\n{body}\n## 登录\n用户可以登录。\n")
+
+    assert [section.title for section in sections] == ["概述", "登录"]
+
+
+def test_document_of_only_a_title_page_is_kept():
+    assert [s.title for s in split_sections("# 需求文档\n版本 1.0\n")] == ["需求文档"]
+
+
+def test_split_long_does_not_cut_at_a_leading_blank_line():
+    parts = _split_long("t", ["", "a" * 10, "b" * 10], 15)
+
+    assert [part.text for part in parts] == ["\n" + "a" * 10, "b" * 10]
+
+
+def test_digest_ignores_the_title_page_and_empty_parent_headings():
+    document = "# 需求文档\n版本 {}\n\n## 3 功能\n### 3.1 登录\n用户可以使用手机号登录。\n"
+
+    old, new = split_sections(document.format("1.0")), split_sections(document.format("1.1"))
+
+    assert [s.title for s in new] == ["3.1 登录"]
+    assert "## 3 功能" in new[0].full_text
+    assert new[0].digest == old[0].digest
+    assert new[0].full_text != old[0].full_text
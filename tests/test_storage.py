@@ -0,0 +1,31 @@
+import csv
+import zipfile
+
+from app.testcase.model import TestCase
+from app.testcase.storage import export_test_cases
+from app.utils.xlsx_writer import TEST_CASE_HEADERS
+
+
+CASES = [
+    TestCase(id="TC-001", module="登录", name="手机号登录", steps=["输入手机号"], expected="登录成功"),
+    TestCase(id="TC-002", module="注册", name="邮箱注册", steps=["输入邮箱"], expected="注册成功"),
+]
+
+
+def test_export_csv(tmp_path):
+    path = tmp_path / "cases.csv"
+
+    assert export_test_cases(path, CASES) == 2
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == TEST_CASE_HEADERS
+    assert [row[0] for row in rows[1:]] == ["TC-001", "TC-002"]
+
+
+def test_export_xlsx_with_a_sheet_per_module(tmp_path):
+    path = tmp_path / "cases.xlsx"
+
+    assert export_test_cases(path, CASES) == 2
+    with zipfile.ZipFile(path) as zf:
+        workbook = zf.read("xl/workbook.xml").decode("utf-8")
+    assert "登录" in workbook and "注册" in workbook
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.exceptions import ToolError
+from app.tool import str_replace_editor
+from app.tool.str_replace_editor import (
+    StrReplaceEditor,
+    _LineIndex,
+    get_line_index,
+    walk_directory,
+)
+
+
+def test_edits_stay_undoable_after_cleanup(tmp_path):
+    path = tmp_path / "notes.txt"
+    spill_dir = tmp_path / "spill"
+    editor = StrReplaceEditor(max_history_bytes=300, history_spill_dir=spill_dir)
+
+    async def run():
+        await editor.execute(command="create", path=str(path), file_text="a" * 100 + "\n")
+        for old, new in zip("abc", "bcd"):
+            await editor.execute(
+                command="str_replace", path=str(path), old_str=old * 100, new_str=new * 100
+            )
+        # The end of an agent run
+        await editor.cleanup()
+        for _ in range(3):
+            await editor.execute(command="undo_edit", path=str(path))
+
+    asyncio.run(run())
+
+    assert path.read_text() == "a" * 100 + "\n"
+    # Spilled edits were read back and deleted as they were undone; only the
+    # entry of the file's creation is left
+    assert len(list(spill_dir.rglob("*.json"))) == 1
+
+
+def test_close_deletes_spilled_edits(tmp_path):
+    path = tmp_path / "notes.txt"
+    spill_dir = tmp_path / "spill"
+    editor = StrReplaceEditor(max_history_bytes=300, history_spill_dir=spill_dir)
+
+    async def run():
+        await editor.execute(command="create", path=str(path), file_text="a" * 100)
+        for old, new in zip("abcd", "bcde"):
+            await editor.execute(
+                command="str_replace", path=str(path), old_str=old * 100, new_str=new * 100
+            )
+
+    asyncio.run(run())
+    assert list(spill_dir.rglob("*.json"))
+
+    editor.close()
+    assert list(spill_dir.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "one\ntwo\nthree\nfour\nfive\nsix\nseven\n",
+        "one\ntwo\nthree\nfour\nfive\nsix\nseven",
+        "one\r\ntwo\r\nthree\r\nfour\r\nfive\r\nsix\r\nseven\r\n",
+        "\n\nblank lines\n\n",
+        "",
+    ],
+    ids=["trailing-newline", "no-trailing-newline", "crlf", "blank-lines", "empty"],
+)
+def test_line_index_ranges_match_a_full_read(tmp_path, monkeypatch, text):
+    # Small chunks and stride, so that newlines fall on chunk and checkpoint boundaries
+    monkeypatch.setattr(str_replace_editor, "_READ_CHUNK_SIZE", 5)
+    path = tmp_path / "file.txt"
+    path.write_bytes(text.encode())
+    lines = path.read_text().split("\n")
+
+    index = _LineIndex(path, stride=3)
+
+    assert index.n_lines == len(lines)
+    for init_line in range(1, len(lines) + 1):
+        for final_line in range(init_line, len(lines) + 1):
+            expected = "\n".join(lines[init_line - 1 : final_line])
+            assert index.read_lines(path, init_line, final_line) == expected
+
+
+def test_ranged_view(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 11)))
+    editor = StrReplaceEditor()
+
+    async def view(view_range):
+        return await editor.execute(command="view", path=str(path), view_range=view_range)
+
+    output = asyncio.run(view([3, 4])).split("\n")[1:]
+    assert output == ["     3\tline 3", "     4\tline 4", ""]
+    # -1 reads to the end, including the empty line after the trailing newline
+    assert asyncio.run(view([10, -1])).split("\n")[1:] == ["    10\tline 10", "    11\t", ""]
+    for invalid in ([0, 2], [5, 12], [5, 4]):
+        with pytest.raises(ToolError):
+            asyncio.run(view(invalid))
+
+
+def test_ranged_view_sees_changes_to_the_file(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("a\nb\n")
+    assert get_line_index(path).read_lines(path, 2, 2) == "b"
+
+    path.write_text("a\nchanged\nc\n")
+
+    assert get_line_index(path).read_lines(path, 2, 3) == "changed\nc"
+
+
+def test_walk_directory_depth_and_ignore_patterns(tmp_path):
+    for relative in ("a/b/c/deep.txt", "a/top.txt", ".git/config", "a/.env", "build/out.o", "z.txt"):
+        (tmp_path / relative).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative).write_text("")
+
+    def listing(**kwargs):
+        return [str(p.relative_to(tmp_path)) for p in walk_directory(tmp_path, **kwargs)]
+
+    # Hidden entries are skipped, and nothing is listed below the depth limit
+    assert listing() == [".", "a", "a/b", "a/top.txt", "build", "build/out.o", "z.txt"]
+    assert listing(max_depth=0) == ["."]
+    assert listing(max_depth=1) == [".", "a", "build", "z.txt"]
+    assert "a/b/c/deep.txt" in listing(max_depth=4)
+    assert listing(ignore_patterns=(".*", "build", "*.txt")) == [".", "a", "a/b"]
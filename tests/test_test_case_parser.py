@@ -0,0 +1,93 @@
+"""Differential tests of the single-pass parser against the original standard-format parser."""
+
+import pytest
+
+from app.utils.test_case_parser import parse_test_cases
+
+
+def baseline_parse_standard_format(content: str) -> list:
+    """The standard-format parser ExcelConverter used before the single-pass parser."""
+    test_cases = []
+    current_test_case = None
+    current_section = None
+
+    for line in content.split("\n"):
+        line = line.strip()
+        if line.startswith("## 测试用例"):
+            if current_test_case:
+                test_cases.append(current_test_case)
+            current_test_case = {
+                "id": line.split(" ")[-1],
+                "name": "",
+                "precondition": "",
+                "steps": "",
+                "expected": "",
+            }
+            current_section = None
+        elif current_test_case:
+            if line.startswith("### 测试用例名称"):
+                current_section = "name"
+            elif line.startswith("### 前置条件"):
+                current_section = "precondition"
+            elif line.startswith("### 测试步骤"):
+                current_section = "steps"
+            elif line.startswith("### 预期结果"):
+                current_section = "expected"
+            elif line.startswith("## "):
+                test_cases.append(current_test_case)
+                current_test_case = None
+                current_section = None
+            elif line and not line.startswith("#") and current_section:
+                if current_section == "steps":
+                    current_test_case[current_section] += line + "\n"
+                else:
+                    current_test_case[current_section] += line + " "
+
+    if current_test_case:
+        test_cases.append(current_test_case)
+    return test_cases
+
+
+def _normalized(cases: list) -> list:
+    fields = ("id", "name", "precondition", "steps", "expected")
+    return [{field: case[field].strip() for field in fields} for case in cases]
+
+
+def _document(case_ids: list) -> str:
+    return "\n".join(
+        f"## 测试用例{case_id}\n"
+        f"### 测试用例名称\n用例{index}\n"
+        f"### 前置条件\n用户已登录\n"
+        f"### 测试步骤\n打开页面\n提交表单{index}\n"
+        f"### 预期结果\n提交成功\n"
+        for index, case_id in enumerate(case_ids, start=1)
+    )
+
+
+@pytest.mark.parametrize(
+    "case_ids",
+    [
+        # Heading with the ID separated by a space
+        [" TC-001", " TC-002"],
+        # Heading with the ID attached to "测试用例"
+        ["1", "TC-002"],
+        # Both shapes in one document
+        [" TC-001", "2", " TC-003"],
+    ],
+)
+def test_standard_format_matches_baseline(case_ids):
+    content = _document(case_ids)
+
+    expected = baseline_parse_standard_format(content)
+    assert len(expected) == len(case_ids)
+    assert _normalized(parse_test_cases(content)) == _normalized(expected)
+
+
+def test_attached_id_does_not_leak_section_headings():
+    cases = parse_test_cases("## 测试用例1\n### 测试用例名称\nA\n### 测试步骤\ns1\n### 预期结果\ne1\n")
+
+    assert len(cases) == 1
+    assert cases[0]["id"] == "测试用例1"
+    assert cases[0]["name"] == "A"
+    assert cases[0]["steps"] == "s1"
+    assert cases[0]["expected"] == "e1"
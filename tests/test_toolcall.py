@@ -0,0 +1,36 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.agent.manus import Manus
+from app.schema import Function, ToolCall
+
+
+class ScriptedLLM:
+    """Answers with an interim explanation first, then terminates with the answer."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ask_tool(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            return SimpleNamespace(content="I will now read the file.", tool_calls=[])
+        call = ToolCall(
+            id="1",
+            function=Function(
+                name="terminate",
+                arguments=json.dumps({"status": "success", "answer": "42 test cases"}),
+            ),
+        )
+        return SimpleNamespace(content="", tool_calls=[call])
+
+
+def test_interim_reply_does_not_end_the_run():
+    agent = Manus()
+    agent.llm = llm = ScriptedLLM()
+
+    asyncio.run(agent.run("Generate test cases"))
+
+    assert llm.calls == 2
+    assert agent.final_answer == "42 test cases"
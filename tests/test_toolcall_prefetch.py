@@ -0,0 +1,77 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from app.agent.toolcall import ToolCallAgent
+from app.schema import Function, ToolCall
+from app.tool import Terminate, ToolCollection
+from app.tool.file_reader import FileReader
+
+
+FILE_ID = "0b1f6a52-3c4d-4e5f-8a9b-0c1d2e3f4a5b"
+SECONDS = 0.5
+CHUNKS = 10
+
+
+class StreamingLLM:
+    """Streams each answer in CHUNKS chunks over SECONDS: first reading the uploaded file, then terminating."""
+
+    def __init__(self):
+        self.calls = 0
+        # Arrival times of the streamed chunks of every call
+        self.chunks: list = []
+
+    async def ask_tool(self, **kwargs):
+        self.calls += 1
+        arrivals = [time.perf_counter()]
+        for _ in range(CHUNKS):
+            await asyncio.sleep(SECONDS / CHUNKS)
+            arrivals.append(time.perf_counter())
+        self.chunks.append(arrivals)
+        if self.calls == 1:
+            name, arguments = "file_reader", {"file_id": FILE_ID}
+        else:
+            name, arguments = "terminate", {"status": "success"}
+        call = ToolCall(
+            id=str(self.calls), function=Function(name=name, arguments=json.dumps(arguments))
+        )
+        return SimpleNamespace(content="", tool_calls=[call])
+
+
+def test_prefetched_read_overlaps_with_the_llm_call(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / f"{FILE_ID}.txt").write_text("requirements", encoding="utf-8")
+
+    read_file = FileReader._read_file_directly
+    reads = []
+
+    def slow_read(self, file_path):
+        # Blocking, like parsing a large PDF
+        started = time.perf_counter()
+        time.sleep(SECONDS)
+        reads.append((started, time.perf_counter()))
+        return read_file(self, file_path)
+
+    monkeypatch.setattr(FileReader, "_read_file_directly", slow_read)
+
+    agent = ToolCallAgent(
+        available_tools=ToolCollection(FileReader(), Terminate()),
+        prefetch=True,
+        max_steps=3,
+    )
+    agent.llm = llm = StreamingLLM()
+
+    asyncio.run(agent.run(f"Generate test cases for the uploaded file {FILE_ID}"))
+
+    tool_messages = [m for m in agent.memory.messages if m.role == "tool"]
+    assert "requirements" in tool_messages[0].content
+    # The file was read once, ahead of time, while the first answer was streaming in
+    assert len(reads) == 1
+    first_call = llm.chunks[0]
+    read_started, _ = reads[0]
+    assert first_call[0] <= read_started < first_call[-1]
+    # ... without holding up the stream
+    gaps = [b - a for a, b in zip(first_call, first_call[1:])]
+    assert max(gaps) < SECONDS / 2